@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandParser
+
+from apidocs.schema import build
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to generate the OpenAPI schema once at build time instead of on every request to the documentation.
+    """
+    help = 'The buildschema command writes the OpenAPI schema served at /docs/ and /redoc/ to a JSON file.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Accepts the parser object as
+        a parameter and adds the optional path of the output file.
+        """
+        parser.add_argument('path', nargs='?', default=None, help='Output file, SCHEMA_FILE by default.')
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Generates the schema
+        and reports the path of the written file.
+        """
+        path: Path = build(options['path'])
+        self.stdout.write(self.style.SUCCESS(f'Schema written to {path}'))
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import drf_yasg
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, yaml_sane_dump
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+API_INFO: openapi.Info = openapi.Info(
+    title="API Documentation",
+    default_version='v1',
+    description="Your API description",
+    terms_of_service="https://www.example.com/policies/terms/",
+    contact=openapi.Contact(email="contact@example.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+FINGERPRINT_KEY: str = "x-schema-fingerprint"
+
+_cache: Dict[str, Tuple[bytes, str]] = {}
+_lock: threading.Lock = threading.Lock()
+
+
+def source_files() -> Iterator[Path]:
+    """
+    The source_files function does not accept any parameters. Yields the python files of the project
+    applications the schema is generated from, in a stable order.
+    """
+    base_dir: Path = Path(settings.BASE_DIR).resolve()
+    for config in sorted(apps.get_app_configs(), key=lambda config: config.name):
+        path: Path = Path(config.path).resolve()
+        if base_dir in path.parents:
+            yield from sorted(file for file in path.rglob("*.py") if "migrations" not in file.parts)
+    yield from sorted((base_dir / settings.ROOT_URLCONF.split(".")[0]).glob("*.py"))
+
+
+def fingerprint() -> str:
+    """
+    The fingerprint function does not accept any parameters. Hashes the sources of the project applications
+    and the versions of the schema libraries. Returns the hash as a hex string, which only changes
+    when the code the schema is generated from changes.
+    """
+    digest = hashlib.sha256(f"{drf_yasg.__version__}:{rest_framework.VERSION}".encode())
+    for file in source_files():
+        digest.update(str(file.relative_to(settings.BASE_DIR)).encode())
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def generate(code_fingerprint: str) -> bytes:
+    """
+    The generate function accepts the fingerprint of the code. Introspects all views and serializers
+    and returns the public OpenAPI schema encoded as JSON with the fingerprint embedded.
+    """
+    schema: openapi.Swagger = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    schema[FINGERPRINT_KEY] = code_fingerprint
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def build(path: Optional[Path] = None) -> Path:
+    """
+    The build function accepts an optional path of the artifact, by default the SCHEMA_FILE setting.
+    Generates the schema and writes it to the file. Returns the path of the written file.
+    """
+    path = Path(path or settings.SCHEMA_FILE)
+    write(path, generate(fingerprint()))
+    return path
+
+
+def write(path: Path, data: bytes) -> None:
+    """
+    The write function accepts the path of the artifact and its content. Writes the content to a temporary
+    file and atomically replaces the artifact, so concurrently starting processes never read a partial file.
+    """
+    temporary: Path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def load() -> bytes:
+    """
+    The load function does not accept any parameters. Reads the prebuilt schema artifact if it exists
+    and was built from the current code, otherwise generates the schema and tries to store it for the next
+    process. Returns the schema encoded as JSON.
+    """
+    code_fingerprint: str = fingerprint()
+    path: Path = Path(settings.SCHEMA_FILE)
+    try:
+        data: bytes = path.read_bytes()
+        if json.loads(data).get(FINGERPRINT_KEY) == code_fingerprint:
+            return data
+    except (OSError, ValueError):
+        pass
+
+    data = generate(code_fingerprint)
+    try:
+        write(path, data)
+    except OSError:
+        pass
+    return data
+
+
+def get_schema(fmt: str = "json") -> Tuple[bytes, str]:
+    """
+    The get_schema function accepts the format of the schema, 'json' or 'yaml'. Loads the schema once
+    per process and keeps the encoded document in memory. Returns the encoded document and its ETag.
+    """
+    cached: Optional[Tuple[bytes, str]] = _cache.get(fmt)
+    if cached is None:
+        with _lock:
+            if "json" not in _cache:
+                data: bytes = load()
+                _cache["json"] = (data, f'"{json.loads(data)[FINGERPRINT_KEY][:32]}"')
+            if fmt == "yaml" and "yaml" not in _cache:
+                data, etag = _cache["json"]
+                document: OrderedDict = json.loads(data, object_pairs_hook=OrderedDict)
+                _cache["yaml"] = (yaml_sane_dump(document, binary=True), f'{etag[:-1]}-yaml"')
+            cached = _cache[fmt]
+    return cached
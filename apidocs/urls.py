@@ -0,0 +1,8 @@
+from django.urls import path
+
+from apidocs.views import SchemaView
+
+urlpatterns = [
+    path('docs/', SchemaView.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('redoc/', SchemaView.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.request import Request
+
+from apidocs.schema import API_INFO, get_schema
+
+BaseSchemaView = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=[permissions.AllowAny, ],
+)
+
+
+class SchemaView(BaseSchemaView):
+    """
+    The SchemaView class inherits from the schema view class created by the get_schema_view function
+    of the drf_yasg module. Renders the Swagger UI and ReDoc pages as usual, but serves the schema itself
+    from the document generated once per process or prebuilt by the buildschema command.
+    """
+    def get(self, request: Request, version: str = '', format: str = None) -> HttpResponse:
+        """
+        The get function overrides the method of the parent class. Accepts the request object, the API version
+        and the requested format as parameters. If the schema document is requested, returns the cached
+        document with ETag and Cache-Control headers, answering conditional requests with 304. Otherwise
+        calls the method of the parent class.
+        """
+        media_type: str = request.accepted_renderer.media_type
+        if 'html' in media_type:
+            return super().get(request, version, format)
+
+        content, etag = get_schema('yaml' if 'yaml' in media_type else 'json')
+        response: HttpResponse = get_conditional_response(request, etag=etag) or HttpResponse(
+            content, content_type=media_type
+        )
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.SCHEMA_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,94 @@
+"""
+End-to-end throughput benchmarks of the API and the bot.
+
+Runs against a freshly created test database and a local telegram API emulator, so neither production data
+nor api.telegram.org is touched. Usage:
+
+    DB_ENGINE=django.db.backends.sqlite3 DB_NAME=bench.sqlite3 python -m benchmarks --output bench.json
+    python -m benchmarks --cases message_sent,history --compare bench.json --threshold 0.2
+
+Results are written as JSON. With --compare the run exits with a non-zero status if throughput
+or p99 latency of any case regressed by more than the threshold.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from bot.tg.emulator import TgEmulator
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The main function accepts the command line arguments. Starts the telegram API emulator, sets up
+    the test database, runs the selected benchmark cases and reports the results. Returns the exit status.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--cases", default="", help="Comma separated case names, all cases by default.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the amount of work.")
+    parser.add_argument("--output", default=None, help="Path of the JSON file with results.")
+    parser.add_argument("--compare", default=None, help="Path of the JSON file with baseline results.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression.")
+    args = parser.parse_args(argv)
+
+    emulator: TgEmulator = TgEmulator(port=0).start()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_task.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmarks")
+    os.environ.setdefault("TG_TOKEN", "benchmarks")
+    os.environ["TG_API_URL"] = emulator.url
+    # The cases measure throughput, so the per-user throttles must not reject their requests.
+    for name in ("MESSAGES_BURST", "MESSAGES_SUSTAINED", "VERIFY_BURST", "VERIFY_SUSTAINED"):
+        os.environ.setdefault(f"THROTTLE_{name}", "1000000/s")
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from benchmarks.cases import CASES, Context
+    from benchmarks.runner import compare, load, metadata
+
+    names: List[str] = [name for name in args.cases.split(",") if name] or list(CASES)
+    unknown: List[str] = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}; available: {', '.join(CASES)}")
+
+    setup_test_environment(debug=False)
+    old_name: str = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        context: Context = Context(emulator=emulator, scale=args.scale)
+        results: Dict[str, dict] = {}
+        for name in names:
+            for key, result in CASES[name](context).items():
+                results[key] = result
+                print(f"{key:<32} {result['ops_per_sec']:>10.1f} ops/s  "
+                      f"p50 {result['p50_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms", file=sys.stderr)
+        report: dict = {"meta": metadata(args.scale), "results": results}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        emulator.stop()
+
+    data: str = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(data + "\n")
+    else:
+        print(data)
+
+    if args.compare:
+        baseline: dict = load(args.compare)
+        if baseline["meta"].get("scale") != args.scale:
+            print(f"WARNING baseline scale {baseline['meta'].get('scale')} differs from {args.scale}", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for name, metric, change in regressions:
+            print(f"REGRESSION {name} {metric}: {change:+.1%}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from benchmarks.runner import measure, summarize
+from bot.management.commands.runbot import Command as RunBotCommand
+from bot.models import TgUser
+from bot.registry import ChatRegistry
+from bot.tg.emulator import TgEmulator
+from messanger.models import SentMessage
+from messanger.stats import rebuild
+from users.models import User
+
+PASSWORD: str = "Bench-password-42"
+
+
+class Context:
+    """
+    The Context class contains the shared state of a benchmark run: the telegram API emulator
+    and the scale factor of the amount of work.
+    """
+    def __init__(self, emulator: TgEmulator, scale: float) -> None:
+        """
+        The __init__ function is called when creating an instance of the Context class. Accepts as parameters
+        the running telegram API emulator and the scale factor.
+        """
+        self.emulator = emulator
+        self.scale = scale
+        self._password_hash: str = ""
+
+    def n(self, base: int) -> int:
+        """
+        The n function defines a class method. Accepts the base amount of work as an integer.
+        Returns the amount scaled by the scale factor of the run.
+        """
+        return max(1, int(base * self.scale))
+
+    @property
+    def password_hash(self) -> str:
+        """
+        The password_hash function defines the property method of the class. Returns the hash of the benchmark
+        password computed once per run, so fixtures do not pay the hashing cost for every user.
+        """
+        if not self._password_hash:
+            self._password_hash = make_password(PASSWORD)
+        return self._password_hash
+
+    def create_users(self, prefix: str, count: int) -> List[User]:
+        """
+        The create_users function defines a class method. Accepts the username prefix and the number of users.
+        Creates the users in the database with a single query. Returns the list of created users.
+        """
+        User.objects.bulk_create(
+            User(username=f"{prefix}{i}", password=self.password_hash) for i in range(count)
+        )
+        return list(User.objects.filter(username__startswith=prefix).order_by("id"))
+
+    def client_for(self, user: User) -> APIClient:
+        """
+        The client_for function defines a class method. Accepts an instance of the User class.
+        Returns an API client with a logged-in session of the user.
+        """
+        client: APIClient = APIClient()
+        client.force_login(user)
+        return client
+
+
+CASES: Dict[str, Callable[[Context], Dict[str, dict]]] = {}
+
+
+def case(func: Callable[[Context], Dict[str, dict]]) -> Callable[[Context], Dict[str, dict]]:
+    """
+    The case function is a decorator registering a benchmark case under the name of the function.
+    """
+    CASES[func.__name__] = func
+    return func
+
+
+def expect(status: int, response) -> None:
+    """
+    The expect function accepts the expected HTTP status and a response. Raises an AssertionError
+    if the status of the response differs, so a broken endpoint is not reported as a fast one.
+    """
+    if response.status_code != status:
+        raise AssertionError(f"Expected {status}, got {response.status_code}: {response.content[:200]!r}")
+
+
+@case
+def signup(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures the rate of POST /users/signup with unique usernames.
+    """
+    client: APIClient = APIClient()
+
+    def run(i: int) -> None:
+        expect(201, client.post("/users/signup", {
+            "username": f"signup{i}", "password": PASSWORD, "password_repeat": PASSWORD,
+        }, format="json"))
+
+    return {"signup": measure(run, ctx.n(30), warmup=2)}
+
+
+@case
+def login(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures the rate of POST /users/login of existing users.
+    """
+    iterations: int = ctx.n(30)
+    users: List[User] = ctx.create_users("login", iterations + 2)
+    client: APIClient = APIClient()
+
+    def run(i: int) -> None:
+        expect(200, client.post("/users/login", {"username": users[i].username, "password": PASSWORD}, format="json"))
+
+    return {"login": measure(run, iterations, warmup=2)}
+
+
+@case
+def message_sent(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures throughput and latency of POST /message/sent of a verified user including delivery
+    to the stubbed telegram API.
+    """
+    user: User = ctx.create_users("sender", 1)[0]
+    TgUser.objects.create(chat_id=10 ** 12, user=user)
+    client: APIClient = ctx.client_for(user)
+
+    def run(i: int) -> None:
+        expect(201, client.post("/message/sent", {"content": f"benchmark message {i}"}, format="json"))
+
+    return {"message_sent": measure(run, ctx.n(300), warmup=10)}
+
+
+@case
+def history(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures GET /message/sent pages at various offsets of a long history.
+    """
+    depth: int = ctx.n(20000)
+    user: User = ctx.create_users("reader", 1)[0]
+    now = timezone.now()
+    SentMessage.objects.bulk_create(
+        (SentMessage(owner=user, content=f"history {i}", created=now - timedelta(seconds=i)) for i in range(depth)),
+        batch_size=1000,
+    )
+    client: APIClient = ctx.client_for(user)
+
+    results: Dict[str, dict] = {}
+    for offset in sorted({0, depth // 10, depth // 2, max(0, depth - 10)}):
+        def run(i: int, offset: int = offset) -> None:
+            expect(200, client.get("/message/sent", {"limit": 10, "offset": offset}))
+
+        results[f"history_offset_{offset}"] = measure(run, ctx.n(100), warmup=5)
+    return results
+
+
+@case
+def message_stats(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures GET /message/stats of a user with a long history spread over a year.
+    """
+    depth: int = ctx.n(20000)
+    user: User = ctx.create_users("stats", 1)[0]
+    now = timezone.now()
+    SentMessage.objects.bulk_create(
+        (SentMessage(owner=user, content=f"stats {i}", created=now - timedelta(minutes=26 * i)) for i in range(depth)),
+        batch_size=1000,
+    )
+    rebuild([user.id])
+    client: APIClient = ctx.client_for(user)
+
+    results: Dict[str, dict] = {}
+    for granularity, days in (("day", 366), ("hour", 7)):
+        def run(i: int, granularity: str = granularity, days: int = days) -> None:
+            expect(200, client.get("/message/stats", {"granularity": granularity, "days": days}))
+
+        results[f"message_stats_{granularity}"] = measure(run, ctx.n(100), warmup=5)
+    return results
+
+
+@case
+def verify(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures PATCH /bot/verify/ with growing numbers of rows in the tg_user table.
+    """
+    results: Dict[str, dict] = {}
+    created: int = 0
+    for size in (ctx.n(1000), ctx.n(10000), ctx.n(100000)):
+        TgUser.objects.bulk_create(
+            (TgUser(chat_id=2 * 10 ** 12 + i, verification_code=f"code{i:016d}") for i in range(created, size)),
+            batch_size=5000,
+        )
+        iterations: int = min(ctx.n(50), size - created)
+        users: List[User] = ctx.create_users(f"verify{size}_", iterations)
+        clients: List[APIClient] = [ctx.client_for(user) for user in users]
+        codes: List[str] = [f"code{i:016d}" for i in range(created, created + iterations)]
+        created = size
+
+        def run(i: int, clients: List[APIClient] = clients, codes: List[str] = codes) -> None:
+            expect(200, clients[i].patch("/bot/verify/", {"verification_code": codes[i]}, format="json"))
+
+        results[f"verify_tg_users_{size}"] = measure(run, iterations)
+    return results
+
+
+@case
+def chat_registry(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures loading the chat registry and routing users to their chats through it.
+    """
+    users: List[User] = ctx.create_users("registry_", ctx.n(20000))
+    TgUser.objects.bulk_create(
+        (TgUser(chat_id=4 * 10 ** 12 + i, user=user) for i, user in enumerate(users)), batch_size=5000
+    )
+    registry: ChatRegistry = ChatRegistry(max_age=0)
+    started: float = time.perf_counter()
+    registry.load()
+    elapsed: float = time.perf_counter() - started
+    loaded: dict = summarize([elapsed], elapsed, operations=len(registry))
+    loaded["bytes"] = registry.nbytes
+
+    def run(i: int) -> None:
+        if registry.get_linked(users[i % len(users)].pk) is None:
+            raise AssertionError("the chat of the user is not found")
+
+    return {"chat_registry_load": loaded, "chat_registry_get_linked": measure(run, ctx.n(100000))}
+
+
+@case
+def runbot(ctx: Context) -> Dict[str, dict]:
+    """
+    Measures the rate of updates processed by the runbot poll loop for messages from new chats.
+    """
+    total: int = ctx.n(500)
+    first: int = ctx.emulator.push_update(chat_id=3 * 10 ** 12, text="hello")["update_id"]
+    for i in range(1, total):
+        ctx.emulator.push_update(chat_id=3 * 10 ** 12 + i, text="hello")
+
+    command: RunBotCommand = RunBotCommand()
+    offset: int = first
+    latencies: List[float] = []
+    started: float = time.perf_counter()
+    while offset < first + total:
+        batch_started: float = time.perf_counter()
+        offset = command.poll(offset, timeout=0)
+        latencies.append(time.perf_counter() - batch_started)
+    return {"runbot": summarize(latencies, time.perf_counter() - started, operations=total)}
@@ -0,0 +1,111 @@
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import django
+from django.db import connection
+
+
+def percentile(values: List[float], share: float) -> float:
+    """
+    The percentile function accepts a sorted list of values and the share of the percentile from 0 to 1.
+    Returns the value of the percentile using the nearest-rank method.
+    """
+    if not values:
+        return 0.0
+    index: int = min(len(values) - 1, max(0, round(share * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def measure(func: Callable[[int], None], iterations: int, warmup: int = 0) -> dict:
+    """
+    The measure function accepts the benchmarked callable, the number of measured iterations and the number
+    of warmup iterations. Calls the function with the iteration number and measures the latency of each call.
+    Warmup calls receive the numbers following the measured ones, so every call gets a distinct number.
+    Returns a dictionary with the throughput and the latency percentiles in milliseconds.
+    """
+    for i in range(warmup):
+        func(iterations + i)
+
+    latencies: List[float] = []
+    started: float = time.perf_counter()
+    for i in range(iterations):
+        call_started: float = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def summarize(latencies: List[float], elapsed: float, operations: Optional[int] = None) -> dict:
+    """
+    The summarize function accepts the list of call latencies in seconds, the total elapsed time and
+    optionally the number of operations if it differs from the number of calls. Returns the dictionary
+    with the results of a benchmark case.
+    """
+    ordered: List[float] = sorted(latencies)
+    operations = len(latencies) if operations is None else operations
+    return {
+        "operations": operations,
+        "seconds": round(elapsed, 6),
+        "ops_per_sec": round(operations / elapsed, 3) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def metadata(scale: float) -> dict:
+    """
+    The metadata function accepts the scale of the benchmark run. Returns the dictionary describing
+    the environment of the run so results of different runs can be compared.
+    """
+    try:
+        revision: str = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": revision,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+        "scale": scale,
+    }
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[Tuple[str, str, float]]:
+    """
+    The compare function accepts the results of the current run, the results of the baseline run and
+    the allowed relative regression. Compares throughput and p99 latency of the cases present in both runs.
+    Returns the list of regressions as tuples of the case name, the metric and the relative change.
+    """
+    regressions: List[Tuple[str, str, float]] = []
+    for name, result in current.items():
+        base: Optional[dict] = baseline.get(name)
+        if not base:
+            continue
+        if base["ops_per_sec"]:
+            change: float = (base["ops_per_sec"] - result["ops_per_sec"]) / base["ops_per_sec"]
+            if change > threshold:
+                regressions.append((name, "ops_per_sec", change))
+        if base["p99_ms"]:
+            change = (result["p99_ms"] - base["p99_ms"]) / base["p99_ms"]
+            if change > threshold:
+                regressions.append((name, "p99_ms", change))
+    return regressions
+
+
+def load(path: str) -> dict:
+    """
+    The load function accepts the path of the file with the results of a previous run.
+    Returns its content as a dictionary.
+    """
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
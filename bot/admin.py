@@ -2,17 +2,47 @@ from typing import Tuple
 
 from django.contrib import admin
 
-from bot.models import TgUser
+from bot.models import Bot, TgFile, TgUser
+from test_task.paginator import EstimatedCountPaginator
 
 
 class TgUserAdmin(admin.ModelAdmin):
     """
     The TgUserAdmin class inherits from the ModelAdmin class. Defines the output of instance fields
-    to the administration panel and the ability to edit them.
+    to the administration panel and the ability to edit them. Searches by the exact chat id or username
+    and shows an estimated number of chats.
     """
-    list_display: Tuple[str] = ("chat_id", "user", "verification_code")
+    list_display: Tuple[str] = ("chat_id", "bot", "user", "verification_code")
+    list_filter: Tuple[str] = ("bot",)
+    list_select_related: Tuple[str] = ("user", "bot")
+    autocomplete_fields: Tuple[str] = ("user",)
     readonly_fields: Tuple[str] = ("chat_id", "verification_code")
-    search_fields: Tuple[str] = ("user", "chat_id")
+    search_fields: Tuple[str] = ("=chat_id", "=user__username")
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+
+class BotAdmin(admin.ModelAdmin):
+    """
+    The BotAdmin class inherits from the ModelAdmin class. Defines the output of the registered telegram bots
+    to the administration panel and the ability to edit them.
+    """
+    list_display: Tuple[str] = ("name", "is_active", "rate_limit")
+    list_filter: Tuple[str] = ("is_active",)
+    search_fields: Tuple[str] = ("name",)
+
+
+class TgFileAdmin(admin.ModelAdmin):
+    """
+    The TgFileAdmin class inherits from the ModelAdmin class. Defines the output of the cached file_id values
+    of the uploaded files to the administration panel.
+    """
+    list_display: Tuple[str] = ("digest", "kind", "bot", "size", "created")
+    list_filter: Tuple[str] = ("kind",)
+    readonly_fields: Tuple[str] = ("digest", "kind", "bot", "size", "file_id", "created")
+    search_fields: Tuple[str] = ("digest", "file_id")
 
 
 admin.site.register(TgUser, TgUserAdmin)
+admin.site.register(Bot, BotAdmin)
+admin.site.register(TgFile, TgFileAdmin)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bot'
+
+    def ready(self) -> None:
+        """
+        The ready function overrides the method of the parent class. Connects the signals updating
+        the chat registry.
+        """
+        from bot import signals  # noqa: F401
@@ -0,0 +1,74 @@
+import logging
+import time
+from typing import Callable, TypeVar
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors raised when the database connection is lost, e.g. on failover, restart or idle timeout.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    The backoff_delay function accepts the number of the failed attempt starting from zero. Returns the delay
+    before the next attempt in seconds, growing exponentially up to the DB_RETRY_MAX_DELAY setting.
+    """
+    return min(settings.DB_RETRY_BASE_DELAY * 2 ** attempt, settings.DB_RETRY_MAX_DELAY)
+
+
+def reset_connections() -> None:
+    """
+    The reset_connections function does not accept any parameters. Closes all database connections
+    of the current thread, so the next query opens a fresh one.
+    """
+    for connection in connections.all(initialized_only=True):
+        try:
+            connection.close()
+        except TRANSIENT_ERRORS:
+            pass
+
+
+def wait_for_db() -> None:
+    """
+    The wait_for_db function does not accept any parameters. Recycles obsolete connections of the current
+    thread and checks the default database with a trivial query, retrying with exponential backoff until
+    the database is reachable. Is called before each batch of updates in the bot and worker processes.
+    """
+    attempt: int = 0
+    while True:
+        close_old_connections()
+        try:
+            with connections["default"].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return
+        except TRANSIENT_ERRORS as error:
+            delay: float = backoff_delay(attempt)
+            logger.warning("Database is unavailable (%s), reconnecting in %.1f s", error, delay)
+            reset_connections()
+            time.sleep(delay)
+            attempt += 1
+
+
+def with_db_retry(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    The with_db_retry function accepts a callable and its positional and named arguments. Calls the function
+    and, if it fails because the database connection was lost, reconnects and retries it with exponential
+    backoff up to the DB_RETRY_ATTEMPTS setting. Returns the result of the function or raises the last error.
+    """
+    attempt: int = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except TRANSIENT_ERRORS as error:
+            if attempt + 1 >= settings.DB_RETRY_ATTEMPTS:
+                raise
+            delay: float = backoff_delay(attempt)
+            logger.warning("Database error (%s), retrying in %.1f s", error, delay)
+            reset_connections()
+            time.sleep(delay)
+            attempt += 1
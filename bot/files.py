@@ -0,0 +1,66 @@
+from typing import Optional
+
+from django.conf import settings
+from marshmallow import ValidationError
+
+from bot.models import TgFile, TgUser
+from bot.tg.client import TgClient
+from bot.tg.dc import Message, SendMessageResponse
+from bot.tg.upload import InputFile
+
+PHOTO_TYPES = frozenset({"image/jpeg", "image/png", "image/webp"})
+
+
+def file_kind(file: InputFile) -> str:
+    """
+    The file_kind function accepts the uploaded file. Returns 'photo' for images telegram can show inline
+    and 'document' for everything else.
+    """
+    if file.mime_type in PHOTO_TYPES and file.size <= settings.TG_PHOTO_MAX_SIZE:
+        return TgFile.PHOTO
+    return TgFile.DOCUMENT
+
+
+def uploaded_file_id(message: Message, kind: str) -> Optional[str]:
+    """
+    The uploaded_file_id function accepts the message returned by telegram and the kind of the sent file.
+    Returns the file_id to send the same file again or None if the message does not contain it.
+    """
+    if kind == TgFile.PHOTO and message.photo:
+        return max(message.photo, key=lambda size: size.width * size.height).file_id
+    if kind == TgFile.DOCUMENT and message.document:
+        return message.document.file_id
+    return None
+
+
+def send_attachment(
+    tg_user: TgUser, path: str, caption: Optional[str] = None, file_name: Optional[str] = None
+) -> SendMessageResponse:
+    """
+    The send_attachment function accepts the telegram user, the path of the file on disk, an optional caption
+    and the file name shown to the recipient. Sends the file to the chat as a photo or a document. A file with
+    the same content already uploaded through the bot is sent by its cached file_id, otherwise the file is
+    streamed to telegram and the returned file_id is cached. Returns the API response.
+    """
+    client: TgClient = tg_user.get_client()
+    file: InputFile = InputFile(path, file_name=file_name)
+    kind: str = file_kind(file)
+    digest: str = file.digest()
+    send = client.send_photo if kind == TgFile.PHOTO else client.send_document
+
+    cached: Optional[TgFile] = TgFile.objects.filter(bot_id=tg_user.bot_id, kind=kind, digest=digest).first()
+    if cached is not None:
+        try:
+            return send(tg_user.chat_id, cached.file_id, caption)
+        except ValidationError:
+            # Telegram rejected the stored file_id, upload the file again.
+            cached.delete()
+
+    response: SendMessageResponse = send(tg_user.chat_id, file, caption)
+    file_id: Optional[str] = uploaded_file_id(response.result, kind)
+    if file_id:
+        TgFile.objects.bulk_create(
+            [TgFile(bot_id=tg_user.bot_id, kind=kind, digest=digest, size=file.size, file_id=file_id)],
+            ignore_conflicts=True,
+        )
+    return response
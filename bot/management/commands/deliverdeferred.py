@@ -0,0 +1,79 @@
+import threading
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandParser
+from marshmallow import ValidationError
+
+from bot.db import wait_for_db
+from bot.models import TgUser
+from bot.registry import get_linked
+from bot.tg.breaker import CircuitOpenError, TgUnavailableError
+from messanger.delivery import deliver, mark
+from messanger.models import SentMessage
+from test_task.db_router import shards
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to deliver the messages deferred while the telegram API was unavailable.
+    """
+    help = 'The deliverdeferred command delivers the messages deferred while the telegram API was unavailable.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Accepts the parser object as
+        a parameter and adds the options of the worker.
+        """
+        parser.add_argument('--once', action='store_true', help='Exit when no message can be delivered right now.')
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Delivers the deferred
+        messages in batches in the order they were sent. While the telegram API is unavailable waits until
+        the circuit breaker allows a trial request.
+        """
+        stop: threading.Event = threading.Event()
+        while True:
+            wait_for_db()
+            delivered, delay = self.deliver_batch()
+            if delivered:
+                self.stdout.write(f'Delivered {delivered} deferred messages')
+            if options['once'] and delay != 0.0:
+                return
+            stop.wait(settings.TG_DEFERRED_INTERVAL if delay is None else delay)
+
+    def deliver_batch(self) -> Tuple[int, Optional[float]]:
+        """
+        The deliver_batch function defines a class method. Delivers up to TG_DEFERRED_BATCH_SIZE deferred messages
+        of each message shard. A message whose user has no linked chat or which telegram rejects is marked as failed.
+        Stops at the first message that could not be delivered because the API is unavailable. Returns the number
+        of delivered messages and the delay before the next attempt, or None as the delay if nothing is left.
+        """
+        # The users and the bots are stored on the primary database, so they are not joined.
+        messages: List[SentMessage] = [
+            message
+            for shard in shards()
+            for message in SentMessage.objects.using(shard).prefetch_related('owner', 'bot')
+            .filter(status=SentMessage.DEFERRED).order_by('id')[:settings.TG_DEFERRED_BATCH_SIZE]
+        ]
+        delivered: int = 0
+        for message in messages:
+            tg_user: Optional[TgUser] = get_linked(message.owner, message.bot)
+            if tg_user is None:
+                mark(message, SentMessage.FAILED)
+                continue
+            try:
+                deliver(message, tg_user)
+            except CircuitOpenError as error:
+                return delivered, max(error.retry_after, 1.0)
+            except TgUnavailableError as error:
+                self.stderr.write(f'Message {message.id} is deferred again: {error}')
+                return delivered, settings.TG_DEFERRED_INTERVAL
+            except ValidationError as error:
+                self.stderr.write(f'Message {message.id} is rejected by telegram: {error}')
+                mark(message, SentMessage.FAILED)
+                continue
+            delivered += 1
+        return delivered, (0.0 if len(messages) >= settings.TG_DEFERRED_BATCH_SIZE else None)
@@ -1,8 +1,26 @@
-from django.core.management import BaseCommand
+import dataclasses
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
 
-from bot.models import TgUser
+from django.conf import settings
+from django.core.management import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from bot.db import TRANSIENT_ERRORS, wait_for_db, with_db_retry
+from bot.inbound import InboundBuffer
+from bot.models import Bot, TgUser
+from bot.polling import PollTuner
+from bot.router import CommandRouter
 from bot.tg.client import TgClient
-from bot.tg.dc import Message, GetUpdatesResponse
+from bot.tg.dc import Message, GetUpdatesResponse, UpdateObj
+from test_task import tracing
+
+# The update types handled by the bot, so telegram does not send and the client does not parse the others.
+ALLOWED_UPDATES: List[str] = [field.name for field in dataclasses.fields(UpdateObj) if field.name != 'update_id']
 
 
 class Command(BaseCommand):
@@ -20,40 +38,227 @@ class Command(BaseCommand):
         """
         super().__init__(*args, **kwargs)
         self.tg_client: TgClient = TgClient()
+        self.router: CommandRouter = CommandRouter()
+        self.inbound: InboundBuffer = InboundBuffer(
+            size=settings.TG_INBOUND_BATCH_SIZE,
+            interval=settings.TG_INBOUND_FLUSH_INTERVAL,
+            retention_days=settings.TG_INBOUND_RETENTION_DAYS,
+        )
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=settings.BOT_WORKERS, thread_name_prefix='runbot'
+        )
+        self.tuners: Dict[Optional[int], PollTuner] = {}
+        # The updates postponed because of a database error, by the bot and the chat.
+        self.postponed: Dict[Optional[int], Dict[Optional[int], List[UpdateObj]]] = defaultdict(dict)
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Accepts the parser object as
+        a parameter and adds the options selecting the polled bots.
+        """
+        parser.add_argument('--bot', action='append', default=[], help='Name of a registered bot to poll.')
+        parser.add_argument('--all', action='store_true', help='Poll the default bot and all active bots.')
 
     def handle(self, *args, **options) -> None:
         """
         The handle function defines a class method to be called when entering a command. It contains the main
-        functionality for organizing interaction with a telegram bot.
+        functionality for organizing interaction with a telegram bot. Without options polls the default bot.
+        Otherwise polls each selected bot in its own thread and periodically starts and stops threads as bots
+        are registered or deactivated.
         """
-        offset: int = 0
         self.stdout.write(self.style.SUCCESS('Bot started'))
+        if not options['bot'] and not options['all']:
+            self.run_bot(None, threading.Event())
+            return
 
+        threads: Dict[Tuple[Optional[int], str], threading.Event] = {}
         while True:
-            res: GetUpdatesResponse = self.tg_client.get_updates(offset=offset)
-            for item in res.result:
-                offset: int = item.update_id + 1
-                self.handle_message(item.message)
+            wait_for_db()
+            bots: List[Optional[Bot]] = list(Bot.objects.filter(is_active=True, name__in=options['bot']))
+            if options['all']:
+                bots = list(Bot.objects.filter(is_active=True)) + ([None] if settings.TG_TOKEN else [])
+            close_old_connections()
+
+            wanted: Dict[Tuple[Optional[int], str], Optional[Bot]] = {
+                (bot.id, bot.token) if bot else (None, settings.TG_TOKEN): bot for bot in bots
+            }
+            for key in set(threads) - set(wanted):
+                threads.pop(key).set()
+            for key, bot in wanted.items():
+                if key not in threads:
+                    threads[key] = threading.Event()
+                    threading.Thread(target=self.run_bot, args=(bot, threads[key]), daemon=True).start()
+                    self.stdout.write(f'Polling {bot or "default bot"}')
+
+            threading.Event().wait(settings.BOT_REFRESH_INTERVAL)
+
+    def run_bot(self, bot: Optional[Bot], stop: threading.Event) -> None:
+        """
+        The run_bot function defines a class method running the polling loop of one bot. Accepts the bot,
+        None for the default bot, and the event stopping the loop. Errors of a single request are reported
+        and the request is repeated after a pause, so one failing bot does not stop the others. Reports
+        the polling efficiency every BOT_POLL_STATS_INTERVAL seconds.
+        """
+        offset: int = 0
+        tuner: PollTuner = self.tuner_for(bot)
+        interval: float = settings.BOT_POLL_STATS_INTERVAL
+        while not stop.is_set():
+            try:
+                offset = self.poll(offset, bot=bot)
+            except Exception as error:
+                self.stderr.write(f'{bot or "default bot"}: {error!r}')
+                stop.wait(settings.BOT_ERROR_DELAY)
+            if interval and time.monotonic() - tuner.started >= interval:
+                report: dict = tuner.report()
+                self.stdout.write(
+                    f'{bot or "default bot"}: {report["requests"]} polls, {report["updates"]} updates, '
+                    f'{report["updates_per_request"]} per poll, {report["empty_polls"]} empty, '
+                    f'{report["full_polls"]} full, limit {report["limit"]}'
+                )
+                tuner.reset()
+
+    def tuner_for(self, bot: Optional[Bot]) -> PollTuner:
+        """
+        The tuner_for function defines a class method. Accepts the bot or None for the default bot.
+        Returns the tuner of the getUpdates requests of the bot.
+        """
+        key: Optional[int] = bot.id if bot else None
+        if key not in self.tuners:
+            self.tuners[key] = PollTuner(
+                min_limit=settings.TG_POLL_MIN_LIMIT,
+                max_limit=settings.TG_POLL_MAX_LIMIT,
+                max_timeout=settings.TG_POLL_TIMEOUT,
+                target_seconds=settings.TG_POLL_TARGET_SECONDS,
+            )
+        return self.tuners[key]
+
+    def client_for(self, bot: Optional[Bot]) -> TgClient:
+        """
+        The client_for function defines a class method. Accepts the bot or None for the default bot.
+        Returns the telegram API client used for polling the bot.
+        """
+        return bot.get_client() if bot else self.tg_client
 
+    def poll(self, offset: int, timeout: Optional[int] = None, bot: Optional[Bot] = None) -> int:
+        """
+        The poll function defines a class method for processing one batch of updates. Accepts the current offset,
+        the long-polling timeout, by default chosen by the tuner of the bot, and the polled bot as arguments.
+        Requests new updates of the handled types from the telegram API, up to the limit chosen by the tuner,
+        makes sure the database connection is alive, buffers the incoming messages for storage and processes
+        the updates in the worker pool, one task per chat so the messages of a chat are handled in order.
+        The updates of a chat that could not be processed because the database stayed unavailable are kept
+        in memory and processed before the next updates of the chat, so the offset always moves past
+        the received updates and the other chats are not answered twice. Returns the offset for the next request.
+        A sampled batch is traced from here to the replies.
+        """
+        tuner: PollTuner = self.tuner_for(bot)
+        postponed: Dict[Optional[int], List[UpdateObj]] = self.postponed[bot.id if bot else None]
+        if timeout is None:
+            timeout = 0 if postponed else tuner.timeout(self.inbound.due_in())
+        res: GetUpdatesResponse = self.client_for(bot).get_updates(
+            offset=offset, timeout=timeout, limit=tuner.limit, allowed_updates=ALLOWED_UPDATES
+        )
+        if not res.result and not postponed:
+            tuner.record(0)
+            self.flush_inbound()
+            return offset
 
-    def handle_message(self, message: Message) -> None:
+        started: float = time.perf_counter()
+        root = tracing.start_trace('runbot.poll', **{'bot': str(bot or 'default'), 'updates': len(res.result)})
+        with root, tracing.trace_queries():
+            self.process(res, bot)
+        tuner.record(len(res.result), time.perf_counter() - started)
+        return res.result[-1].update_id + 1 if res.result else offset
+
+    def process(self, res: GetUpdatesResponse, bot: Optional[Bot] = None) -> None:
         """
-        The handle_message function defines a class method for processing an incoming message. Takes as an argument
-        an object of the Message class. Checks user authentication and, depending on the result, calls the appropriate
-        methods of the class.
+        The process function defines a class method. Accepts the received updates and the bot that received them.
+        Stores and processes the updates after the postponed updates of their chats as described for the poll
+        method and postpones the updates of the chats that failed again.
+        """
+        wait_for_db()
+        postponed: Dict[Optional[int], List[UpdateObj]] = self.postponed[bot.id if bot else None]
+        chats: Dict[Optional[int], List[UpdateObj]] = defaultdict(list)
+        for chat_id, items in postponed.items():
+            chats[chat_id].extend(items)
+        postponed.clear()
+        for item in res.result:
+            chats[item.message.chat.id if item.message else None].append(item)
+            if item.message is not None:
+                self.inbound.add(item.message, bot=bot)
+
+        handle = tracing.wrap(partial(self.handle_chat, bot=bot))
+        for chat_id, left in zip(list(chats), self.executor.map(handle, chats.values())):
+            if left:
+                postponed[chat_id] = left
+        self.flush_inbound()
+
+    def flush_inbound(self) -> None:
+        """
+        The flush_inbound function defines a class method. Stores the buffered incoming messages if the buffer
+        is due to be flushed. A database error is reported and the messages are kept for the next attempt.
+        """
+        try:
+            self.inbound.flush_if_due()
+        except TRANSIENT_ERRORS as error:
+            self.stderr.write(f'Incoming messages are not stored yet, database error: {error}')
+        finally:
+            close_old_connections()
+
+    def handle_chat(self, items: List[UpdateObj], bot: Optional[Bot] = None) -> List[UpdateObj]:
+        """
+        The handle_chat function defines a class method running in the worker pool. Accepts the updates
+        of one chat in order and the bot that received them. Processes the message of each update. Returns
+        the updates starting from the one that could not be processed because of a database error, or an empty
+        list if all of them are processed.
+        """
+        close_old_connections()
+        try:
+            for index, item in enumerate(items):
+                try:
+                    with tracing.span('runbot.handle', **{'update_id': item.update_id}):
+                        self.handle_message(item.message, bot=bot)
+                except TRANSIENT_ERRORS as error:
+                    self.stderr.write(f'Update {item.update_id} postponed, database error: {error}')
+                    return items[index:]
+            return []
+        finally:
+            close_old_connections()
+
+    def handle_message(self, message: Message, bot: Optional[Bot] = None) -> None:
+        """
+        The handle_message function defines a class method for processing an incoming message. Takes as arguments
+        an object of the Message class and the bot that received it. Checks user authentication and, depending
+        on the result, sends the verification code or dispatches the command of the verified user. The database
+        work is retried on connection loss and completes before the replies are sent, so a retry never sends
+        a reply twice.
         """
         if message is not None:
-            tg_user, _ = TgUser.objects.get_or_create(chat_id=message.chat.id)
+            tg_user: TgUser = with_db_retry(self.get_tg_user, message.chat.id, bot)
 
             if not tg_user.is_verified:
                 self.handle_unauthorized_user(tg_user, message)
+            else:
+                reply: Optional[str] = with_db_retry(self.router.dispatch, tg_user, message)
+                if reply:
+                    tg_user.get_client().send_message(chat_id=message.chat.id, text=reply)
+
+    @staticmethod
+    def get_tg_user(chat_id: int, bot: Optional[Bot] = None) -> TgUser:
+        """
+        The get_tg_user function defines a static method of the class. Accepts the chat id and the bot.
+        Returns the telegram user of the chat, creating it for a new chat.
+        """
+        tg_user, _ = TgUser.objects.select_related('user', 'bot').get_or_create(chat_id=chat_id, bot=bot)
+        return tg_user
 
     def handle_unauthorized_user(self, tg_user: TgUser, message: Message) -> None:
         """
         The handle_unauthorized_user function defines a class method for working with an unauthenticated user.
-        Accept objects of the TgUser and Message classes as arguments. Sends a welcome message to the user, calls
-        the method of adding the verification code to the field of the current user and sends the verification code.
+        Accept objects of the TgUser and Message classes as arguments. Calls the method of adding the verification
+        code to the field of the current user, then sends a welcome message and the verification code to the user.
         """
-        self.tg_client.send_message(chat_id=message.chat.id, text='Hello')
-        tg_user.update_verification_code()
-        self.tg_client.send_message(chat_id=message.chat.id, text=f'You verification code: {tg_user.verification_code}')
+        with_db_retry(tg_user.update_verification_code)
+        tg_client: TgClient = tg_user.get_client()
+        tg_client.send_message(chat_id=message.chat.id, text='Hello')
+        tg_client.send_message(chat_id=message.chat.id, text=f'You verification code: {tg_user.verification_code}')
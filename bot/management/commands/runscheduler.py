@@ -0,0 +1,169 @@
+import heapq
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from marshmallow import ValidationError
+
+from bot.db import TRANSIENT_ERRORS, wait_for_db
+from bot.models import TgUser
+from bot.registry import get_linked
+from bot.tg.breaker import TgUnavailableError
+from messanger.delivery import coalesce, deliver_coalesced, mark
+from messanger.models import SentMessage
+from test_task.db_router import shards
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to deliver the scheduled messages when they are due. Several schedulers can run at the same time: each one
+    claims a batch of due messages with SELECT ... FOR UPDATE SKIP LOCKED, so a message is only sent once.
+    """
+    help = 'The runscheduler command delivers the scheduled messages when they are due.'
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        The __init__ function is a method called when creating an instance of the Command class. Accepts
+        any positional and named arguments. Creates the heap of claimed messages ordered by their due time
+        and the pool of threads sending them.
+        """
+        super().__init__(*args, **kwargs)
+        self.heap: List[Tuple[datetime, int, SentMessage]] = []
+        self.stop: threading.Event = threading.Event()
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=settings.SCHEDULER_WORKERS, thread_name_prefix='scheduler'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Every
+        SCHEDULER_POLL_INTERVAL seconds claims the messages due within SCHEDULER_LOOKAHEAD seconds into
+        the in-memory heap and sleeps until the next message is due, so messages are sent on time
+        with sub-second precision. On SIGINT or SIGTERM returns the claimed but unsent messages to the schedule.
+        """
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+        self.stdout.write(self.style.SUCCESS('Scheduler started'))
+        next_claim: datetime = timezone.now()
+        try:
+            while not self.stop.is_set():
+                now: datetime = timezone.now()
+                if now >= next_claim:
+                    try:
+                        self.claim(now + timedelta(seconds=settings.SCHEDULER_LOOKAHEAD))
+                    except TRANSIENT_ERRORS as error:
+                        self.stderr.write(f'Scheduled messages are not claimed, database error: {error}')
+                    next_claim = now + timedelta(seconds=settings.SCHEDULER_POLL_INTERVAL)
+                self.dispatch_due(timezone.now())
+                wake: datetime = min(next_claim, self.heap[0][0]) if self.heap else next_claim
+                self.stop.wait(max(0.0, (wake - timezone.now()).total_seconds()))
+        finally:
+            self.executor.shutdown(wait=True)
+            self.release()
+
+    def claim(self, horizon: datetime) -> int:
+        """
+        The claim function defines a class method. Accepts the time up to which messages are claimed. Returns
+        the messages whose claim is older than SCHEDULER_CLAIM_TIMEOUT seconds to the schedule. Locks up to
+        SCHEDULER_BATCH_SIZE scheduled messages of each message shard due before the time, skipping the rows locked
+        by other schedulers, marks them as pending with the time of the claim and pushes them to the heap. Returns
+        the number of claimed messages.
+        """
+        wait_for_db()
+        claimed: int = 0
+        now: datetime = timezone.now()
+        for shard in shards():
+            reclaimed: int = SentMessage.objects.using(shard).filter(
+                status=SentMessage.PENDING, claimed_at__lt=now - timedelta(seconds=settings.SCHEDULER_CLAIM_TIMEOUT)
+            ).update(status=SentMessage.SCHEDULED, claimed_at=None)
+            if reclaimed:
+                self.stderr.write(f'Returned {reclaimed} stale claimed messages to the schedule')
+            with transaction.atomic(using=shard):
+                ids: List[int] = list(
+                    SentMessage.objects.using(shard).select_for_update(skip_locked=True)
+                    .filter(status=SentMessage.SCHEDULED, send_at__lte=horizon)
+                    .order_by('send_at')
+                    .values_list('id', flat=True)[:settings.SCHEDULER_BATCH_SIZE]
+                )
+                SentMessage.objects.using(shard).filter(id__in=ids).update(status=SentMessage.PENDING, claimed_at=now)
+            # The users and the bots are stored on the primary database, so they are not joined.
+            for message in SentMessage.objects.using(shard).prefetch_related('owner', 'bot').filter(id__in=ids):
+                heapq.heappush(self.heap, (message.send_at, message.id, message))
+            claimed += len(ids)
+        return claimed
+
+    def dispatch_due(self, now: datetime) -> None:
+        """
+        The dispatch_due function defines a class method. Accepts the current time and passes all messages
+        of the heap due by then to the pool of threads, the messages of the same chat together and in order.
+        """
+        chats: Dict[Tuple[int, Optional[int]], List[SentMessage]] = {}
+        while self.heap and self.heap[0][0] <= now:
+            _, _, message = heapq.heappop(self.heap)
+            chats.setdefault((message.owner_id, message.bot_id), []).append(message)
+        for messages in chats.values():
+            self.executor.submit(self.send, messages)
+
+    def send(self, messages: List[SentMessage]) -> None:
+        """
+        The send function defines a class method running in the pool of threads. Accepts the claimed messages
+        of a chat and delivers them to the linked chat of their owner, coalesced into as few telegram messages
+        as possible if the chat has coalescing enabled. Messages that can not be delivered because the telegram
+        API is unavailable are deferred, messages without a linked chat or rejected by telegram are marked as failed.
+        """
+        close_old_connections()
+        try:
+            tg_user: Optional[TgUser] = get_linked(messages[0].owner, messages[0].bot)
+            if tg_user is None:
+                for message in messages:
+                    mark(message, SentMessage.FAILED)
+                return
+            groups: List[List[SentMessage]] = (
+                coalesce(messages) if tg_user.coalesce_messages else [[message] for message in messages]
+            )
+            for group in groups:
+                self.send_group(group, tg_user)
+        except Exception as error:
+            ids: str = ', '.join(str(message.id) for message in messages)
+            self.stderr.write(f'Messages {ids} are not delivered: {error!r}')
+        finally:
+            close_old_connections()
+
+    def send_group(self, messages: List[SentMessage], tg_user: TgUser) -> None:
+        """
+        The send_group function defines a class method. Accepts the messages delivered as one telegram message
+        and the telegram user they are delivered to, and delivers them, deferring them if the telegram API
+        is unavailable and marking them as failed if telegram rejects them.
+        """
+        ids: str = ', '.join(str(message.id) for message in messages)
+        try:
+            deliver_coalesced(messages, tg_user)
+        except TgUnavailableError as error:
+            self.stderr.write(f'Messages {ids} are deferred: {error}')
+            for message in messages:
+                mark(message, SentMessage.DEFERRED)
+        except ValidationError as error:
+            self.stderr.write(f'Messages {ids} are rejected by telegram: {error}')
+            for message in messages:
+                mark(message, SentMessage.FAILED)
+
+    def release(self) -> None:
+        """
+        The release function defines a class method. Returns the claimed messages that were not sent yet
+        to the schedule, so another scheduler delivers them.
+        """
+        for shard in shards():
+            ids: List[int] = [message.id for _, _, message in self.heap if message._state.db == shard]
+            SentMessage.objects.using(shard).filter(id__in=ids, status=SentMessage.PENDING).update(
+                status=SentMessage.SCHEDULED, claimed_at=None
+            )
+        if self.heap:
+            self.stdout.write(f'Returned {len(self.heap)} messages to the schedule')
+        self.heap.clear()
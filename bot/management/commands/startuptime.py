@@ -0,0 +1,79 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandParser
+
+BOOT_SCRIPT: str = (
+    "import django, importlib, sys; "
+    "django.setup(); "
+    "[importlib.import_module(name) for name in sys.argv[1:]]"
+)
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to measure the cold start time of the bot and worker processes under a given settings module.
+    """
+    help = 'The startuptime command measures the time to boot Django and import the modules of a command.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Accepts the parser object as
+        a parameter and adds the options of the measurement.
+        """
+        parser.add_argument('--settings-module', default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                            help='Settings module to boot, the current one by default.')
+        parser.add_argument('--module', action='append', default=None,
+                            help='Module imported after setup, bot.management.commands.runbot by default.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of measured process starts.')
+        parser.add_argument('--top', type=int, default=15, help='Number of the slowest imports to report.')
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Starts fresh
+        interpreters booting the given settings, reports the wall time of the starts and the slowest
+        top-level imports of the last start.
+        """
+        modules: List[str] = options['module'] or ['bot.management.commands.runbot']
+        env: Dict[str, str] = dict(os.environ, DJANGO_SETTINGS_MODULE=options['settings_module'])
+        command: List[str] = [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, *modules]
+
+        timings: List[float] = []
+        stderr: str = ''
+        for _ in range(options['repeat']):
+            started: float = time.perf_counter()
+            result = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+            timings.append((time.perf_counter() - started) * 1000)
+            if result.returncode:
+                self.stderr.write(result.stderr)
+                return
+            stderr = result.stderr
+
+        self.stdout.write(
+            f"{options['settings_module']}: median {statistics.median(timings):.0f} ms, "
+            f"min {min(timings):.0f} ms, max {max(timings):.0f} ms over {len(timings)} starts"
+        )
+        for cumulative, name in self.slowest_imports(stderr, options['top']):
+            self.stdout.write(f'{cumulative / 1000:>9.1f} ms  {name}')
+
+    @staticmethod
+    def slowest_imports(importtime: str, top: int) -> List[tuple]:
+        """
+        The slowest_imports function defines a static method of the class. Accepts the output of the
+        '-X importtime' option and the number of entries. Returns the slowest top-level imports as tuples
+        of the cumulative time in microseconds and the module name.
+        """
+        imports: List[tuple] = []
+        for line in importtime.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            if not name.startswith('  '):
+                imports.append((int(cumulative), name.strip()))
+        return sorted(imports, reverse=True)[:top]
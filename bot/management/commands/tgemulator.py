@@ -0,0 +1,58 @@
+from typing import Optional, TextIO
+
+from django.core.management import BaseCommand, CommandParser
+
+from bot.tg.emulator import TgEmulator
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to run the local emulator of the telegram bot API for load testing of the bot and the message delivery path.
+    """
+    help = 'The tgemulator command runs a local telegram bot API emulator. Point TG_API_URL at it.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Accepts the parser object as
+        a parameter and adds the emulator options to it.
+        """
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--rate', type=float, default=0.0, help='Generated updates per second.')
+        parser.add_argument('--chats', type=int, default=10, help='Number of emulated chats.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Response latency in seconds.')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Random extra latency in seconds.')
+        parser.add_argument('--error-429', type=float, default=0.0, help='Share of requests answered with 429.')
+        parser.add_argument('--retry-after', type=int, default=1, help='retry_after value of 429 responses.')
+        parser.add_argument('--error-5xx', type=float, default=0.0, help='Share of requests answered with 502.')
+        parser.add_argument('--record', default=None, help='Path of the JSON lines file for sent messages.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Creates the emulator
+        with the given options and serves requests until interrupted.
+        """
+        record: Optional[TextIO] = open(options['record'], 'a', encoding='utf-8') if options['record'] else None
+        emulator: TgEmulator = TgEmulator(
+            host=options['host'],
+            port=options['port'],
+            update_rate=options['rate'],
+            chats=options['chats'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_429_rate=options['error_429'],
+            retry_after=options['retry_after'],
+            error_5xx_rate=options['error_5xx'],
+            record=record,
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Telegram API emulator started on {emulator.url}'))
+        try:
+            emulator.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if record is not None:
+                record.close()
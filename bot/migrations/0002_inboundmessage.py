@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-19 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboundMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(verbose_name='Чат ID')),
+                ('message_id', models.BigIntegerField(verbose_name='ID сообщения')),
+                ('from_id', models.BigIntegerField(blank=True, default=None, null=True)),
+                ('username', models.CharField(blank=True, default=None, max_length=150, null=True, verbose_name='tg username')),
+                ('text', models.TextField(blank=True, null=True, verbose_name='текст сообщения')),
+                ('date', models.DateTimeField(db_index=True, verbose_name='Дата получения')),
+            ],
+            options={
+                'verbose_name': 'Входящее сообщение',
+                'verbose_name_plural': 'Входящие сообщения',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inboundmessage',
+            constraint=models.UniqueConstraint(fields=('chat_id', 'message_id'), name='unique_inbound_chat_message'),
+        ),
+    ]
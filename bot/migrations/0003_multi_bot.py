@@ -0,0 +1,112 @@
+# Generated by Django 4.2 on 2026-10-19 10:39
+#
+# TgUser loses its chat_id primary key, because the same chat may talk to several bots. Changing the primary key
+# in place is not portable across database backends, so the table is rebuilt: the new table is created, the rows
+# are copied and the new table takes the name of the old one.
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FIELDS = ('chat_id', 'user_id', 'user_ud', 'username', 'verification_code')
+
+
+def copy_tg_users(apps, schema_editor) -> None:
+    """
+    Copies the linked chats of the default bot from the old table to the new one.
+    """
+    old = apps.get_model('bot', 'TgUser')
+    new = apps.get_model('bot', 'TgUserNew')
+    database = schema_editor.connection.alias
+    batch = []
+    for row in old.objects.using(database).values(*FIELDS).iterator(chunk_size=5000):
+        batch.append(new(**row))
+        if len(batch) >= 5000:
+            new.objects.using(database).bulk_create(batch)
+            batch = []
+    new.objects.using(database).bulk_create(batch)
+
+
+def copy_tg_users_back(apps, schema_editor) -> None:
+    """
+    Copies the linked chats of the default bot back to the table keyed by chat_id.
+    """
+    old = apps.get_model('bot', 'TgUser')
+    new = apps.get_model('bot', 'TgUserNew')
+    database = schema_editor.connection.alias
+    rows = new.objects.using(database).filter(bot__isnull=True).values(*FIELDS).iterator(chunk_size=5000)
+    old.objects.using(database).bulk_create((old(**row) for row in rows), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bot', '0002_inboundmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150, unique=True, verbose_name='Название')),
+                ('token', models.CharField(max_length=100, unique=True, verbose_name='Токен')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+                ('rate_limit', models.FloatField(default=30, verbose_name='Сообщений в секунду')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TgUserNew',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(editable=False, verbose_name='Чат ID')),
+                ('user_ud', models.BigIntegerField(blank=True, default=None, null=True)),
+                ('username', models.CharField(blank=True, default=None, max_length=150, null=True, verbose_name='tg username')),
+                ('verification_code', models.CharField(blank=True, max_length=20, null=True)),
+                ('bot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tg_users', to='bot.bot')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_tg_users, copy_tg_users_back),
+        migrations.DeleteModel(
+            name='TgUser',
+        ),
+        migrations.RenameModel(
+            old_name='TgUserNew',
+            new_name='TgUser',
+        ),
+        migrations.AddConstraint(
+            model_name='tguser',
+            constraint=models.UniqueConstraint(fields=('bot', 'chat_id'), name='unique_tg_user_bot_chat'),
+        ),
+        migrations.AddConstraint(
+            model_name='tguser',
+            constraint=models.UniqueConstraint(condition=models.Q(('bot__isnull', True)), fields=('chat_id',), name='unique_tg_user_default_bot_chat'),
+        ),
+        migrations.AddConstraint(
+            model_name='tguser',
+            constraint=models.UniqueConstraint(fields=('bot', 'user'), name='unique_tg_user_bot_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='tguser',
+            constraint=models.UniqueConstraint(condition=models.Q(('bot__isnull', True)), fields=('user',), name='unique_tg_user_default_bot_user'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='inboundmessage',
+            name='unique_inbound_chat_message',
+        ),
+        migrations.AddField(
+            model_name='inboundmessage',
+            name='bot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inbound_messages', to='bot.bot'),
+        ),
+        migrations.AddConstraint(
+            model_name='inboundmessage',
+            constraint=models.UniqueConstraint(fields=('bot', 'chat_id', 'message_id'), name='unique_inbound_bot_chat_message'),
+        ),
+        migrations.AddConstraint(
+            model_name='inboundmessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('bot__isnull', True)), fields=('chat_id', 'message_id'), name='unique_inbound_default_bot_chat_message'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 10:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_multi_bot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('document', 'Документ'), ('photo', 'Фото')], max_length=20, verbose_name='Тип')),
+                ('digest', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(verbose_name='Размер')),
+                ('file_id', models.CharField(max_length=255, verbose_name='file_id')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+                ('bot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='files', to='bot.bot')),
+            ],
+            options={
+                'verbose_name': 'Загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tgfile',
+            constraint=models.UniqueConstraint(fields=('bot', 'kind', 'digest'), name='unique_tg_file_bot_kind_digest'),
+        ),
+        migrations.AddConstraint(
+            model_name='tgfile',
+            constraint=models.UniqueConstraint(condition=models.Q(('bot__isnull', True)), fields=('kind', 'digest'), name='unique_tg_file_default_bot'),
+        ),
+    ]
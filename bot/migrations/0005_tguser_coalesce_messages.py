@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_tgfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tguser',
+            name='coalesce_messages',
+            field=models.BooleanField(default=False, help_text='Сообщения, отправленные в чат подряд, доставляются одним сообщением telegram', verbose_name='Объединять сообщения'),
+        ),
+    ]
@@ -1,19 +1,54 @@
+from typing import Optional
+
 from django.db import models
 from django.utils.crypto import get_random_string
 
+from bot.tg.client import TgClient
 from users.models import User
 
 
+class Bot(models.Model):
+    """
+    The Bot class inherits from the parent Model class from the django.db.models module. Defines fields
+    of the telegram bots served by the application in addition to the default bot configured by the TG_TOKEN
+    setting.
+    """
+    name = models.CharField(max_length=150, unique=True, verbose_name='Название')
+    token = models.CharField(max_length=100, unique=True, verbose_name='Токен')
+    is_active = models.BooleanField(default=True, verbose_name='Активен')
+    rate_limit = models.FloatField(default=30, verbose_name='Сообщений в секунду')
+
+    def __str__(self) -> str:
+        """
+        The __str__ function overrides the method of the parent class. Does not accept other parameters except
+        for the instance itself. Returns a human-readable representation of a class instance as a string.
+        """
+        return self.name
+
+    def get_client(self) -> TgClient:
+        """
+        The get_client function defines a class method. Does not accept other parameters except for the instance
+        itself. Returns the telegram API client of the bot.
+        """
+        return TgClient(token=self.token, rate_limit=self.rate_limit)
+
+
 class TgUser(models.Model):
     """
     The TgUser class inherits from the parent Model class from the django.db.models module. Defines fields
-    and basic methods for working with database records from the 'tg_user' table.
+    and basic methods for working with database records from the 'tg_user' table. A chat belongs to one bot;
+    an empty bot means the default bot configured by the TG_TOKEN setting.
     """
-    chat_id = models.BigIntegerField(primary_key=True, editable=False, verbose_name='Чат ID')
-    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
+    chat_id = models.BigIntegerField(editable=False, verbose_name='Чат ID')
+    bot = models.ForeignKey(Bot, on_delete=models.CASCADE, null=True, blank=True, related_name='tg_users')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     user_ud = models.BigIntegerField(null=True, blank=True, default=None)
     username = models.CharField(max_length=150, verbose_name='tg username', null=True, blank=True, default=None)
     verification_code = models.CharField(max_length=20, null=True, blank=True)
+    coalesce_messages = models.BooleanField(
+        default=False, verbose_name='Объединять сообщения',
+        help_text='Сообщения, отправленные в чат подряд, доставляются одним сообщением telegram',
+    )
 
     def __str__(self) -> str:
         """
@@ -31,6 +66,25 @@ class TgUser(models.Model):
         self.verification_code = self.generate_verification_code()
         self.save(update_fields=['verification_code'])
 
+    def get_client(self) -> TgClient:
+        """
+        The get_client function defines a class method. Does not accept other parameters except for the instance
+        itself. Returns the telegram API client of the bot the chat belongs to.
+        """
+        return self.bot.get_client() if self.bot_id else TgClient()
+
+    @classmethod
+    def get_linked(cls, user: User, bot: Optional[Bot] = None) -> Optional['TgUser']:
+        """
+        The get_linked function defines a class method. Accepts an instance of the User class and an optional
+        bot. Returns the chat of the user linked to the given bot or, if no bot is given, the chat linked
+        to the default bot or else any linked chat. Returns None if there is no linked chat.
+        """
+        queryset: models.QuerySet = cls.objects.select_related('bot').filter(user=user)
+        if bot is not None:
+            return queryset.filter(bot=bot).first()
+        return queryset.order_by(models.F('bot').asc(nulls_first=True)).first()
+
     @property
     def is_verified(self) -> bool:
         """
@@ -38,7 +92,7 @@ class TgUser(models.Model):
         for the instance itself. Performs verification of the user's verification. If the telegram user is verified,
         it returns True, otherwise False.
         """
-        return bool(self.user)
+        return self.user_id is not None
 
     @staticmethod
     def generate_verification_code() -> str:
@@ -48,3 +102,96 @@ class TgUser(models.Model):
         Returns the generated code as a string.
         """
         return get_random_string(20)
+
+    class Meta:
+        """
+        The Meta class defines the constraints of the model: a chat and a user are linked at most once per bot.
+        The default bot has no record, so it needs separate partial constraints.
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['bot', 'chat_id'], name='unique_tg_user_bot_chat'),
+            models.UniqueConstraint(
+                fields=['chat_id'], condition=models.Q(bot__isnull=True), name='unique_tg_user_default_bot_chat'
+            ),
+            models.UniqueConstraint(fields=['bot', 'user'], name='unique_tg_user_bot_user'),
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(bot__isnull=True), name='unique_tg_user_default_bot_user'
+            ),
+        ]
+
+
+class InboundMessage(models.Model):
+    """
+    The InboundMessage class inherits from the parent Model class from the django.db.models module. Defines fields
+    of the messages received by the telegram bot. Records are written in batches by the runbot command and removed
+    after the retention period.
+    """
+    bot = models.ForeignKey(Bot, on_delete=models.CASCADE, null=True, blank=True, related_name='inbound_messages')
+    chat_id = models.BigIntegerField(verbose_name='Чат ID')
+    message_id = models.BigIntegerField(verbose_name='ID сообщения')
+    from_id = models.BigIntegerField(null=True, blank=True, default=None)
+    username = models.CharField(max_length=150, verbose_name='tg username', null=True, blank=True, default=None)
+    text = models.TextField(null=True, blank=True, verbose_name='текст сообщения')
+    date = models.DateTimeField(db_index=True, verbose_name='Дата получения')
+
+    def __str__(self) -> str:
+        """
+        The __str__ function overrides the method of the parent class. Does not accept other parameters except
+        for the instance itself. Returns a human-readable representation of a class instance as a string.
+        """
+        return f'{self.__class__.__name__} {self.chat_id}:{self.message_id}'
+
+    class Meta:
+        """
+        The Meta class contains the common name of the model instance and the constraints preventing
+        the same telegram message from being stored twice.
+        """
+        verbose_name: str = "Входящее сообщение"
+        verbose_name_plural: str = "Входящие сообщения"
+        constraints = [
+            models.UniqueConstraint(fields=['bot', 'chat_id', 'message_id'], name='unique_inbound_bot_chat_message'),
+            models.UniqueConstraint(
+                fields=['chat_id', 'message_id'],
+                condition=models.Q(bot__isnull=True),
+                name='unique_inbound_default_bot_chat_message',
+            ),
+        ]
+
+
+class TgFile(models.Model):
+    """
+    The TgFile class inherits from the parent Model class from the django.db.models module. Defines fields
+    of the files already uploaded to telegram. A file is identified by the digest of its content and is sent again
+    by its file_id, which is only valid for the bot that uploaded it.
+    """
+    DOCUMENT: str = 'document'
+    PHOTO: str = 'photo'
+    KIND_CHOICES = ((DOCUMENT, 'Документ'), (PHOTO, 'Фото'))
+
+    bot = models.ForeignKey(Bot, on_delete=models.CASCADE, null=True, blank=True, related_name='files')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Тип')
+    digest = models.CharField(max_length=64, verbose_name='SHA-256')
+    size = models.BigIntegerField(verbose_name='Размер')
+    file_id = models.CharField(max_length=255, verbose_name='file_id')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')
+
+    def __str__(self) -> str:
+        """
+        The __str__ function overrides the method of the parent class. Does not accept other parameters except
+        for the instance itself. Returns a human-readable representation of a class instance as a string.
+        """
+        return f'{self.__class__.__name__} {self.kind}:{self.digest[:12]}'
+
+    class Meta:
+        """
+        The Meta class contains the common name of the model instance and the constraints keeping a single
+        file_id per bot and content.
+        """
+        verbose_name: str = "Загруженный файл"
+        verbose_name_plural: str = "Загруженные файлы"
+        constraints = [
+            models.UniqueConstraint(fields=['bot', 'kind', 'digest'], name='unique_tg_file_bot_kind_digest'),
+            models.UniqueConstraint(
+                fields=['kind', 'digest'], condition=models.Q(bot__isnull=True), name='unique_tg_file_default_bot'
+            ),
+        ]
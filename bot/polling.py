@@ -0,0 +1,78 @@
+import time
+from typing import Optional
+
+
+class PollTuner:
+    """
+    The PollTuner class chooses the limit and the timeout of the getUpdates requests of a bot from the observed
+    batches and keeps the statistics of the polling efficiency. The limit doubles while the batches come back full
+    and are handled within the target time, and shrinks to the number of updates the handlers process within
+    the target time when a batch takes longer. A long poll returns as soon as an update arrives, so the timeout
+    stays at its maximum unless buffered incoming messages are due to be stored earlier.
+    """
+    def __init__(self, min_limit: int, max_limit: int, max_timeout: int, target_seconds: float) -> None:
+        """
+        The __init__ function is called when creating an instance of the PollTuner class. Accepts as parameters
+        the bounds of the limit, the maximum long-polling timeout in seconds and the target time of handling
+        a batch in seconds.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_timeout = max_timeout
+        self.target_seconds = target_seconds
+        self.limit: int = max_limit
+        self.reset()
+
+    def timeout(self, flush_due_in: Optional[float] = None) -> int:
+        """
+        The timeout function defines a class method. Accepts the number of seconds until the buffered incoming
+        messages are due to be stored, None if there are none. Returns the timeout of the next request.
+        """
+        if flush_due_in is None:
+            return self.max_timeout
+        return max(0, min(self.max_timeout, int(flush_due_in + 0.999)))
+
+    def record(self, updates: int, seconds: float = 0.0) -> None:
+        """
+        The record function defines a class method. Accepts the number of received updates and the time
+        their handling took in seconds. Updates the statistics and adapts the limit of the next request.
+        """
+        self.requests += 1
+        self.updates += updates
+        if not updates:
+            self.empty += 1
+            return
+        if updates >= self.limit:
+            self.full += 1
+        self.handling_seconds += seconds
+        if seconds > self.target_seconds:
+            self.limit = max(self.min_limit, min(self.limit, int(updates * self.target_seconds / seconds)))
+        elif updates >= self.limit:
+            self.limit = min(self.max_limit, self.limit * 2)
+
+    def report(self) -> dict:
+        """
+        The report function defines a class method. Returns the statistics of the polling efficiency
+        since the last reset: requests, updates, empty and full polls, updates per request and the current limit.
+        """
+        return {
+            'requests': self.requests,
+            'updates': self.updates,
+            'empty_polls': self.empty,
+            'full_polls': self.full,
+            'updates_per_request': round(self.updates / self.requests, 2) if self.requests else 0.0,
+            'handling_seconds': round(self.handling_seconds, 3),
+            'limit': self.limit,
+            'seconds': round(time.monotonic() - self.started, 1),
+        }
+
+    def reset(self) -> None:
+        """
+        The reset function defines a class method. Starts a new period of the statistics.
+        """
+        self.requests: int = 0
+        self.updates: int = 0
+        self.empty: int = 0
+        self.full: int = 0
+        self.handling_seconds: float = 0.0
+        self.started: float = time.monotonic()
@@ -0,0 +1,325 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+from bot.models import Bot, TgUser
+from users.models import User
+
+# The flags of a chat kept in the registry.
+COALESCE: int = 1
+LOAD_CHUNK_SIZE: int = 10000
+
+
+class BotChats:
+    """
+    The BotChats class keeps the chats of one bot in flat arrays of 64-bit integers instead of model instances:
+    the chat ids in ascending order with the aligned ids of their users, 0 for chats that are not verified,
+    and flags, and the ids of the linked users in ascending order with the aligned ids of their chats. Both
+    directions are looked up by binary search.
+    """
+    def __init__(self) -> None:
+        """
+        The __init__ function is called when creating an instance of the BotChats class. Creates empty arrays.
+        """
+        self.chats: array = array("q")
+        self.chat_users: array = array("q")
+        self.chat_flags: array = array("B")
+        self.users: array = array("q")
+        self.user_chats: array = array("q")
+
+    def append(self, chat_id: int, user_id: Optional[int], flags: int) -> None:
+        """
+        The append function defines a class method. Accepts the id of a chat greater than the ids added before,
+        the id of its user or None and its flags, and adds the chat while the registry is loaded. The index
+        of the users is built by the index_users method afterwards.
+        """
+        self.chats.append(chat_id)
+        self.chat_users.append(user_id or 0)
+        self.chat_flags.append(flags)
+
+    def index_users(self) -> None:
+        """
+        The index_users function defines a class method. Builds the index of the linked users from the chats.
+        """
+        linked = (i for i, user_id in enumerate(self.chat_users) if user_id)
+        order = sorted(linked, key=self.chat_users.__getitem__)
+        self.users = array("q", (self.chat_users[i] for i in order))
+        self.user_chats = array("q", (self.chats[i] for i in order))
+
+    def chat_index(self, chat_id: int) -> Tuple[int, bool]:
+        """
+        The chat_index function defines a class method. Accepts the id of a chat. Returns the position
+        of the chat in the arrays and whether it is there.
+        """
+        i: int = bisect_left(self.chats, chat_id)
+        return i, i < len(self.chats) and self.chats[i] == chat_id
+
+    def user_index(self, user_id: int) -> Tuple[int, bool]:
+        """
+        The user_index function defines a class method. Accepts the id of a user. Returns the position
+        of the user in the index of the linked users and whether it is there.
+        """
+        i: int = bisect_left(self.users, user_id)
+        return i, i < len(self.users) and self.users[i] == user_id
+
+    def set(self, chat_id: int, user_id: Optional[int], flags: int) -> None:
+        """
+        The set function defines a class method. Accepts the id of a chat, the id of its user or None and
+        its flags, and adds or updates the chat.
+        """
+        self.remove(chat_id)
+        i, _ = self.chat_index(chat_id)
+        self.chats.insert(i, chat_id)
+        self.chat_users.insert(i, user_id or 0)
+        self.chat_flags.insert(i, flags)
+        if user_id:
+            j, found = self.user_index(user_id)
+            if found:
+                # The user has just been linked to this chat instead of another one.
+                self.user_chats[j] = chat_id
+            else:
+                self.users.insert(j, user_id)
+                self.user_chats.insert(j, chat_id)
+
+    def remove(self, chat_id: int) -> None:
+        """
+        The remove function defines a class method. Accepts the id of a chat and removes the chat
+        and the link of its user.
+        """
+        i, found = self.chat_index(chat_id)
+        if not found:
+            return
+        user_id: int = self.chat_users[i]
+        del self.chats[i], self.chat_users[i], self.chat_flags[i]
+        if user_id:
+            j, found = self.user_index(user_id)
+            if found and self.user_chats[j] == chat_id:
+                del self.users[j], self.user_chats[j]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The nbytes function defines the property method of the class. Returns the size of the arrays in bytes.
+        """
+        arrays = (self.chats, self.chat_users, self.chat_flags, self.users, self.user_chats)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+
+class ChatRegistry:
+    """
+    The ChatRegistry class keeps all telegram chats with their users and bots in memory in compact arrays, so
+    the routing of messages and broadcasts look up chats without loading TgUser and User instances. The registry
+    is loaded with a single query, updated by the signals of the TgUser model saved in this process and reloaded
+    after the CHAT_REGISTRY_MAX_AGE setting to pick up the changes made by other processes. The default bot
+    is stored under None.
+    """
+    def __init__(self, max_age: float) -> None:
+        """
+        The __init__ function is called when creating an instance of the ChatRegistry class. Accepts the number
+        of seconds after which the registry is reloaded, 0 to never reload it.
+        """
+        self.max_age = max_age
+        self._bots: Dict[Optional[int], BotChats] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._load_lock: threading.Lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        The load function defines a class method. Loads all chats ordered by the bot and the chat id
+        from a single stream of rows and replaces the contents of the registry.
+        """
+        loaded_at: float = time.monotonic()
+        bots: Dict[Optional[int], BotChats] = {}
+        rows = (
+            TgUser.objects.order_by("bot_id", "chat_id")
+            .values_list("bot_id", "chat_id", "user_id", "coalesce_messages")
+            .iterator(chunk_size=LOAD_CHUNK_SIZE)
+        )
+        for bot_id, chat_id, user_id, coalesce in rows:
+            chats: Optional[BotChats] = bots.get(bot_id)
+            if chats is None:
+                chats = bots[bot_id] = BotChats()
+            chats.append(chat_id, user_id, COALESCE if coalesce else 0)
+        for chats in bots.values():
+            chats.index_users()
+        with self._lock:
+            self._bots, self._loaded_at = bots, loaded_at
+
+    def ensure_fresh(self) -> None:
+        """
+        The ensure_fresh function defines a class method. Loads the registry if it is not loaded yet or older
+        than the CHAT_REGISTRY_MAX_AGE setting. Only one thread loads it at a time, the others keep using
+        the previous contents meanwhile.
+        """
+        loaded_at: Optional[float] = self._loaded_at
+        if loaded_at is not None and (not self.max_age or time.monotonic() - loaded_at < self.max_age):
+            return
+        if loaded_at is not None and not self._load_lock.acquire(blocking=False):
+            return
+        if loaded_at is None:
+            self._load_lock.acquire()
+        try:
+            if self._loaded_at is loaded_at:
+                self.load()
+        finally:
+            self._load_lock.release()
+
+    def update(self, tg_user: TgUser) -> None:
+        """
+        The update function defines a class method. Accepts a saved chat and updates it in the loaded registry.
+        """
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            chats: Optional[BotChats] = self._bots.get(tg_user.bot_id)
+            if chats is None:
+                chats = self._bots[tg_user.bot_id] = BotChats()
+            chats.set(tg_user.chat_id, tg_user.user_id, COALESCE if tg_user.coalesce_messages else 0)
+
+    def remove(self, tg_user: TgUser) -> None:
+        """
+        The remove function defines a class method. Accepts a deleted chat and removes it from the loaded registry.
+        """
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            chats: Optional[BotChats] = self._bots.get(tg_user.bot_id)
+            if chats is not None:
+                chats.remove(tg_user.chat_id)
+
+    def chat_of(self, user_id: int, bot_id: Optional[int] = None) -> Optional[int]:
+        """
+        The chat_of function defines a class method. Accepts the id of a user and the id of a bot, None for
+        the default bot. Returns the id of the chat of the user linked to the bot or None.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            chats: Optional[BotChats] = self._bots.get(bot_id)
+            if chats is None:
+                return None
+            j, found = chats.user_index(user_id)
+            return chats.user_chats[j] if found else None
+
+    def user_of(self, chat_id: int, bot_id: Optional[int] = None) -> Optional[int]:
+        """
+        The user_of function defines a class method. Accepts the id of a chat and the id of its bot, None for
+        the default bot. Returns the id of the user the chat is linked to or None if it is not verified.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            chats: Optional[BotChats] = self._bots.get(bot_id)
+            if chats is None:
+                return None
+            i, found = chats.chat_index(chat_id)
+            return (chats.chat_users[i] or None) if found else None
+
+    def verified_chats(self, bot_id: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """
+        The verified_chats function defines a class method. Accepts the id of a bot, None for the default bot.
+        Yields the ids of the linked users and their chats of the bot in the order of the user ids, from a copy
+        taken at the call, for broadcasts.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            chats: Optional[BotChats] = self._bots.get(bot_id)
+            if chats is None:
+                return
+            users, user_chats = array("q", chats.users), array("q", chats.user_chats)
+        yield from zip(users, user_chats)
+
+    def get_linked(self, user_id: int, bot: Optional[Bot] = None) -> Optional[TgUser]:
+        """
+        The get_linked function defines a class method. Accepts the id of a user and an optional bot and finds
+        the chat like the get_linked method of the TgUser class: the chat linked to the given bot or, if no bot
+        is given, the chat linked to the default bot or else to the bot with the lowest id. Returns an unsaved
+        TgUser instance with the chat id, the user id, the bot and the coalescing flag, or None if there is
+        no linked chat.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            if bot is not None:
+                candidates = [bot.pk]
+            else:
+                candidates = sorted(self._bots, key=lambda bot_id: (bot_id is not None, bot_id or 0))
+            for bot_id in candidates:
+                chats: Optional[BotChats] = self._bots.get(bot_id)
+                if chats is None:
+                    continue
+                j, found = chats.user_index(user_id)
+                if found:
+                    chat_id: int = chats.user_chats[j]
+                    i, _ = chats.chat_index(chat_id)
+                    flags: int = chats.chat_flags[i]
+                    break
+            else:
+                return None
+        tg_user: TgUser = TgUser(
+            chat_id=chat_id, user_id=user_id, bot_id=bot_id, coalesce_messages=bool(flags & COALESCE)
+        )
+        if bot is not None:
+            tg_user.bot = bot
+        return tg_user
+
+    def __len__(self) -> int:
+        """
+        The __len__ function returns the number of chats in the registry.
+        """
+        with self._lock:
+            return sum(len(chats.chats) for chats in self._bots.values())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The nbytes function defines the property method of the class. Returns the size of the arrays
+        of the registry in bytes.
+        """
+        with self._lock:
+            return sum(chats.nbytes for chats in self._bots.values())
+
+
+_registry: Optional[ChatRegistry] = None
+_registry_lock: threading.Lock = threading.Lock()
+
+
+def get_registry() -> ChatRegistry:
+    """
+    The get_registry function does not accept any parameters. Returns the chat registry of the process,
+    creating it on the first call. The registry is loaded on the first lookup.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ChatRegistry(settings.CHAT_REGISTRY_MAX_AGE)
+    return _registry
+
+
+def get_linked(user: User, bot: Optional[Bot] = None) -> Optional[TgUser]:
+    """
+    The get_linked function accepts the user and an optional bot. Returns the chat of the user like the get_linked
+    method of the TgUser class. The chat is found in the chat registry of the process and confirmed with a single
+    indexed query, as another process may have unlinked it since the registry was loaded; the coalescing flag
+    is taken from the same query. A chat missing from the registry or no longer linked is looked up in the database
+    and the registry is corrected.
+    """
+    registry: ChatRegistry = get_registry()
+    tg_user: Optional[TgUser] = registry.get_linked(user.pk, bot)
+    if tg_user is not None:
+        coalesce: Optional[bool] = (
+            TgUser.objects.filter(chat_id=tg_user.chat_id, bot_id=tg_user.bot_id, user_id=user.pk)
+            .values_list("coalesce_messages", flat=True).first()
+        )
+        if coalesce is not None:
+            tg_user.coalesce_messages = coalesce
+            return tg_user
+    linked: Optional[TgUser] = TgUser.get_linked(user, bot)
+    if tg_user is not None:
+        registry.remove(tg_user)
+    if linked is not None:
+        registry.update(linked)
+    return linked
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from bot.models import TgUser
+from bot.tg.dc import Message
+from messanger.models import SentMessage
+from test_task.db_router import PRIMARY, read_alias, user_shard
+
+Handler = Callable[[TgUser, Message, List[str]], str]
+
+
+class RecentMessagesCache:
+    """
+    The RecentMessagesCache class keeps the most recent messages of a limited number of users in memory,
+    so repeated bot commands of the same chat do not query the database every time. Entries expire
+    after a few seconds, because messages are created by the API in another process.
+    """
+    def __init__(self, size: int, ttl: float, max_users: int = 1024) -> None:
+        """
+        The __init__ function is called when creating an instance of the RecentMessagesCache class. Accepts
+        as parameters the number of messages kept per user, the lifetime of an entry in seconds and
+        the maximum number of cached users.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: "OrderedDict[int, Tuple[float, List[dict]]]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: int, shard: str = PRIMARY) -> List[dict]:
+        """
+        The get function defines a class method. Accepts the user id and the alias of the shard holding
+        the messages of the user as parameters. Returns the list of the most recent messages of the user,
+        newest first, loading it from the database, or its replicas for the primary database, if there is no fresh
+        entry.
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            entry: Optional[Tuple[float, List[dict]]] = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        rows: List[dict] = list(
+            SentMessage.objects.using(read_alias(shard)).filter(owner_id=user_id).order_by("-created")
+            .values("id", "created", "content")[:self.size]
+        )
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, rows)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return rows
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        The invalidate function defines a class method. Accepts the user id as a parameter and drops
+        the cached messages of the user.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+class CommandRouter:
+    """
+    The CommandRouter class contains the dispatch table of the bot commands available to verified users
+    and the handlers of these commands. Each handler accepts the telegram user, the incoming message
+    and the command arguments and returns the text of the reply.
+    """
+    def __init__(self) -> None:
+        """
+        The __init__ function is called when creating an instance of the CommandRouter class. Builds
+        the dispatch table and the cache of recent messages.
+        """
+        self.cache: RecentMessagesCache = RecentMessagesCache(
+            size=settings.BOT_HISTORY_CACHE_SIZE, ttl=settings.BOT_HISTORY_CACHE_TTL
+        )
+        self.commands: Dict[str, Tuple[Handler, str]] = {
+            "/start": (self.start, "show this help"),
+            "/history": (self.history, "[n] show your last n messages"),
+            "/status": (self.status, "show the state of your account"),
+            "/coalesce": (self.coalesce, "[on|off] send your messages that arrive together as one message"),
+            "/unlink": (self.unlink, "unlink this chat from your account"),
+        }
+
+    def dispatch(self, tg_user: TgUser, message: Message) -> Optional[str]:
+        """
+        The dispatch function defines a class method. Accepts the verified telegram user and the incoming
+        message. Calls the handler of the command contained in the message. Returns the text of the reply,
+        the help for unknown commands or None for messages that are not commands.
+        """
+        text: str = (message.text or "").strip()
+        if not text.startswith("/"):
+            return None
+        name, *args = text.split()
+        handler: Optional[Tuple[Handler, str]] = self.commands.get(name.split("@")[0].lower())
+        if handler is None:
+            return self.help()
+        return handler[0](tg_user, message, args)
+
+    def help(self) -> str:
+        """
+        The help function defines a class method. Returns the list of the available commands as a string.
+        """
+        return "Commands:\n" + "\n".join(f"{name} {description}" for name, (_, description) in self.commands.items())
+
+    def start(self, tg_user: TgUser, message: Message, args: List[str]) -> str:
+        """
+        The start function defines a class method handling the /start command. Returns the greeting
+        of the linked user with the list of the available commands.
+        """
+        return f"Hello, {tg_user.user.username}! This chat is linked to your account.\n{self.help()}"
+
+    def history(self, tg_user: TgUser, message: Message, args: List[str]) -> str:
+        """
+        The history function defines a class method handling the /history command. Accepts the number
+        of messages as an optional argument. Returns the most recent messages of the linked user.
+        """
+        try:
+            count: int = int(args[0]) if args else 5
+        except ValueError:
+            return "Usage: /history [n]"
+        rows: List[dict] = self.cache.get(tg_user.user_id, user_shard(tg_user.user))
+        rows = rows[:max(1, min(count, self.cache.size))]
+        if not rows:
+            return "You have not sent any messages yet."
+        return "\n\n".join(f"{row['created']:%Y-%m-%d %H:%M}\n{row['content']}" for row in reversed(rows))
+
+    def status(self, tg_user: TgUser, message: Message, args: List[str]) -> str:
+        """
+        The status function defines a class method handling the /status command. Returns the linked
+        account and the date of the last message.
+        """
+        rows: List[dict] = self.cache.get(tg_user.user_id, user_shard(tg_user.user))
+        last: str = f"{rows[0]['created']:%Y-%m-%d %H:%M}" if rows else "never"
+        return f"Linked account: {tg_user.user.username}\nLast message: {last}"
+
+    def coalesce(self, tg_user: TgUser, message: Message, args: List[str]) -> str:
+        """
+        The coalesce function defines a class method handling the /coalesce command. Accepts 'on' or 'off'
+        as an optional argument and turns the coalescing of the messages sent to the chat on or off. Returns
+        the current setting.
+        """
+        if args:
+            if args[0].lower() not in ("on", "off"):
+                return "Usage: /coalesce [on|off]"
+            tg_user.coalesce_messages = args[0].lower() == "on"
+            tg_user.save(update_fields=["coalesce_messages"])
+        if tg_user.coalesce_messages:
+            return "Messages sent together are delivered as one message."
+        return "Every message is delivered separately."
+
+    def unlink(self, tg_user: TgUser, message: Message, args: List[str]) -> str:
+        """
+        The unlink function defines a class method handling the /unlink command. Unlinks the chat from
+        the account of the user and drops its verification code, so the old code can not link it again.
+        Returns the confirmation.
+        """
+        user_id: int = tg_user.user_id
+        tg_user.user = None
+        tg_user.verification_code = None
+        tg_user.save(update_fields=["user", "verification_code"])
+        self.cache.invalidate(user_id)
+        return "This chat is unlinked from your account. Send any message to get a new verification code."
@@ -15,6 +15,7 @@ class TgUserSerializer(serializers.ModelSerializer):
     tg_id = serializers.IntegerField(source='chat_id', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     user_id = serializers.IntegerField(source='user.id', read_only=True)
+    bot = serializers.PrimaryKeyRelatedField(read_only=True)
     verification_code = serializers.CharField(write_only=True)
 
     def validate_verification_code(self, code: str) -> str:
@@ -22,15 +23,19 @@ class TgUserSerializer(serializers.ModelSerializer):
         The validate_verification_code function defines a class method. Accepts the verification code sent
         by the user as a parameter. Makes a request from the database of the user who has the corresponding code.
         Sets the found user as the current one. Otherwise, raises a ValidationError exception. Returns
-        the received code as a string.
+        the received code as a string. Raises a ValidationError exception if the current user already has a chat
+        linked to the same bot.
         """
         try:
-            tg_user: TgUser = TgUser.objects.get(verification_code=code)
+            tg_user: TgUser = TgUser.objects.select_related('bot').get(verification_code=code)
         except TgUser.DoesNotExist:
             raise ValidationError('Invalid verification code')
         else:
             if tg_user.is_verified:
                 raise ValidationError('Unsupported error')
+            request = self.context.get('request')
+            if request and TgUser.objects.filter(user=request.user, bot_id=tg_user.bot_id).exists():
+                raise ValidationError('The account is already linked to this bot')
             self.instance = tg_user
             return code
 
@@ -40,4 +45,4 @@ class TgUserSerializer(serializers.ModelSerializer):
         defines the necessary parameters for the serializer to function.
         """
         model: models.Model = TgUser
-        fields: Tuple[str, ...] = ('tg_id', 'username', 'user_id', 'verification_code')
+        fields: Tuple[str, ...] = ('tg_id', 'username', 'user_id', 'bot', 'verification_code')
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bot.models import TgUser
+from bot.registry import get_registry
+
+
+@receiver(post_save, sender=TgUser)
+def register_chat(sender, instance: TgUser, **kwargs) -> None:
+    """
+    The register_chat function is called after a chat is saved. Updates the chat in the chat registry.
+    """
+    get_registry().update(instance)
+
+
+@receiver(post_delete, sender=TgUser)
+def unregister_chat(sender, instance: TgUser, **kwargs) -> None:
+    """
+    The unregister_chat function is called after a chat is deleted. Removes the chat from the chat registry.
+    """
+    get_registry().remove(instance)
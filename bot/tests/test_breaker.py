@@ -0,0 +1,85 @@
+import pytest
+
+from bot.tg import breaker
+from bot.tg.breaker import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker.time, "monotonic", clock)
+    return clock
+
+
+def fail(circuit: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        circuit.before_call()
+        circuit.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    circuit = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    fail(circuit, 2)
+    assert circuit.state == CircuitBreaker.CLOSED
+    fail(circuit, 1)
+    assert circuit.state == CircuitBreaker.OPEN
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as error:
+        circuit.before_call()
+    assert error.value.retry_after == pytest.approx(20)
+    assert circuit.snapshot()["rejected_count"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    circuit = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    fail(circuit, 2)
+    circuit.before_call()
+    circuit.record_success()
+    fail(circuit, 2)
+    assert circuit.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_a_single_trial_through(clock):
+    circuit = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    fail(circuit, 1)
+    clock.now += 30
+    circuit.before_call()
+    assert circuit.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+
+
+def test_failed_trial_opens_the_circuit_again(clock):
+    circuit = CircuitBreaker("test", failure_threshold=5, reset_timeout=30)
+    fail(circuit, 5)
+    clock.now += 30
+    fail(circuit, 1)
+    assert circuit.state == CircuitBreaker.OPEN
+    assert circuit.snapshot()["opened_count"] == 2
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+
+
+def test_successful_trial_closes_the_circuit(clock):
+    circuit = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    fail(circuit, 1)
+    clock.now += 30
+    circuit.before_call()
+    circuit.record_success()
+    assert circuit.state == CircuitBreaker.CLOSED
+    circuit.before_call()
+    circuit.before_call()
+
+
+def test_breakers_are_shared_by_name():
+    first = breaker.breaker_for("https://api.telegram.org/bot1", 5, 30)
+    assert breaker.breaker_for("https://api.telegram.org/bot1", 5, 30) is first
+    assert breaker.breaker_for("https://api.telegram.org/bot2", 5, 30) is not first
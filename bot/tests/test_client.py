@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from bot.tg.breaker import CircuitBreaker, TgUnavailableError
+from bot.tg.client import TgClient
+
+
+@pytest.fixture
+def client(request) -> TgClient:
+    # Every test gets its own breaker, as the breakers are shared by the bot in the process.
+    client = TgClient(token="1:secret", base_url=f"http://{request.node.name}.test")
+    client.breaker.state = CircuitBreaker.HALF_OPEN
+    return client
+
+
+def respond(monkeypatch, *outcomes) -> None:
+    outcomes = list(outcomes)
+
+    def request(*args, **kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return SimpleNamespace(status_code=outcome)
+
+    monkeypatch.setattr(requests, "request", request)
+
+
+def test_unexpected_error_releases_the_trial(client, monkeypatch):
+    respond(monkeypatch, ValueError("broken body"), 200, 200)
+    with pytest.raises(ValueError):
+        client.request("POST", "sendMessage")
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.request("POST", "sendMessage").status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.request("POST", "sendMessage").status_code == 200
+
+
+def test_unexpected_error_is_not_a_failure(client, monkeypatch):
+    client.breaker.state = CircuitBreaker.CLOSED
+    respond(monkeypatch, *[KeyError("bug")] * 10)
+    for _ in range(10):
+        with pytest.raises(KeyError):
+            client.request("GET", "getUpdates")
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.failures == 0
+
+
+def test_failed_trial_opens_the_circuit(client, monkeypatch):
+    respond(monkeypatch, requests.ConnectionError("refused"))
+    with pytest.raises(TgUnavailableError):
+        client.request("POST", "sendMessage")
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_server_error_trial_opens_the_circuit(client, monkeypatch):
+    respond(monkeypatch, 502)
+    with pytest.raises(TgUnavailableError):
+        client.request("POST", "sendMessage")
+    assert client.breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,54 @@
+from bot.polling import PollTuner
+
+
+def make_tuner() -> PollTuner:
+    return PollTuner(min_limit=10, max_limit=100, max_timeout=60, target_seconds=2)
+
+
+def test_limit_doubles_on_full_fast_batches_up_to_the_maximum():
+    tuner = make_tuner()
+    tuner.limit = 20
+    tuner.record(20, 0.5)
+    assert tuner.limit == 40
+    tuner.record(40, 0.5)
+    tuner.record(80, 0.5)
+    assert tuner.limit == 100
+
+
+def test_partial_batches_keep_the_limit():
+    tuner = make_tuner()
+    tuner.limit = 20
+    tuner.record(5, 0.5)
+    tuner.record(0)
+    assert tuner.limit == 20
+
+
+def test_limit_shrinks_to_what_is_handled_within_the_target():
+    tuner = make_tuner()
+    tuner.record(100, 4)
+    assert tuner.limit == 50
+    tuner.record(50, 20)
+    assert tuner.limit == 10
+
+
+def test_timeout_waits_for_the_buffered_messages():
+    tuner = make_tuner()
+    assert tuner.timeout() == 60
+    assert tuner.timeout(2.2) == 3
+    assert tuner.timeout(0) == 0
+    assert tuner.timeout(600) == 60
+
+
+def test_report_counts_the_polls_since_the_reset():
+    tuner = make_tuner()
+    tuner.record(100, 1)
+    tuner.record(0)
+    tuner.record(50, 0.5)
+    report = tuner.report()
+    assert report["requests"] == 3
+    assert report["updates"] == 150
+    assert report["empty_polls"] == 1
+    assert report["full_polls"] == 1
+    assert report["updates_per_request"] == 50.0
+    tuner.reset()
+    assert tuner.report()["requests"] == 0
@@ -0,0 +1,57 @@
+import pytest
+
+from bot.tg import ratelimit
+from bot.tg.ratelimit import RateLimiter, limiter_for
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    monkeypatch.setattr(ratelimit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_burst_is_not_delayed(clock):
+    limiter = RateLimiter(rate=10, burst=3)
+    assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire() == pytest.approx(0.1)
+    assert clock.slept == [pytest.approx(0.1)]
+
+
+def test_requests_are_spaced_by_the_rate(clock):
+    limiter = RateLimiter(rate=4)
+    limiter.acquire()
+    waits = [limiter.acquire() for _ in range(4)]
+    assert waits == [pytest.approx(0.25)] * 4
+    assert clock.now == pytest.approx(1001.0)
+
+
+def test_tokens_refill_up_to_the_burst(clock):
+    limiter = RateLimiter(rate=2, burst=2)
+    limiter.acquire()
+    limiter.acquire()
+    clock.now += 60
+    assert [limiter.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert limiter.acquire() == pytest.approx(0.5)
+
+
+def test_limiters_are_shared_by_token_and_replaced_on_a_new_rate():
+    first = limiter_for("test-token", 30)
+    assert limiter_for("test-token", 30) is first
+    replaced = limiter_for("test-token", 20)
+    assert replaced is not first
+    assert replaced.rate == 20
@@ -0,0 +1,94 @@
+import pytest
+
+from bot import registry
+from bot.models import Bot, TgUser
+from bot.registry import COALESCE, BotChats, ChatRegistry, get_linked
+from users.models import User
+
+
+def make_chats() -> BotChats:
+    chats = BotChats()
+    chats.append(10, 1, 0)
+    chats.append(20, None, 0)
+    chats.append(30, 3, COALESCE)
+    chats.index_users()
+    return chats
+
+
+def test_chats_are_looked_up_in_both_directions():
+    chats = make_chats()
+    assert list(chats.users) == [1, 3]
+    assert list(chats.user_chats) == [10, 30]
+    assert chats.chat_index(20) == (1, True)
+    assert chats.chat_index(25) == (2, False)
+    assert chats.user_index(3) == (1, True)
+    assert chats.user_index(2) == (1, False)
+
+
+def test_set_links_and_relinks_chats():
+    chats = make_chats()
+    chats.set(20, 2, 0)
+    assert list(chats.users) == [1, 2, 3]
+    assert list(chats.user_chats) == [10, 20, 30]
+    # The user moves to a new chat.
+    chats.set(40, 1, 0)
+    assert list(chats.chats) == [10, 20, 30, 40]
+    assert list(chats.user_chats) == [40, 20, 30]
+
+
+def test_remove_drops_the_chat_and_its_link():
+    chats = make_chats()
+    chats.remove(30)
+    chats.remove(99)
+    assert list(chats.chats) == [10, 20]
+    assert list(chats.users) == [1]
+    assert chats.nbytes == 8 * (2 + 2 + 1 + 1) + 2
+
+
+@pytest.fixture
+def chat_registry(monkeypatch) -> ChatRegistry:
+    chat_registry = ChatRegistry(max_age=0)
+    monkeypatch.setattr(registry, "_registry", chat_registry)
+    return chat_registry
+
+
+@pytest.mark.django_db
+def test_registry_prefers_the_default_bot(chat_registry):
+    user = User.objects.create(username="alice")
+    bot = Bot.objects.create(name="other", token="1:other")
+    TgUser.objects.create(chat_id=7, bot=bot, user=user)
+    TgUser.objects.create(chat_id=8, user=user, coalesce_messages=True)
+    TgUser.objects.create(chat_id=9)
+    linked = chat_registry.get_linked(user.pk)
+    assert (linked.chat_id, linked.bot_id, linked.coalesce_messages) == (8, None, True)
+    assert len(chat_registry) == 3
+    assert chat_registry.get_linked(user.pk, bot).chat_id == 7
+    assert chat_registry.user_of(9) is None
+    assert list(chat_registry.verified_chats()) == [(user.pk, 8)]
+
+
+@pytest.mark.django_db
+def test_registry_follows_the_changes_of_the_process(chat_registry):
+    user = User.objects.create(username="alice")
+    tg_user = TgUser.objects.create(chat_id=8)
+    assert chat_registry.chat_of(user.pk) is None
+    tg_user.user = user
+    tg_user.save()
+    assert chat_registry.chat_of(user.pk) == 8
+    tg_user.delete()
+    assert chat_registry.user_of(8) is None
+
+
+@pytest.mark.django_db
+def test_get_linked_confirms_the_registry_in_the_database(chat_registry):
+    user = User.objects.create(username="alice")
+    other = User.objects.create(username="bob")
+    TgUser.objects.create(chat_id=8, user=user)
+    assert get_linked(user).chat_id == 8
+    # Another process relinks the chat: no signal reaches this registry.
+    TgUser.objects.filter(chat_id=8).update(user=other, coalesce_messages=True)
+    assert get_linked(user) is None
+    assert chat_registry.chat_of(user.pk) is None
+    linked = get_linked(other)
+    assert (linked.chat_id, linked.coalesce_messages) == (8, True)
+    assert chat_registry.chat_of(other.pk) == 8
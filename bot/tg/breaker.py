@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class TgUnavailableError(Exception):
+    """
+    The TgUnavailableError class is raised when the telegram API cannot be reached: the request timed out,
+    the connection failed, the API answered with a server error or the circuit breaker is open.
+    """
+
+
+class CircuitOpenError(TgUnavailableError):
+    """
+    The CircuitOpenError class is raised without making a request while the circuit breaker is open.
+    """
+    def __init__(self, name: str, retry_after: float) -> None:
+        """
+        The __init__ function is called when creating an instance of the CircuitOpenError class. Accepts
+        the name of the breaker and the number of seconds until the next trial request is allowed.
+        """
+        super().__init__(f"Circuit breaker {name} is open, retry after {retry_after:.1f} s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    The CircuitBreaker class counts consecutive failed requests to a service. After the threshold is reached
+    the circuit opens and requests fail immediately. When the reset timeout has passed the circuit becomes half-open
+    and lets a single trial request through: its success closes the circuit, its failure opens it again.
+    """
+    CLOSED: str = "closed"
+    OPEN: str = "open"
+    HALF_OPEN: str = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        """
+        The __init__ function is called when creating an instance of the CircuitBreaker class. Accepts as parameters
+        the name used in logs and monitoring, the number of consecutive failures opening the circuit and the number
+        of seconds the circuit stays open before a trial request.
+        """
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.state: str = self.CLOSED
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.opened_count: int = 0
+        self.rejected_count: int = 0
+        self._trial: bool = False
+        self._lock: threading.Lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        The before_call function defines a class method to be called before each request. Moves an open circuit
+        to the half-open state when the reset timeout has passed. Raises a CircuitOpenError exception if
+        the request is not allowed.
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining: float = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected_count += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = self.HALF_OPEN
+                logger.info("Circuit breaker %s is half-open", self.name)
+            if self.state == self.HALF_OPEN:
+                if self._trial:
+                    self.rejected_count += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._trial = True
+
+    def record_success(self) -> None:
+        """
+        The record_success function defines a class method to be called after a request reached the service.
+        Resets the failure counter and closes the circuit.
+        """
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker %s is closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """
+        The record_failure function defines a class method to be called after a failed request. Opens the circuit
+        when the failed request was the trial one or the number of consecutive failures reached the threshold.
+        """
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.opened_count += 1
+                logger.warning("Circuit breaker %s is open after %d failures", self.name, self.failures)
+
+    def release(self) -> None:
+        """
+        The release function defines a class method to be called when a request failed before its outcome was known,
+        e.g. while its body was prepared. Lets the next request be the trial one if the circuit is half-open without
+        counting a success or a failure.
+        """
+        with self._lock:
+            self._trial = False
+
+    def snapshot(self) -> dict:
+        """
+        The snapshot function defines a class method. Returns the state of the breaker and its counters
+        as a dictionary for monitoring.
+        """
+        with self._lock:
+            retry_after: float = 0.0
+            if self.state == self.OPEN:
+                retry_after = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+            return {
+                "name": self.name,
+                "state": self.state,
+                "failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_after": round(retry_after, 3),
+                "opened_count": self.opened_count,
+                "rejected_count": self.rejected_count,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock: threading.Lock = threading.Lock()
+
+
+def breaker_for(name: str, failure_threshold: int, reset_timeout: float) -> CircuitBreaker:
+    """
+    The breaker_for function accepts the name of the service, the number of consecutive failures opening
+    the circuit and the reset timeout in seconds. Returns the circuit breaker shared by all clients
+    of the service in the process.
+    """
+    with _lock:
+        breaker: CircuitBreaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+            _breakers[name] = breaker
+        return breaker
+
+
+def snapshots() -> List[dict]:
+    """
+    The snapshots function does not accept any parameters. Returns the states of all circuit breakers
+    of the process.
+    """
+    with _lock:
+        breakers: List[CircuitBreaker] = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
@@ -1,37 +1,109 @@
-from typing import Optional
+import json
+from typing import Iterator, List, Optional, Tuple, Union
 import requests
+from django.conf import settings
 from requests import Response
 
+from bot.tg.breaker import CircuitBreaker, TgUnavailableError, breaker_for
 from bot.tg.dc import GetUpdatesResponse, SendMessageResponse
-from test_task.settings import TG_TOKEN
+from bot.tg.ratelimit import RateLimiter, limiter_for
+from bot.tg.upload import InputFile, MultipartStream
+from test_task import tracing
 
 
 class TgClient:
     """
-    The TgClient class contains all the necessary methods for working with the telegram bot API.
+    The TgClient class contains all the necessary methods for working with the telegram bot API. All requests
+    have connect and read timeouts and go through the circuit breaker shared by the clients of the same bot,
+    so an unavailable API makes the calls fail fast with a TgUnavailableError exception instead of blocking.
     """
-    def __init__(self, token: Optional[str] = None) -> None:
+    def __init__(
+        self, token: Optional[str] = None, base_url: Optional[str] = None, rate_limit: Optional[float] = None
+    ) -> None:
         """
         The __init__ function is called when creating an instance of the TgClient class. Accepts as parameters
-        the value of the telegram bot token or uses the token from the application settings.
+        the value of the telegram bot token, the base URL of the telegram bot API and the allowed number of sent
+        messages per second of the bot or uses the values from the application settings.
         """
-        self.token = token if token else TG_TOKEN
+        self.token = token if token else settings.TG_TOKEN
+        self.base_url = (base_url if base_url else settings.TG_API_URL).rstrip("/")
+        rate: float = rate_limit if rate_limit else settings.TG_RATE_LIMIT
+        self.limiter: RateLimiter = limiter_for(self.token, rate)
+        # The breaker is kept per bot, so a revoked token or an outage of one bot does not stop the others.
+        # It is named after the public id part of the token, the secret part is not exposed in the health check.
+        self.breaker: CircuitBreaker = breaker_for(
+            f"{self.base_url}/bot{self.token.split(':')[0]}",
+            settings.TG_BREAKER_FAILURES, settings.TG_BREAKER_RESET_TIMEOUT,
+        )
+
+    def request(
+        self, http_method: str, method: str, read_timeout: Optional[float] = None, limited: bool = False,
+        session: Optional[requests.Session] = None, **kwargs
+    ) -> Response:
+        """
+        The request function defines a class method. Accepts the HTTP method, the name of the telegram API method,
+        an optional read timeout in seconds, whether the request is subject to the rate limit of the bot, an optional
+        session keeping the connection alive between the requests and the keyword arguments of the request. Makes
+        the request through the circuit breaker with the TG_CONNECT_TIMEOUT and TG_READ_TIMEOUT settings. Timeouts,
+        connection errors and server errors count as failures, any other response counts as a success. Returns
+        the response. Raises a TgUnavailableError exception if the API is unavailable or the circuit is open.
+        In a sampled trace the request is a span and carries the traceparent header. Any other error is raised
+        as is and releases the trial request of a half-open circuit.
+        """
+        with tracing.span(f"tg.{method}", **{"http.method": http_method}) as span:
+            self.breaker.before_call()
+            try:
+                if limited:
+                    with tracing.span("tg.rate_limit"):
+                        self.limiter.acquire()
+                timeout: Tuple[float, float] = (settings.TG_CONNECT_TIMEOUT, read_timeout or settings.TG_READ_TIMEOUT)
+                if span.traceparent:
+                    kwargs["headers"] = {**kwargs.get("headers", {}), tracing.TRACEPARENT: span.traceparent}
+                try:
+                    response: Response = (session or requests).request(
+                        http_method, self.get_url(method), timeout=timeout, **kwargs
+                    )
+                except requests.RequestException as error:
+                    self.breaker.record_failure()
+                    raise TgUnavailableError(f"{method}: {error}") from error
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                    raise TgUnavailableError(f"{method}: HTTP {response.status_code}")
+            except TgUnavailableError:
+                raise
+            except BaseException:
+                # Any other error leaves the outcome unknown, so a half-open circuit must not wait for it forever.
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
 
     def get_url(self, method: str) -> str:
         """
         The get_url function defines a class method. Accepts as parameters the name of the method of interaction
         with the telegram API in the form of a string. Returns the URL for making the request as a string.
         """
-        return f"https://api.telegram.org/bot{self.token}/{method}"
+        return f"{self.base_url}/bot{self.token}/{method}"
 
-    def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
+    def get_updates(
+        self, offset: int = 0, timeout: int = 60, limit: Optional[int] = None,
+        allowed_updates: Optional[List[str]] = None,
+    ) -> GetUpdatesResponse:
         """
         The get_updates function defines a class method. Accepts offset and timeout as parameters with certain
-        values by omission. Produces a telegram API request for sent messages. Returns the API response
+        values by omission, the maximum number of updates and the list of update types to receive, by default
+        the telegram API defaults. Produces a telegram API request for sent messages. Returns the API response
         as a GetUpdatesResponse object.
         """
-        url: str = self.get_url("getUpdates")
-        response: Response = requests.get(url, params={"offset": offset, "timeout": timeout})
+        params: dict = {"offset": offset, "timeout": timeout}
+        if limit is not None:
+            params["limit"] = limit
+        if allowed_updates is not None:
+            params["allowed_updates"] = json.dumps(allowed_updates)
+        response: Response = self.request(
+            "GET", "getUpdates", read_timeout=timeout + settings.TG_READ_TIMEOUT, params=params,
+        )
         return GetUpdatesResponse.Schema().load(response.json())
 
     def send_message(self, chat_id: int, text: str) -> SendMessageResponse:
@@ -40,6 +112,64 @@ class TgClient:
         as parameters. Makes a POST request to the telegram API with sending a message to the specified chat.
         Returns the API response as a SendMessageResponse object.
         """
-        url: str = self.get_url("sendMessage")
-        response: Response = requests.post(url, params={"chat_id": chat_id, "text": text})
+        response: Response = self.request(
+            "POST", "sendMessage", limited=True, data={"chat_id": chat_id, "text": text}
+        )
+        return SendMessageResponse.Schema().load(response.json())
+
+    def send_messages(self, chat_id: int, texts: List[str]) -> Iterator[SendMessageResponse]:
+        """
+        The send_messages function defines a class method. Accepts chat_id as an integer and the prepared texts
+        of several messages. Sends them to the specified chat in order, one right after another over a single kept
+        alive connection. Yields the API response of each message as soon as it is sent, so the caller knows which
+        messages were sent if a later one fails. The requests are not pipelined or sent concurrently: the telegram
+        API does not keep the order of concurrent requests to a chat, so each part waits for the previous one.
+        """
+        with requests.Session() as session:
+            for text in texts:
+                response: Response = self.request(
+                    "POST", "sendMessage", limited=True, session=session, data={"chat_id": chat_id, "text": text}
+                )
+                yield SendMessageResponse.Schema().load(response.json())
+
+    def send_document(
+        self, chat_id: int, document: Union[InputFile, str], caption: Optional[str] = None
+    ) -> SendMessageResponse:
+        """
+        The send_document function defines a class method. Accepts chat_id as an integer, the document as an
+        InputFile to upload or as the file_id of a file already stored by telegram, and an optional caption.
+        Sends the document to the specified chat. Returns the API response as a SendMessageResponse object.
+        """
+        return self.send_file("sendDocument", "document", chat_id, document, caption)
+
+    def send_photo(
+        self, chat_id: int, photo: Union[InputFile, str], caption: Optional[str] = None
+    ) -> SendMessageResponse:
+        """
+        The send_photo function defines a class method. Accepts chat_id as an integer, the photo as an InputFile
+        to upload or as the file_id of a file already stored by telegram, and an optional caption. Sends the photo
+        to the specified chat. Returns the API response as a SendMessageResponse object.
+        """
+        return self.send_file("sendPhoto", "photo", chat_id, photo, caption)
+
+    def send_file(
+        self, method: str, name: str, chat_id: int, file: Union[InputFile, str], caption: Optional[str] = None
+    ) -> SendMessageResponse:
+        """
+        The send_file function defines a class method. Accepts the name of the telegram API method, the name
+        of its file parameter, chat_id, the file and an optional caption. A file_id is sent as a plain parameter,
+        an InputFile is streamed from disk as a multipart/form-data body. Returns the API response
+        as a SendMessageResponse object.
+        """
+        params: dict = {"chat_id": chat_id}
+        if caption:
+            params["caption"] = caption
+        if isinstance(file, InputFile):
+            body: MultipartStream = MultipartStream(params, name, file)
+            response: Response = self.request(
+                "POST", method, read_timeout=settings.TG_UPLOAD_TIMEOUT, limited=True,
+                data=body, headers={"Content-Type": body.content_type},
+            )
+        else:
+            response = self.request("POST", method, limited=True, data={**params, name: file})
         return SendMessageResponse.Schema().load(response.json())
@@ -41,6 +41,44 @@ class Chat:
         unknown = EXCLUDE
 
 
+@dataclass
+class PhotoSize:
+    """
+    The PhotoSize class is a dataclass and is intended for serialization and deserialization of the telegram API
+    response and validation of the received data contained in each element of the value of the 'photo' key.
+    """
+    file_id: str
+    file_unique_id: str
+    width: int
+    height: int
+    file_size: Optional[int]
+
+    class Meta:
+        """
+        The Meta class is an auxiliary class and defines the behavior when receiving unknown parameters.
+        """
+        unknown = EXCLUDE
+
+
+@dataclass
+class Document:
+    """
+    The Document class is a dataclass and is intended for serialization and deserialization of the telegram API
+    response and validation of the received data contained in the value of the 'document' key.
+    """
+    file_id: str
+    file_unique_id: str
+    file_name: Optional[str]
+    mime_type: Optional[str]
+    file_size: Optional[int]
+
+    class Meta:
+        """
+        The Meta class is an auxiliary class and defines the behavior when receiving unknown parameters.
+        """
+        unknown = EXCLUDE
+
+
 @dataclass
 class Message:
     """
@@ -50,6 +88,9 @@ class Message:
     message_id: int
     date: int
     text: Optional[str]
+    caption: Optional[str]
+    document: Optional[Document]
+    photo: Optional[List[PhotoSize]]
     from_: MessageFrom = field(metadata={"data_key": "from"})
     chat: Chat
 
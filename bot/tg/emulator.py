@@ -0,0 +1,377 @@
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, TextIO, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from bot.tg.text import TEXT_LIMIT, text_length
+
+
+class TgEmulator:
+    """
+    The TgEmulator class is a local emulator of the telegram bot API. Serves the getUpdates, sendMessage,
+    sendDocument and sendPhoto methods over HTTP, generates a stream of incoming updates at the configured rate,
+    injects latency, 429 responses with 'retry_after' and 5xx errors, and records all sent messages. Is intended
+    for load testing of the bot and the message delivery path without access to api.telegram.org.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8081,
+        update_rate: float = 0.0,
+        chats: int = 10,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_429_rate: float = 0.0,
+        retry_after: int = 1,
+        error_5xx_rate: float = 0.0,
+        record: Optional[TextIO] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        The __init__ function is called when creating an instance of the TgEmulator class. Accepts as parameters
+        the address to listen on, the rate of generated updates per second, the number of emulated chats,
+        the latency and its jitter in seconds, the share of requests answered with 429 and 5xx errors,
+        the 'retry_after' value for 429 responses, an optional file object for recording sent messages
+        and an optional seed of the random generator.
+        """
+        self.update_rate = update_rate
+        self.chats = chats
+        self.latency = latency
+        self.jitter = jitter
+        self.error_429_rate = error_429_rate
+        self.retry_after = retry_after
+        self.error_5xx_rate = error_5xx_rate
+        self.record = record
+        self.random = random.Random(seed)
+
+        self.sent: List[dict] = []
+        self.files: Dict[str, dict] = {}
+        self.stats: Dict[str, int] = {
+            "getUpdates": 0, "sendMessage": 0, "sendDocument": 0, "sendPhoto": 0,
+            "updates": 0, "uploads": 0, "uploaded_bytes": 0, "429": 0, "5xx": 0,
+        }
+        self._updates: Deque[dict] = deque()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self._generator: Optional[threading.Thread] = None
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """
+        The url function defines the property method of the class. Returns the base URL of the emulator
+        to be used as the TG_API_URL setting.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "TgEmulator":
+        """
+        The start function defines a class method. Starts the HTTP server and the update generator
+        in background threads. Returns the instance itself.
+        """
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self._start_generator()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        The serve_forever function defines a class method. Starts the update generator in a background thread
+        and serves HTTP requests in the current thread until the emulator is stopped.
+        """
+        self._start_generator()
+        self.server.serve_forever()
+
+    def stop(self) -> None:
+        """
+        The stop function defines a class method. Stops the update generator and the HTTP server
+        and wakes up all pending long-polling requests.
+        """
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def push_update(self, chat_id: int, text: str, kind: str = "message") -> dict:
+        """
+        The push_update function defines a class method. Accepts chat_id as an integer, text as a string
+        and the type of the update, e.g. 'edited_message', as parameters. Adds a new incoming message to the update
+        queue and wakes up pending long-polling requests. Returns the created update as a dictionary.
+        """
+        with self._condition:
+            update: dict = {
+                "update_id": self._next_update_id,
+                kind: self._message(chat_id, text, is_bot=False),
+            }
+            self._next_update_id += 1
+            self._updates.append(update)
+            self.stats["updates"] += 1
+            self._condition.notify_all()
+        return update
+
+    def get_updates(
+        self, offset: int = 0, timeout: float = 0, limit: int = 100, allowed_updates: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        The get_updates function defines a class method. Accepts offset, timeout, limit and allowed_updates
+        as parameters with the same meaning as in the telegram API. Confirms all updates with identifiers less
+        than offset, drops the updates of other types than the allowed ones and waits up to timeout seconds
+        for new ones. Returns the list of pending updates.
+        """
+        deadline: float = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if allowed_updates is not None:
+                    self._updates = deque(
+                        update for update in self._updates if any(kind in update for kind in allowed_updates)
+                    )
+                while self._updates and self._updates[0]["update_id"] < offset:
+                    self._updates.popleft()
+                remaining: float = deadline - time.monotonic()
+                if self._updates or remaining <= 0 or self._stopped.is_set():
+                    return list(self._updates)[:limit]
+                self._condition.wait(remaining)
+
+    def send_message(self, token: str, chat_id: int, text: str) -> dict:
+        """
+        The send_message function defines a class method. Accepts the bot token, chat_id and text as parameters.
+        Records the sent message and returns it as a dictionary in the format of the telegram API. Rejects texts
+        longer than the telegram API accepts with a ValueError exception.
+        """
+        if text_length(text) > TEXT_LIMIT:
+            raise ValueError("message is too long")
+        with self._condition:
+            message: dict = self._message(chat_id, text, is_bot=True)
+            record: dict = {"token": token, "chat_id": chat_id, "text": text, "time": time.time()}
+            self.sent.append(record)
+            if self.record is not None:
+                self.record.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.record.flush()
+        return message
+
+    def send_file(
+        self,
+        token: str,
+        chat_id: int,
+        kind: str,
+        file_id: Optional[str] = None,
+        content: Optional[bytes] = None,
+        file_name: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        caption: Optional[str] = None,
+    ) -> dict:
+        """
+        The send_file function defines a class method. Accepts the bot token, chat_id, the kind of the file,
+        'document' or 'photo', and either the file_id of a previously uploaded file or the uploaded content with
+        its name and MIME type, and an optional caption. Records the sent file and returns the message
+        in the format of the telegram API. Raises KeyError for an unknown file_id.
+        """
+        with self._condition:
+            if content is not None:
+                digest: str = hashlib.sha256(content).hexdigest()
+                file_id = f"{kind}-{token}-{digest[:32]}"
+                self.files[file_id] = {
+                    "file_id": file_id, "file_unique_id": digest[:16], "file_size": len(content),
+                    "file_name": file_name, "mime_type": mime_type,
+                }
+                self.stats["uploads"] += 1
+                self.stats["uploaded_bytes"] += len(content)
+            elif file_id not in self.files or not file_id.startswith(f"{kind}-{token}-"):
+                raise KeyError(f"wrong file identifier {file_id}")
+            stored: dict = self.files[file_id]
+
+            message: dict = self._message(chat_id, None, is_bot=True)
+            message["caption"] = caption
+            if kind == "photo":
+                message["photo"] = [{
+                    "file_id": file_id, "file_unique_id": stored["file_unique_id"],
+                    "file_size": stored["file_size"], "width": 1, "height": 1,
+                }]
+            else:
+                message["document"] = dict(stored)
+            record: dict = {
+                "token": token, "chat_id": chat_id, kind: file_id, "uploaded": content is not None,
+                "caption": caption, "time": time.time(),
+            }
+            self.sent.append(record)
+            if self.record is not None:
+                self.record.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.record.flush()
+        return message
+
+    def fault(self) -> Optional[Tuple[int, dict]]:
+        """
+        The fault function defines a class method. Sleeps for the configured latency and decides whether
+        the current request should fail. Returns the HTTP status and the response body of the injected error
+        or None if the request should be processed.
+        """
+        delay: float = self.latency + self.random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        roll: float = self.random.random()
+        if roll < self.error_429_rate:
+            self.stats["429"] += 1
+            return 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+        if roll < self.error_429_rate + self.error_5xx_rate:
+            self.stats["5xx"] += 1
+            return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+        return None
+
+    def _message(self, chat_id: int, text: Optional[str], is_bot: bool) -> dict:
+        """
+        The _message function defines a class method. Builds a message object in the format of the telegram API.
+        Must be called with the lock held.
+        """
+        message: dict = {
+            "message_id": self._next_message_id,
+            "date": int(time.time()),
+            "text": text,
+            "from": {"id": 0 if is_bot else chat_id, "is_bot": is_bot, "first_name": "emulator", "username": None},
+            "chat": {"id": chat_id, "first_name": "emulator", "username": None, "type": "private"},
+        }
+        self._next_message_id += 1
+        return message
+
+    def _start_generator(self) -> None:
+        """
+        The _start_generator function defines a class method. Starts the background thread generating incoming
+        updates if a non-zero update rate is configured.
+        """
+        if self.update_rate > 0 and self._generator is None:
+            self._generator = threading.Thread(target=self._generate, daemon=True)
+            self._generator.start()
+
+    def _generate(self) -> None:
+        """
+        The _generate function defines a class method. Pushes incoming messages from random emulated chats
+        at the configured rate until the emulator is stopped.
+        """
+        interval: float = 1 / self.update_rate
+        next_at: float = time.monotonic()
+        while not self._stopped.is_set():
+            chat_id: int = self.random.randint(1, self.chats)
+            self.push_update(chat_id=chat_id, text=f"message {self._next_update_id}")
+            next_at += interval
+            self._stopped.wait(max(0.0, next_at - time.monotonic()))
+
+    def _make_handler(self) -> type:
+        """
+        The _make_handler function defines a class method. Returns the request handler class bound
+        to the current emulator instance.
+        """
+        emulator: TgEmulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """
+            The Handler class inherits from the BaseHTTPRequestHandler class and dispatches HTTP requests
+            to the methods of the emulator. Connections are kept alive between the requests like by the telegram API.
+            """
+            protocol_version: str = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                self.dispatch()
+
+            def do_POST(self) -> None:
+                self.dispatch()
+
+            def dispatch(self) -> None:
+                """
+                The dispatch function defines a class method. Parses the bot token, the method name and
+                the parameters of the request and writes the JSON response.
+                """
+                url = urlparse(self.path)
+                params: Dict[str, List[str]] = parse_qs(url.query)
+                length: int = int(self.headers.get("Content-Length") or 0)
+                content_type: str = self.headers.get("Content-Type", "")
+                body: bytes = self.rfile.read(length) if length else b""
+                files: Dict[str, Tuple[bytes, Optional[str], Optional[str]]] = {}
+                if content_type.startswith("application/x-www-form-urlencoded"):
+                    params.update(parse_qs(body.decode()))
+                elif content_type.startswith("multipart/form-data"):
+                    header: bytes = f"Content-Type: {content_type}\r\n\r\n".encode()
+                    form = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(header + body)
+                    for part in form.iter_parts():
+                        name: str = part.get_param("name", header="content-disposition")
+                        content: bytes = part.get_payload(decode=True)
+                        if part.get_filename() is not None:
+                            files[name] = (content, part.get_filename(), part.get_content_type())
+                        else:
+                            params[name] = [content.decode()]
+                query: Dict[str, str] = {key: values[-1] for key, values in params.items()}
+
+                if url.path == "/emulator/sent":
+                    return self.reply(200, {"ok": True, "result": emulator.sent, "stats": emulator.stats})
+
+                parts: List[str] = url.path.strip("/").split("/")
+                if len(parts) != 2 or not parts[0].startswith("bot"):
+                    return self.reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+                token, method = parts[0][3:], parts[1]
+                if method not in ("getUpdates", "sendMessage", "sendDocument", "sendPhoto"):
+                    return self.reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+
+                emulator.stats[method] += 1
+                fault: Optional[Tuple[int, dict]] = emulator.fault()
+                if fault is not None:
+                    return self.reply(*fault)
+
+                try:
+                    if method == "getUpdates":
+                        allowed: Optional[str] = query.get("allowed_updates")
+                        result = emulator.get_updates(
+                            offset=int(query.get("offset", 0)),
+                            timeout=float(query.get("timeout", 0)),
+                            limit=int(query.get("limit", 100)),
+                            allowed_updates=json.loads(allowed) if allowed is not None else None,
+                        )
+                    elif method == "sendMessage":
+                        result = emulator.send_message(token, int(query["chat_id"]), query["text"])
+                    else:
+                        kind: str = "photo" if method == "sendPhoto" else "document"
+                        upload, file_name, mime_type = files.get(kind, (None, None, None))
+                        result = emulator.send_file(
+                            token, int(query["chat_id"]), kind, file_id=query.get(kind), content=upload,
+                            file_name=file_name, mime_type=mime_type, caption=query.get("caption"),
+                        )
+                except (KeyError, ValueError) as error:
+                    return self.reply(400, {"ok": False, "error_code": 400, "description": f"Bad Request: {error}"})
+                self.reply(200, {"ok": True, "result": result})
+
+            def reply(self, status: int, body: dict) -> None:
+                """
+                The reply function defines a class method. Writes the response with the given HTTP status
+                and JSON body.
+                """
+                data: bytes = json.dumps(body, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting, e.g. its read timeout expired during the injected latency.
+                    pass
+
+            def log_message(self, format: str, *args) -> None:
+                """
+                The log_message function overrides the method of the parent class and disables request logging.
+                """
+
+        return Handler
@@ -0,0 +1,52 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class RateLimiter:
+    """
+    The RateLimiter class implements a thread-safe token bucket. Is shared by all clients of the same bot
+    in the process, so the outgoing requests of a bot stay within its rate limit.
+    """
+    def __init__(self, rate: float, burst: float = 1.0) -> None:
+        """
+        The __init__ function is called when creating an instance of the RateLimiter class. Accepts as parameters
+        the allowed number of requests per second and the number of requests allowed in a burst.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens: float = self.burst
+        self._updated: float = time.monotonic()
+        self._lock: threading.Lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        The acquire function defines a class method. Takes a token from the bucket, sleeping until one
+        is available. Returns the time spent waiting in seconds.
+        """
+        with self._lock:
+            now: float = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait: float = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_limiters: Dict[str, Tuple[float, RateLimiter]] = {}
+_lock: threading.Lock = threading.Lock()
+
+
+def limiter_for(token: str, rate: float) -> RateLimiter:
+    """
+    The limiter_for function accepts the bot token and the allowed number of requests per second. Returns
+    the rate limiter shared by all clients of the bot, replacing it if the rate has changed.
+    """
+    with _lock:
+        entry = _limiters.get(token)
+        if entry is None or entry[0] != rate:
+            entry = (rate, RateLimiter(rate, burst=rate))
+            _limiters[token] = entry
+        return entry[1]
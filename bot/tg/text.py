@@ -0,0 +1,10 @@
+# The maximum length of the text of a telegram message in UTF-16 code units.
+TEXT_LIMIT: int = 4096
+
+
+def text_length(text: str) -> int:
+    """
+    The text_length function accepts a text. Returns its length in UTF-16 code units, in which the telegram API
+    measures the texts of the messages.
+    """
+    return len(text.encode("utf-16-le", "surrogatepass")) // 2
@@ -0,0 +1,110 @@
+import hashlib
+import mimetypes
+import mmap
+import os
+import uuid
+from typing import Dict, Iterator, Optional
+
+CHUNK_SIZE: int = 64 * 1024
+
+
+class InputFile:
+    """
+    The InputFile class describes a file on disk to be uploaded to the telegram API. The content is never loaded
+    into memory as a whole: it is read in chunks through a read-only memory map of the file.
+    """
+    def __init__(self, path: str, file_name: Optional[str] = None, mime_type: Optional[str] = None) -> None:
+        """
+        The __init__ function is called when creating an instance of the InputFile class. Accepts as parameters
+        the path of the file, the file name shown to the recipient and the MIME type of the content, by default
+        guessed from the file name.
+        """
+        self.path = os.fspath(path)
+        self.file_name = file_name or os.path.basename(self.path)
+        self.mime_type = mime_type or mimetypes.guess_type(self.file_name)[0] or "application/octet-stream"
+        self.size: int = os.path.getsize(self.path)
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        The chunks function defines a class method. Accepts the size of a chunk in bytes. Yields the content
+        of the file in chunks read from a memory map, so only one chunk at a time is copied into the process.
+        """
+        if not self.size:
+            return
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, len(mapped), chunk_size):
+                yield mapped[offset:offset + chunk_size]
+
+    def digest(self) -> str:
+        """
+        The digest function defines a class method. Returns the SHA-256 hash of the content of the file
+        as a hex string. Identical files have the same digest regardless of their names.
+        """
+        digest = hashlib.sha256()
+        for chunk in self.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+class MultipartStream:
+    """
+    The MultipartStream class is a multipart/form-data request body with a single file part. It is passed
+    to requests as an iterable with a known length, so the body is sent in chunks with a Content-Length header
+    instead of being assembled in memory.
+    """
+    def __init__(self, fields: Dict[str, str], name: str, file: InputFile, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        The __init__ function is called when creating an instance of the MultipartStream class. Accepts as
+        parameters the plain form fields, the name of the file field, the uploaded file and the size of the chunks.
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.boundary: str = uuid.uuid4().hex
+        head: bytes = b"".join(
+            self._part_header(f'name="{key}"') + str(value).encode() + b"\r\n" for key, value in fields.items()
+        )
+        self.head: bytes = head + self._part_header(
+            f'name="{name}"; filename="{self._quote(file.file_name)}"', file.mime_type
+        )
+        self.tail: bytes = f"\r\n--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_type(self) -> str:
+        """
+        The content_type function defines the property method of the class. Returns the value
+        of the Content-Type header of the request.
+        """
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        """
+        The __len__ function returns the total size of the body in bytes, which requests uses
+        as the Content-Length header.
+        """
+        return len(self.head) + self.file.size + len(self.tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        The __iter__ function yields the body of the request: the form fields and the header of the file part,
+        the content of the file in chunks and the closing boundary.
+        """
+        yield self.head
+        yield from self.file.chunks(self.chunk_size)
+        yield self.tail
+
+    def _part_header(self, disposition: str, content_type: Optional[str] = None) -> bytes:
+        """
+        The _part_header function defines a class method. Returns the boundary and the headers of a part.
+        """
+        header: str = f"--{self.boundary}\r\nContent-Disposition: form-data; {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode()
+
+    @staticmethod
+    def _quote(value: str) -> str:
+        """
+        The _quote function defines a static method of the class. Escapes a value placed in a quoted
+        header parameter.
+        """
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r", "").replace("\n", "")
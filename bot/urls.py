@@ -1,7 +1,8 @@
 from django.urls import path
 
-from bot.views import VerificationView
+from bot.views import BreakerStateView, VerificationView
 
 urlpatterns = [
     path('verify/', VerificationView.as_view(), name='Bot_verify'),
+    path('breakers/', BreakerStateView.as_view(), name='Bot_breakers'),
 ]
\ No newline at end of file
@@ -1,13 +1,18 @@
+import logging
 from typing import List
 from rest_framework.generics import GenericAPIView
-from rest_framework.permissions import IsAuthenticated, BasePermission
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, BasePermission
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 
 from bot.models import TgUser
 from bot.serializers import TgUserSerializer
-from bot.tg.client import TgClient
+from bot.tg.breaker import TgUnavailableError, snapshots
+from messanger.models import SentMessage
+from test_task.db_router import shards
+
+logger = logging.getLogger(__name__)
 
 
 class VerificationView(GenericAPIView):
@@ -18,18 +23,45 @@ class VerificationView(GenericAPIView):
     """
     permission_classes: List[BasePermission] = [IsAuthenticated]
     serializer_class = TgUserSerializer
+    throttle_scope: str = "verify"
 
     def patch(self, request: Request, *args, **kwargs) -> Response:
         """
         The patch function overrides the method of the parent class. Accepts the request object as parameters,
         as well as other positional and named arguments. Validates the data contained in the request object.
         Sets the current user as the value of the user field. Sends a message to the user about successful verification.
+        The chat is linked even if the telegram API is unavailable, only the notification is skipped then.
         Returns a Response object.
         """
-        serializer: ModelSerializer = TgUserSerializer(data=request.data)
+        serializer: ModelSerializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         tg_user: TgUser = serializer.save(user=request.user)
 
-        TgClient().send_message(chat_id=tg_user.chat_id, text='Bot token verified')
+        try:
+            tg_user.get_client().send_message(chat_id=tg_user.chat_id, text='Bot token verified')
+        except TgUnavailableError as error:
+            logger.warning('Verification of chat %s is not confirmed: %s', tg_user.chat_id, error)
 
         return Response(serializer.data)
+
+
+class BreakerStateView(GenericAPIView):
+    """
+    The BreakerStateView class inherits from the GenericAPIView class from the rest_framework.generics
+    module and is a class-based view for monitoring the availability of the telegram API at the address
+    '/bot/breakers/'. Is available to staff users only.
+    """
+    permission_classes: List[BasePermission] = [IsAdminUser]
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        """
+        The get function defines a class method. Accepts the request object as parameters, as well as other
+        positional and named arguments. Returns the states of the circuit breakers of the current process
+        and the number of messages waiting for deferred delivery.
+        """
+        return Response({
+            "breakers": snapshots(),
+            "deferred": sum(
+                SentMessage.objects.using(shard).filter(status=SentMessage.DEFERRED).count() for shard in shards()
+            ),
+        })
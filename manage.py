@@ -3,9 +3,14 @@
 import os
 import sys
 
+# Long-running bot and worker commands boot with the lean settings profile.
+WORKER_COMMANDS = {'runbot', 'runscheduler', 'deliverdeferred', 'tgemulator', 'startuptime'}
+
 
 def main():
     """Run administrative tasks."""
+    if len(sys.argv) > 1 and sys.argv[1] in WORKER_COMMANDS:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_task.settings_bot')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_task.settings')
     try:
         from django.core.management import execute_from_command_line
@@ -1,5 +1,115 @@
+from typing import Iterator, List, Optional, Tuple
+
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.urls import reverse
+from django.utils.html import format_html
 
 from messanger.models import SentMessage
+from test_task.db_router import PRIMARY, shards
+from test_task.paginator import EstimatedCountPaginator
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """
+    The ShardListFilter class inherits from the SimpleListFilter class. Selects the shard the changelist
+    of the messages is read from, the primary database by default.
+    """
+    title: str = "Шард"
+    parameter_name: str = "shard"
+
+    def lookups(self, request: HttpRequest, model_admin: admin.ModelAdmin) -> List[Tuple[str, str]]:
+        """
+        The lookups function overrides the method of the parent class. Returns the aliases of the shards.
+        """
+        return [(alias, alias) for alias in shards()]
+
+    def choices(self, changelist) -> Iterator[dict]:
+        """
+        The choices function overrides the method of the parent class. Yields the shards without the choice
+        of all of them, which the changelist cannot query at once.
+        """
+        current: str = self.value() or PRIMARY
+        for alias, title in self.lookup_choices:
+            yield {
+                "selected": current == alias,
+                "query_string": changelist.get_query_string({self.parameter_name: alias}),
+                "display": title,
+            }
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet) -> QuerySet:
+        """
+        The queryset function overrides the method of the parent class. Returns the messages of the selected shard,
+        loading their owners and bots from the primary database with separate queries.
+        """
+        shard: Optional[str] = self.value()
+        if shard not in shards() or shard == PRIMARY:
+            return queryset
+        return queryset.using(shard).prefetch_related("owner", "bot")
+
+
+class SentMessageAdmin(admin.ModelAdmin):
+    """
+    The SentMessageAdmin class inherits from the ModelAdmin class. Defines the output of the sent messages
+    to the administration panel. The changelist shows an estimated number of messages, loads the owners and bots
+    with the messages in one query and filters by the indexed owner, date and status columns. The changelist lists
+    the messages of one shard at a time, the primary database unless another one is chosen in the shard filter;
+    a message is opened and changed on whichever shard holds it.
+    """
+    list_display: Tuple[str, ...] = ("id", "owner_link", "created", "status", "bot")
+    list_filter: Tuple = ("status", ("created", admin.DateFieldListFilter))
+    list_select_related: Tuple[str, ...] = ("owner", "bot")
+    autocomplete_fields: Tuple[str, ...] = ("owner",)
+    readonly_fields: Tuple[str, ...] = ("created",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+    def get_list_filter(self, request: HttpRequest) -> Tuple:
+        """
+        The get_list_filter function overrides the method of the parent class. Adds the shard filter
+        if the messages are sharded.
+        """
+        if len(shards()) == 1:
+            return self.list_filter
+        return (ShardListFilter,) + self.list_filter
+
+    def get_list_select_related(self, request: HttpRequest) -> Tuple[str, ...]:
+        """
+        The get_list_select_related function overrides the method of the parent class. Does not join the owners
+        and bots, which are stored on the primary database only, to the messages of another shard.
+        """
+        if request.GET.get(ShardListFilter.parameter_name, PRIMARY) != PRIMARY:
+            return ()
+        return self.list_select_related
+
+    def get_object(
+        self, request: HttpRequest, object_id: str, from_field: Optional[str] = None
+    ) -> Optional[SentMessage]:
+        """
+        The get_object function overrides the method of the parent class. Returns the message with the given id
+        from the first shard holding it or None.
+        """
+        message: Optional[SentMessage] = super().get_object(request, object_id, from_field)
+        if message is not None:
+            return message
+        field = SentMessage._meta.get_field(from_field) if from_field else SentMessage._meta.pk
+        for shard in shards()[1:]:
+            try:
+                return self.get_queryset(request).using(shard).get(**{field.name: field.to_python(object_id)})
+            except (SentMessage.DoesNotExist, ValidationError, ValueError):
+                continue
+        return None
+
+    @admin.display(description="Владелец сообщения", ordering="owner")
+    def owner_link(self, message: SentMessage) -> str:
+        """
+        The owner_link function defines a class method. Accepts the message and returns a link to the changelist
+        filtered by the owner of the message.
+        """
+        url: str = reverse("admin:messanger_sentmessage_changelist")
+        return format_html('<a href="{}?owner__id__exact={}">{}</a>', url, message.owner_id, message.owner)
+
 
-admin.site.register(SentMessage)
+admin.site.register(SentMessage, SentMessageAdmin)
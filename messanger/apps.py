@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class MessangerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "messanger"
+
+    def ready(self) -> None:
+        """
+        The ready function overrides the method of the parent class. Connects the signals updating
+        the message statistics and maintaining the message shards and registers the system checks.
+        """
+        from django.db.models.signals import post_migrate
+
+        from messanger import checks, signals  # noqa: F401
+
+        post_migrate.connect(signals.reserve_ids, sender=self)
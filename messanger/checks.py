@@ -0,0 +1,23 @@
+from typing import List
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_coalesce_window(app_configs=None, **kwargs) -> List[Error]:
+    """
+    The check_coalesce_window function accepts the checked app configs and any named arguments. Returns an error
+    if the SCHEDULER_LOOKAHEAD setting is not below the MESSAGE_COALESCE_WINDOW setting: the scheduler claims
+    the held messages SCHEDULER_LOOKAHEAD seconds before they are due, and the following messages of the chat
+    only join them while they are not claimed.
+    """
+    if settings.SCHEDULER_LOOKAHEAD < settings.MESSAGE_COALESCE_WINDOW:
+        return []
+    return [
+        Error(
+            "SCHEDULER_LOOKAHEAD must be less than MESSAGE_COALESCE_WINDOW.",
+            hint="Messages held for coalescing are claimed before any following message can join them.",
+            id="messanger.E001",
+        )
+    ]
@@ -0,0 +1,148 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from bot.files import send_attachment
+from bot.models import TgUser
+from bot.tg.text import TEXT_LIMIT, text_length
+from messanger.models import SentMessage
+
+# The boundaries a long text is split at in the order of preference.
+SEPARATORS: Tuple[str, ...] = ("\n\n", "\n", " ")
+
+
+def deliver(message: SentMessage, tg_user: TgUser, file_name: Optional[str] = None) -> None:
+    """
+    The deliver function accepts the message, the telegram user it is delivered to and the original name
+    of the attachment, by default the name of the stored file. Sends the text of the message, split into parts
+    if it is too long for one telegram message, and its attachment to the chat and marks the message as delivered.
+    Raises a TgUnavailableError exception if the telegram API is unavailable. The ids of the parts sent before
+    are kept in the message in this case, so the next attempt sends only the remaining parts once it is saved.
+    """
+    text: str = f"{message.owner.username}, я получил от тебя сообщение: \n {message.content}"
+    parts: List[str] = split_text(text)
+    sent: List[int] = list(message.tg_message_ids)
+    for response in tg_user.get_client().send_messages(tg_user.chat_id, parts[len(sent):]):
+        sent.append(response.result.message_id)
+        message.tg_message_id, message.tg_message_ids = sent[0], sent
+    if message.attachment:
+        send_attachment(
+            tg_user, message.attachment.path, file_name=file_name or os.path.basename(message.attachment.name)
+        )
+    mark(message, SentMessage.DELIVERED)
+
+
+def deliver_coalesced(messages: List[SentMessage], tg_user: TgUser) -> None:
+    """
+    The deliver_coalesced function accepts the messages of a chat without attachments and the telegram user
+    they are delivered to. Sends their texts after a single header as one telegram message, which must fit
+    in TEXT_LIMIT characters, and marks every message as delivered with the id of that telegram message.
+    Raises a TgUnavailableError exception if the telegram API is unavailable, the messages are left unchanged
+    in this case.
+    """
+    if len(messages) == 1:
+        deliver(messages[0], tg_user)
+        return
+    response = tg_user.get_client().send_message(chat_id=tg_user.chat_id, text=coalesced_text(messages))
+    for message in messages:
+        message.tg_message_id, message.tg_message_ids = response.result.message_id, [response.result.message_id]
+        mark(message, SentMessage.DELIVERED)
+
+
+def coalesced_text(messages: List[SentMessage]) -> str:
+    """
+    The coalesced_text function accepts the messages of a user. Returns the text of the telegram message
+    containing their texts in order after a single header.
+    """
+    contents: str = "\n\n".join(message.content for message in messages)
+    return f"{messages[0].owner.username}, я получил от тебя сообщения: \n {contents}"
+
+
+def coalesce(messages: List[SentMessage]) -> List[List[SentMessage]]:
+    """
+    The coalesce function accepts the due messages of a chat in the order of sending. Returns them split
+    into groups delivered as one telegram message each: consecutive messages without attachments are grouped
+    while their coalesced text fits in TEXT_LIMIT code units, the other messages are delivered on their own.
+    """
+    groups: List[List[SentMessage]] = []
+    current: List[SentMessage] = []
+    for message in messages:
+        if message.attachment:
+            if current:
+                groups.append(current)
+                current = []
+            groups.append([message])
+        elif current and text_length(coalesced_text(current + [message])) > TEXT_LIMIT:
+            groups.append(current)
+            current = [message]
+        else:
+            current.append(message)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def split_text(text: str, limit: int = TEXT_LIMIT) -> List[str]:
+    """
+    The split_text function accepts a text and the maximum length of a part in UTF-16 code units, at least two.
+    Returns the text split into parts in order. A part ends at the last paragraph, line or word boundary in its
+    second half, which is dropped, or else exactly at the limit, never inside a character.
+    """
+    parts: List[str] = []
+    start: int = 0
+    while True:
+        end: int = min(len(text), start + limit)
+        excess: int = text_length(text[start:end]) - limit
+        while excess > 0:
+            # A character outside the basic plane takes two code units, so half of the excess in characters
+            # is dropped at a time and one character is added back if it still fits.
+            end -= (excess + 1) // 2
+            excess = text_length(text[start:end]) - limit
+        if excess < 0 and end < len(text) and text_length(text[start:end + 1]) <= limit:
+            end += 1
+        if end == len(text):
+            parts.append(text[start:])
+            return parts
+        cut, skip = end, 0
+        for separator in SEPARATORS:
+            position: int = text.rfind(separator, start, end)
+            if position > start + (end - start) // 2:
+                cut, skip = position, len(separator)
+                break
+        parts.append(text[start:cut])
+        start = cut + skip
+
+
+def coalesce_slot(message: SentMessage) -> datetime:
+    """
+    The coalesce_slot function accepts a new message without attachments to a chat with coalescing enabled.
+    Returns the time it is sent at: the time of the messages of the same chat already held for sending within
+    the MESSAGE_COALESCE_WINDOW setting and not claimed by the scheduler yet, so they are delivered together,
+    or the end of a new window. The held messages stay unclaimed for the window minus the SCHEDULER_LOOKAHEAD
+    setting, which the messanger.E001 check keeps positive.
+    """
+    now: datetime = timezone.now()
+    held: Optional[datetime] = (
+        SentMessage.objects.using(message._state.db)
+        .filter(
+            Q(attachment="") | Q(attachment__isnull=True),
+            owner_id=message.owner_id, bot_id=message.bot_id, status=SentMessage.SCHEDULED,
+            send_at__gt=now, send_at__lte=now + timedelta(seconds=settings.MESSAGE_COALESCE_WINDOW),
+        )
+        .exclude(pk=message.pk)
+        .aggregate(send_at=Max("send_at"))["send_at"]
+    )
+    return held or now + timedelta(seconds=settings.MESSAGE_COALESCE_WINDOW)
+
+
+def mark(message: SentMessage, status: str) -> None:
+    """
+    The mark function accepts the message and its new delivery status and stores the status
+    and the ids of the delivered telegram messages.
+    """
+    message.status = status
+    message.save(update_fields=["status", "tg_message_id", "tg_message_ids"])
@@ -0,0 +1,113 @@
+import hashlib
+import json
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from messanger.models import IdempotencyKey
+
+HEADER: str = "Idempotency-Key"
+
+
+def fingerprint(request: Request) -> str:
+    """
+    The fingerprint function accepts the request object. Returns the hash of the request path and data,
+    with uploaded files represented by their name and size, used to detect a key reused for another request.
+    """
+    if hasattr(request.data, "lists"):
+        items = request.data.lists()
+    else:
+        items = ((key, [value]) for key, value in request.data.items())
+    data: dict = {
+        key: [f"{value.name}:{value.size}" if isinstance(value, UploadedFile) else value for value in values]
+        for key, values in items
+    }
+    payload: str = json.dumps([request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def purge_expired() -> int:
+    """
+    The purge_expired function does not accept any parameters. Deletes the idempotency keys older than
+    the IDEMPOTENCY_KEY_TTL setting. Returns the number of deleted keys.
+    """
+    expired = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created__lt=expired).delete()
+    return deleted
+
+
+class IdempotentCreateMixin:
+    """
+    The IdempotentCreateMixin class is a mixin for the create views of the rest_framework. A POST request with
+    an Idempotency-Key header is executed once per user and key within the IDEMPOTENCY_KEY_TTL setting; its retries
+    receive the stored response. The key is claimed by inserting a row under a unique constraint, so of concurrent
+    duplicates only one request is executed and the others receive 409 Conflict until it completes.
+    """
+    def create(self, request: Request, *args, **kwargs) -> Response:
+        """
+        The create function overrides the method of the parent class. Accepts the request object and any positional
+        and named arguments. Claims the idempotency key, creates the object and stores the response. Returns
+        the stored response of a completed request with the same key.
+        """
+        key: Optional[str] = request.headers.get(HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{HEADER} must not exceed 255 characters."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_fingerprint: str = fingerprint(request)
+        record: IdempotencyKey = self.claim_key(request, key, request_fingerprint)
+        if record.fingerprint != request_fingerprint:
+            return Response(
+                {"detail": f"{HEADER} has already been used for another request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if record.status_code is not None:
+            return Response(record.response, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+        if not getattr(record, "claimed", False):
+            return Response(
+                {"detail": f"A request with this {HEADER} is still in progress."},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": "1"},
+            )
+
+        try:
+            response: Response = super().create(request, *args, **kwargs)
+        except Exception:
+            # A failed request may be retried with the same key.
+            record.delete()
+            raise
+        record.status_code = response.status_code
+        record.response = response.data
+        record.save(update_fields=["status_code", "response"])
+        return response
+
+    @staticmethod
+    def claim_key(request: Request, key: str, request_fingerprint: str) -> IdempotencyKey:
+        """
+        The claim_key function defines a static method of the class. Accepts the request object, the key and
+        the fingerprint of the request. Inserts the key of the user, replacing an expired one. Returns the new record
+        with the 'claimed' attribute set, or the existing record if the key is already taken.
+        """
+        expired = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        IdempotencyKey.objects.filter(owner=request.user, key=key, created__lt=expired).delete()
+        try:
+            with transaction.atomic():
+                record: IdempotencyKey = IdempotencyKey.objects.create(
+                    owner=request.user, key=key, fingerprint=request_fingerprint
+                )
+        except IntegrityError:
+            # The key is taken; if its request has just failed and released it, report it as in progress.
+            existing: Optional[IdempotencyKey] = IdempotencyKey.objects.filter(owner=request.user, key=key).first()
+            return existing or IdempotencyKey(owner=request.user, key=key, fingerprint=request_fingerprint)
+        record.claimed = True
+        return record
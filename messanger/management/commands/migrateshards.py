@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand, CommandParser, call_command
+
+from test_task.db_router import shards
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to apply the migrations to the primary database and every message shard, which only receive the tables
+    of the sharded models.
+    """
+    help = 'The migrateshards command applies the migrations to the primary database and all message shards.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Adds the optional alias
+        of a single shard to migrate.
+        """
+        parser.add_argument('--shard', choices=shards(), help='Migrate this shard only.')
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Runs the migrate command
+        for each shard; the id range of a shard is reserved after its migrations.
+        """
+        for shard in [options['shard']] if options['shard'] else shards():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Migrating {shard}'))
+            call_command('migrate', database=shard, interactive=False, verbosity=options['verbosity'])
@@ -0,0 +1,50 @@
+from typing import Iterable
+
+from django.core.management import BaseCommand, CommandError, CommandParser
+
+from messanger.sharding import move_user, placement
+from test_task.db_router import shards, user_shard
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to move the messages of users between the message shards: of the given users to the given shard, or with
+    --rebalance of every user not on the shard the placement assigns with the current list of shards, e.g. after
+    a shard was added. A moved user keeps working; the requests of the user started before the switch are given
+    the --grace period to finish before the remaining messages are moved from the old shard.
+    """
+    help = 'The movemessages command moves the messages of users between the message shards.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        The add_arguments function overrides the method of the parent class. Adds the options selecting
+        the users and the target shard.
+        """
+        parser.add_argument('--user', type=int, action='append', default=[], dest='users', help='Id of a user.')
+        parser.add_argument('--to', choices=shards(), help='Alias of the target shard of the given users.')
+        parser.add_argument('--rebalance', action='store_true', help='Move every user to the shard of its placement.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Messages copied at a time.')
+        parser.add_argument('--grace', type=float, default=5.0, help='Seconds to wait after switching a user.')
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Moves the selected users
+        one by one; their message statistics stay on the primary database and do not change.
+        """
+        if options['rebalance'] == bool(options['users'] or options['to']):
+            raise CommandError('Pass either --user with --to or --rebalance')
+        if options['users'] and not options['to']:
+            raise CommandError('--to is required with --user')
+
+        users: Iterable[User] = User.objects.filter(pk__in=options['users']).order_by('pk')
+        if options['rebalance']:
+            users = User.objects.order_by('pk').iterator()
+        for user in users:
+            target: str = options['to'] or placement(user.pk)
+            source: str = user_shard(user)
+            if source == target:
+                continue
+            moved: int = move_user(user, target, batch_size=options['batch_size'], grace=options['grace'])
+            self.stdout.write(f'Moved {moved} messages of user {user.pk} from {source} to {target}')
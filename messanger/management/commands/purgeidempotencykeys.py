@@ -0,0 +1,18 @@
+from django.core.management import BaseCommand
+
+from messanger.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to be run periodically, e.g. from cron, to delete the expired idempotency keys.
+    """
+    help = 'The purgeidempotencykeys command deletes the idempotency keys older than IDEMPOTENCY_KEY_TTL.'
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Deletes the expired
+        idempotency keys and reports their number.
+        """
+        self.stdout.write(f'Deleted {purge_expired()} expired idempotency keys')
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from messanger.stats import rebuild
+
+
+class Command(BaseCommand):
+    """
+    The Command class inherits from the base Command class from the django.core.management module. Designed
+    to fill the message statistics from the existing messages once and to repair them, e.g. after messages were
+    imported with bulk queries that bypass the signals updating the statistics.
+    """
+    help = 'The rebuildmessagestats command recomputes the message statistics from the messages.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        The add_arguments function defines a class method. Adds the optional ids of the users
+        whose statistics are recomputed.
+        """
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Recompute this user only')
+
+    def handle(self, *args, **options) -> None:
+        """
+        The handle function defines a class method to be called when entering a command. Recomputes
+        the statistics user by user in short transactions and reports the number of hourly rows.
+        """
+        self.stdout.write(f'Created {rebuild(options["users"])} hourly statistics rows')
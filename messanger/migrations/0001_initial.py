@@ -5,6 +5,42 @@ from django.db import migrations, models
 import django.db.models.deletion
 
 
+def sent_message(db_constraint: bool) -> migrations.CreateModel:
+    """
+    The sent_message function accepts whether the owner is a foreign key constraint. Returns the operation
+    creating the SentMessage model.
+    """
+    return migrations.CreateModel(
+        name="SentMessage",
+        fields=[
+            (
+                "id",
+                models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name="ID",
+                ),
+            ),
+            ("created", models.DateTimeField(verbose_name="Дата создания")),
+            ("content", models.TextField(verbose_name="текст сообщения")),
+            (
+                "owner",
+                models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to=settings.AUTH_USER_MODEL,
+                    db_constraint=db_constraint,
+                    verbose_name="Владелец сообщения",
+                ),
+            ),
+        ],
+        options={
+            "verbose_name": "Сообщение",
+            "verbose_name_plural": "Сообщения",
+        },
+    )
+
+
 class Migration(migrations.Migration):
 
     initial = True
@@ -13,33 +49,11 @@ class Migration(migrations.Migration):
         migrations.swappable_dependency(settings.AUTH_USER_MODEL),
     ]
 
+    # The shards hold the messages without the users, so the table is created without the foreign key constraint
+    # the state keeps until 0009_sentmessage_sharding, which drops it from the databases migrated before.
     operations = [
-        migrations.CreateModel(
-            name="SentMessage",
-            fields=[
-                (
-                    "id",
-                    models.BigAutoField(
-                        auto_created=True,
-                        primary_key=True,
-                        serialize=False,
-                        verbose_name="ID",
-                    ),
-                ),
-                ("created", models.DateTimeField(verbose_name="Дата создания")),
-                ("content", models.TextField(verbose_name="текст сообщения")),
-                (
-                    "owner",
-                    models.ForeignKey(
-                        on_delete=django.db.models.deletion.CASCADE,
-                        to=settings.AUTH_USER_MODEL,
-                        verbose_name="Владелец сообщения",
-                    ),
-                ),
-            ],
-            options={
-                "verbose_name": "Сообщение",
-                "verbose_name_plural": "Сообщения",
-            },
+        migrations.SeparateDatabaseAndState(
+            state_operations=[sent_message(db_constraint=True)],
+            database_operations=[sent_message(db_constraint=False)],
         ),
     ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 10:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_bot(db_constraint: bool) -> migrations.AddField:
+    """
+    The add_bot function accepts whether the bot is a foreign key constraint. Returns the operation adding the bot
+    to the SentMessage model.
+    """
+    return migrations.AddField(
+        model_name='sentmessage',
+        name='bot',
+        field=models.ForeignKey(blank=True, db_constraint=db_constraint, help_text='Бот, через который доставляется сообщение; по умолчанию основной бот', null=True, on_delete=django.db.models.deletion.SET_NULL, to='bot.bot', verbose_name='Бот'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_multi_bot'),
+        ('messanger', '0001_initial'),
+    ]
+
+    # The column is added without the foreign key constraint for the shards, see 0001_initial.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[add_bot(db_constraint=True)],
+            database_operations=[add_bot(db_constraint=False)],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0002_sentmessage_bot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sentmessage',
+            name='attachment',
+            field=models.FileField(blank=True, help_text='Файл, отправляемый в telegram вместе с сообщением', null=True, upload_to='attachments/%Y/%m/%d/', verbose_name='Вложение'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-19 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0003_sentmessage_attachment'),
+    ]
+
+    # Messages stored before the field existed were sent synchronously, so they are marked as delivered.
+    operations = [
+        migrations.AddField(
+            model_name='sentmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Отправляется'), ('delivered', 'Доставлено'), ('deferred', 'Отложено'), ('failed', 'Не доставлено')], db_index=True, default='delivered', help_text='Сообщения, не доставленные из-за недоступности telegram, отправляет команда deliverdeferred', max_length=20, verbose_name='Статус доставки'),
+        ),
+        migrations.AlterField(
+            model_name='sentmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Отправляется'), ('delivered', 'Доставлено'), ('deferred', 'Отложено'), ('failed', 'Не доставлено')], db_index=True, default='pending', help_text='Сообщения, не доставленные из-за недоступности telegram, отправляет команда deliverdeferred', max_length=20, verbose_name='Статус доставки'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-19 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0004_sentmessage_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sentmessage',
+            index=models.Index(fields=['owner', '-created'], name='sentmessage_owner_created'),
+        ),
+        migrations.AddIndex(
+            model_name='sentmessage',
+            index=models.Index(fields=['created'], name='sentmessage_created'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-19 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0005_sentmessage_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sentmessage',
+            name='send_at',
+            field=models.DateTimeField(blank=True, help_text='Запланированные сообщения доставляет команда runscheduler; по умолчанию сообщение отправляется сразу', null=True, verbose_name='Время отправки'),
+        ),
+        migrations.AlterField(
+            model_name='sentmessage',
+            name='status',
+            field=models.CharField(choices=[('scheduled', 'Запланировано'), ('pending', 'Отправляется'), ('delivered', 'Доставлено'), ('deferred', 'Отложено'), ('failed', 'Не доставлено')], db_index=True, default='pending', help_text='Сообщения, не доставленные из-за недоступности telegram, отправляет команда deliverdeferred', max_length=20, verbose_name='Статус доставки'),
+        ),
+        migrations.AddIndex(
+            model_name='sentmessage',
+            index=models.Index(condition=models.Q(('status', 'scheduled')), fields=['send_at'], name='sentmessage_due'),
+        ),
+    ]
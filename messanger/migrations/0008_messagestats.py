@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-19 10:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+        ('messanger', '0007_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserMessageStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='message_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('sent', models.IntegerField(default=0, verbose_name='Отправлено')),
+                ('delivered', models.IntegerField(default=0, verbose_name='Доставлено')),
+                ('failed', models.IntegerField(default=0, verbose_name='Не доставлено')),
+                ('last_activity', models.DateTimeField(blank=True, help_text='Время создания последнего сообщения, в том числе удалённого позже', null=True, verbose_name='Последнее сообщение')),
+            ],
+            options={
+                'verbose_name': 'Статистика сообщений пользователя',
+                'verbose_name_plural': 'Статистика сообщений пользователей',
+            },
+        ),
+        migrations.CreateModel(
+            name='MessageStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Час')),
+                ('sent', models.IntegerField(default=0, verbose_name='Отправлено')),
+                ('delivered', models.IntegerField(default=0, verbose_name='Доставлено')),
+                ('failed', models.IntegerField(default=0, verbose_name='Не доставлено')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Владелец сообщений')),
+            ],
+            options={
+                'verbose_name': 'Статистика сообщений за час',
+                'verbose_name_plural': 'Статистика сообщений по часам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='messagestats',
+            constraint=models.UniqueConstraint(fields=('owner', 'hour'), name='unique_messagestats_owner_hour'),
+        ),
+    ]
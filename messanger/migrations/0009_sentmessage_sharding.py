@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-19 11:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_tgfile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('messanger', '0008_messagestats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sentmessage',
+            name='bot',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Бот, через который доставляется сообщение; по умолчанию основной бот', null=True, on_delete=django.db.models.deletion.SET_NULL, to='bot.bot', verbose_name='Бот'),
+        ),
+        migrations.AlterField(
+            model_name='sentmessage',
+            name='owner',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Владелец сообщения'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0009_sentmessage_sharding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sentmessage',
+            name='tg_message_id',
+            field=models.BigIntegerField(blank=True, help_text='Объединённые сообщения доставляются одним сообщением telegram и имеют общий ID', null=True, verbose_name='ID сообщения в telegram'),
+        ),
+    ]
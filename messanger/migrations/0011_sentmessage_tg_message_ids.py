@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0010_sentmessage_tg_message_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sentmessage',
+            name='tg_message_ids',
+            field=models.JSONField(blank=True, default=list, help_text='Длинное сообщение доставляется несколькими сообщениями telegram по порядку', verbose_name='ID частей сообщения в telegram'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messanger', '0011_sentmessage_tg_message_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sentmessage',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='Когда команда runscheduler взяла сообщение на отправку; просроченные захваты возвращаются в расписание', null=True, verbose_name='Время захвата'),
+        ),
+        migrations.AddIndex(
+            model_name='sentmessage',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['claimed_at'], name='sentmessage_claimed'),
+        ),
+    ]
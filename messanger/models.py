@@ -1,16 +1,82 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
+from bot.models import Bot
+from test_task.db_router import user_shard
 from users.models import User
 
 
-class SentMessage(models.Model):
+class SentMessageQuerySet(models.QuerySet):
+    """
+    The SentMessageQuerySet class inherits from the QuerySet class from the django.db.models module.
+    Creates the messages on the shard of their owner unless a database is chosen with using().
     """
+    def create(self, **kwargs) -> "SentMessage":
+        """
+        The create function overrides the method of the parent class. Accepts the values of the fields
+        of the message. Creates the message on the shard of its owner. Returns the created message.
+        """
+        owner = kwargs.get("owner")
+        if self._db is None and owner is not None:
+            return super(SentMessageQuerySet, self.using(user_shard(owner))).create(**kwargs)
+        return super().create(**kwargs)
+
 
+class SentMessage(models.Model):
+    """
+    The SentMessage class inherits from the parent Model class from the django.db.models module. The messages
+    are stored on the shard of their owner, so the relations to the users and the bots have no database constraints.
     """
+    SCHEDULED: str = "scheduled"
+    PENDING: str = "pending"
+    DELIVERED: str = "delivered"
+    DEFERRED: str = "deferred"
+    FAILED: str = "failed"
+    STATUS_CHOICES = (
+        (SCHEDULED, "Запланировано"),
+        (PENDING, "Отправляется"),
+        (DELIVERED, "Доставлено"),
+        (DEFERRED, "Отложено"),
+        (FAILED, "Не доставлено"),
+    )
+
     created = models.DateTimeField(verbose_name="Дата создания")
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Владелец сообщения")
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False, verbose_name="Владелец сообщения"
+    )
     content = models.TextField(verbose_name="текст сообщения")
+    attachment = models.FileField(
+        upload_to="attachments/%Y/%m/%d/", null=True, blank=True, verbose_name="Вложение",
+        help_text="Файл, отправляемый в telegram вместе с сообщением",
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True, verbose_name="Статус доставки",
+        help_text="Сообщения, не доставленные из-за недоступности telegram, отправляет команда deliverdeferred",
+    )
+    send_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Время отправки",
+        help_text="Запланированные сообщения доставляет команда runscheduler; по умолчанию сообщение отправляется сразу",
+    )
+    bot = models.ForeignKey(
+        Bot, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False, verbose_name="Бот",
+        help_text="Бот, через который доставляется сообщение; по умолчанию основной бот",
+    )
+    claimed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Время захвата",
+        help_text="Когда команда runscheduler взяла сообщение на отправку; "
+                  "просроченные захваты возвращаются в расписание",
+    )
+    tg_message_id = models.BigIntegerField(
+        null=True, blank=True, verbose_name="ID сообщения в telegram",
+        help_text="Объединённые сообщения доставляются одним сообщением telegram и имеют общий ID",
+    )
+    tg_message_ids = models.JSONField(
+        default=list, blank=True, verbose_name="ID частей сообщения в telegram",
+        help_text="Длинное сообщение доставляется несколькими сообщениями telegram по порядку",
+    )
+
+    objects = SentMessageQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         """
@@ -25,8 +91,92 @@ class SentMessage(models.Model):
     class Meta:
         """
         The Meta class contains the common name of the model instance in the singular and plural used
-        in the administration panel.
+        in the administration panel and the indexes of the history of a user, of the filter by date, of the due
+        scheduled messages and of the claims of the scheduler.
         """
         verbose_name: str = "Сообщение"
         verbose_name_plural: str = "Сообщения"
+        indexes = [
+            models.Index(fields=["owner", "-created"], name="sentmessage_owner_created"),
+            models.Index(fields=["created"], name="sentmessage_created"),
+            models.Index(
+                fields=["send_at"], name="sentmessage_due", condition=models.Q(status="scheduled")
+            ),
+            models.Index(
+                fields=["claimed_at"], name="sentmessage_claimed", condition=models.Q(status="pending")
+            ),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    The IdempotencyKey class inherits from the parent Model class from the django.db.models module. Stores the result
+    of a request sent with an Idempotency-Key header, so a retry of the request returns the stored response instead
+    of creating another message. A record without a status code belongs to a request still in progress.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Владелец ключа")
+    key = models.CharField(max_length=255, verbose_name="Ключ")
+    fingerprint = models.CharField(max_length=64, verbose_name="Отпечаток запроса")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Код ответа")
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Ответ")
+    created = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата создания")
+
+    class Meta:
+        """
+        The Meta class contains the common name of the model instance and the constraint allowing a key
+        only once per user.
+        """
+        verbose_name: str = "Ключ идемпотентности"
+        verbose_name_plural: str = "Ключи идемпотентности"
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "key"], name="unique_idempotency_owner_key"),
+        ]
 
+
+class MessageStats(models.Model):
+    """
+    The MessageStats class inherits from the parent Model class from the django.db.models module. Contains the number
+    of messages of a user created during an hour and how many of them were delivered or failed. The rows are updated
+    by the signals of the SentMessage model, so the statistics are read without scanning the messages.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Владелец сообщений")
+    hour = models.DateTimeField(verbose_name="Час")
+    sent = models.IntegerField(default=0, verbose_name="Отправлено")
+    delivered = models.IntegerField(default=0, verbose_name="Доставлено")
+    failed = models.IntegerField(default=0, verbose_name="Не доставлено")
+
+    class Meta:
+        """
+        The Meta class contains the common name of the model instance and the constraint allowing one row
+        per user and hour.
+        """
+        verbose_name: str = "Статистика сообщений за час"
+        verbose_name_plural: str = "Статистика сообщений по часам"
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "hour"], name="unique_messagestats_owner_hour"),
+        ]
+
+
+class UserMessageStats(models.Model):
+    """
+    The UserMessageStats class inherits from the parent Model class from the django.db.models module. Contains
+    the totals of the messages of a user and the time of the last message, updated together with MessageStats.
+    """
+    owner = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="message_stats", verbose_name="Пользователь"
+    )
+    sent = models.IntegerField(default=0, verbose_name="Отправлено")
+    delivered = models.IntegerField(default=0, verbose_name="Доставлено")
+    failed = models.IntegerField(default=0, verbose_name="Не доставлено")
+    last_activity = models.DateTimeField(
+        null=True, blank=True, verbose_name="Последнее сообщение",
+        help_text="Время создания последнего сообщения, в том числе удалённого позже",
+    )
+
+    class Meta:
+        """
+        The Meta class contains the common name of the model instance in the singular and plural used
+        in the administration panel.
+        """
+        verbose_name: str = "Статистика сообщений пользователя"
+        verbose_name_plural: str = "Статистика сообщений пользователей"
@@ -1,9 +1,11 @@
 from typing import Tuple
 
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from rest_framework import serializers
 from django.db import models
 
-from messanger.models import SentMessage
+from messanger.models import SentMessage, UserMessageStats
 from users.serializers import UserSerializer
 
 
@@ -15,6 +17,17 @@ class SentMessageSerializer(serializers.ModelSerializer):
     """
     owner = UserSerializer(read_only=True)
 
+    def validate_attachment(self, value: UploadedFile) -> UploadedFile:
+        """
+        The validate_attachment function performs validation of the attached file. Rejects files larger
+        than the telegram bot API accepts for upload. Returns the file.
+        """
+        if value and value.size > settings.TG_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"The attachment must not exceed {settings.TG_UPLOAD_MAX_SIZE // (1024 * 1024)} MB"
+            )
+        return value
+
     class Meta:
         """
         The Meta class is an internal service class of the serializer,
@@ -22,4 +35,31 @@ class SentMessageSerializer(serializers.ModelSerializer):
         """
         model: models.Model = SentMessage
         fields: str = "__all__"
-        read_only_fields: Tuple[str, ...] = ("id", "created", "owner")
+        read_only_fields: Tuple[str, ...] = (
+            "id", "created", "owner", "status", "claimed_at", "tg_message_id", "tg_message_ids"
+        )
+
+
+class UserMessageStatsSerializer(serializers.ModelSerializer):
+    """
+    The UserMessageStatsSerializer class inherits from the ModelSerializer class from rest_framework.serializers.
+    This is a class for serialization of the message totals of a user.
+    """
+    class Meta:
+        """
+        The Meta class is an internal service class of the serializer,
+        defines the necessary parameters for the serializer to function.
+        """
+        model: models.Model = UserMessageStats
+        fields: Tuple[str, ...] = ("sent", "delivered", "failed", "last_activity")
+
+
+class MessageStatsPeriodSerializer(serializers.Serializer):
+    """
+    The MessageStatsPeriodSerializer class inherits from the Serializer class from rest_framework.serializers.
+    This is a class for serialization of the message counters of a user during an hour or a day.
+    """
+    period = serializers.ReadOnlyField()
+    sent = serializers.IntegerField()
+    delivered = serializers.IntegerField()
+    failed = serializers.IntegerField()
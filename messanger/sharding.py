@@ -0,0 +1,135 @@
+import time
+from typing import List
+
+from django.db import connections, transaction
+
+from messanger.models import SentMessage
+from test_task.db_router import PRIMARY, shards, user_shard
+from users.models import User
+
+# Every shard allocates the message ids from its own range of 2**48 ids, so the ids stay unique when messages
+# are moved between shards and remain exact in JavaScript clients for up to 32 shards.
+ID_RANGE_BITS: int = 48
+# The statuses of the messages the workers do not change any more.
+FINAL_STATUSES = (SentMessage.DELIVERED, SentMessage.FAILED)
+
+
+def placement(user_id: int) -> str:
+    """
+    The placement function accepts the id of a user. Returns the alias of the shard the user belongs to
+    with the current list of shards.
+    """
+    aliases: List[str] = shards()
+    return aliases[user_id % len(aliases)]
+
+
+def id_range_start(alias: str) -> int:
+    """
+    The id_range_start function accepts the alias of a shard. Returns the first message id of the shard:
+    zero for the primary database and N * 2**48 for the shard_N database.
+    """
+    if alias == PRIMARY:
+        return 0
+    return int(alias.rpartition("_")[2]) << ID_RANGE_BITS
+
+
+def reserve_id_range(alias: str) -> None:
+    """
+    The reserve_id_range function accepts the alias of a shard. Moves the id sequence of the messages
+    of the shard to the start of its range unless it is already past it.
+    """
+    start: int = id_range_start(alias)
+    if not start:
+        return
+    connection = connections[alias]
+    table: str = SentMessage._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false) "
+                f"WHERE (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)}) < %s",
+                [table, start, start],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s", [start - 1, table, start - 1]
+            )
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                [table, start - 1, table],
+            )
+
+
+def copy_messages(owner_id: int, source: str, target: str, batch_size: int) -> int:
+    """
+    The copy_messages function accepts the id of a user, the aliases of the source and the target shards
+    and the number of messages copied at a time. Copies the delivered and failed messages of the user, which
+    the workers no longer change, with their ids, replacing the copies made earlier. Returns the number
+    of copied messages.
+    """
+    copied: int = 0
+    last_id: int = 0
+    while True:
+        rows: List[SentMessage] = list(
+            SentMessage.objects.using(source)
+            .filter(owner_id=owner_id, id__gt=last_id, status__in=FINAL_STATUSES)
+            .order_by("id")[:batch_size]
+        )
+        if not rows:
+            return copied
+        replace(rows, target)
+        copied += len(rows)
+        last_id = rows[-1].id
+
+
+def drain_messages(owner_id: int, source: str, target: str, batch_size: int) -> int:
+    """
+    The drain_messages function accepts the id of a user, the aliases of the source and the target shards
+    and the number of messages moved at a time. Moves all messages of the user until none is left on the source
+    shard: every batch is locked on the source shard while it is copied, replacing the copies made earlier,
+    and only the copied ids are deleted, so the updates made meanwhile are copied with the next batch or wait
+    for the lock. Returns the number of moved messages.
+    """
+    moved: int = 0
+    while True:
+        with transaction.atomic(using=source):
+            rows: List[SentMessage] = list(
+                SentMessage.objects.using(source).select_for_update()
+                .filter(owner_id=owner_id).order_by("id")[:batch_size]
+            )
+            if not rows:
+                return moved
+            replace(rows, target)
+            SentMessage.objects.using(source).filter(id__in=[row.id for row in rows])._raw_delete(source)
+        moved += len(rows)
+
+
+def replace(rows: List[SentMessage], target: str) -> None:
+    """
+    The replace function accepts the messages read from a shard and the alias of the target shard. Stores
+    the messages on the target shard with their ids, replacing the stored ones.
+    """
+    with transaction.atomic(using=target):
+        # Raw deletes and bulk inserts send no signals: the statistics of the user do not change.
+        SentMessage.objects.using(target).filter(id__in=[row.id for row in rows])._raw_delete(target)
+        SentMessage.objects.using(target).bulk_create(rows)
+
+
+def move_user(user: User, target: str, batch_size: int = 1000, grace: float = 5.0) -> int:
+    """
+    The move_user function accepts the user, the alias of the target shard, the number of messages copied
+    at a time and the number of seconds the requests and the workers started before the switch may still write
+    to the old shard. Copies the finished messages of the user to the target shard, so the history of the user
+    stays complete, switches the user to it and after the grace period moves the remaining messages, including
+    the ones written to the old shard meanwhile, until the old shard holds none. The messages still being delivered
+    exist on one shard only at any time. Returns the number of moved messages.
+    """
+    source: str = user_shard(user)
+    if source == target:
+        return 0
+    copy_messages(user.pk, source, target, batch_size)
+    user.message_shard = "" if target == PRIMARY else target
+    User.objects.filter(pk=user.pk).update(message_shard=user.message_shard)
+    time.sleep(grace)
+    return drain_messages(user.pk, source, target, batch_size)
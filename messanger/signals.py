@@ -0,0 +1,95 @@
+from typing import Optional
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from bot.models import Bot
+from messanger.models import SentMessage
+from messanger.sharding import placement, reserve_id_range
+from messanger.stats import COUNTED, record
+from test_task.db_router import PRIMARY, shards, user_shard
+from users.models import User
+
+
+@receiver(post_init, sender=SentMessage)
+def remember_status(sender, instance: SentMessage, **kwargs) -> None:
+    """
+    The remember_status function is called when an instance of the SentMessage class is created or loaded.
+    Remembers the stored status, so a change of the status is counted once when the message is saved.
+    """
+    instance._stats_status = instance.status
+
+
+@receiver(post_save, sender=SentMessage)
+def count_saved(sender, instance: SentMessage, created: bool, update_fields=None, **kwargs) -> None:
+    """
+    The count_saved function is called after a message is saved. Counts a new message and a change
+    of its status between the counted statuses in the statistics of its owner.
+    """
+    old: Optional[str] = None if created else instance._stats_status
+    if update_fields is not None and "status" not in update_fields:
+        return
+    deltas: dict = {"sent": 1} if created else {}
+    if old != instance.status:
+        if old in COUNTED:
+            deltas[COUNTED[old]] = -1
+        if instance.status in COUNTED:
+            deltas[COUNTED[instance.status]] = 1
+    record(instance.owner_id, instance.created, **deltas)
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=SentMessage)
+def count_deleted(sender, instance: SentMessage, **kwargs) -> None:
+    """
+    The count_deleted function is called after a message is deleted. Removes the message
+    from the statistics of its owner.
+    """
+    deltas: dict = {"sent": -1}
+    if instance._stats_status in COUNTED:
+        deltas[COUNTED[instance._stats_status]] = -1
+    record(instance.owner_id, instance.created, **deltas)
+
+
+@receiver(post_save, sender=User)
+def place_user(sender, instance: User, created: bool, raw: bool = False, **kwargs) -> None:
+    """
+    The place_user function is called after a user is saved. Assigns a new user to a message shard,
+    if there are several.
+    """
+    if created and not raw and not instance.message_shard and len(shards()) > 1:
+        shard: str = placement(instance.pk)
+        if shard != PRIMARY:
+            instance.message_shard = shard
+            User.objects.filter(pk=instance.pk).update(message_shard=shard)
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_messages(sender, instance: User, **kwargs) -> None:
+    """
+    The delete_sharded_messages function is called before a user is deleted. Deletes the messages
+    of the user from a shard other than the primary database, which the cascade does not reach.
+    """
+    shard: str = user_shard(instance)
+    if shard != PRIMARY:
+        SentMessage.objects.using(shard).filter(owner_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=Bot)
+def unlink_sharded_messages(sender, instance: Bot, **kwargs) -> None:
+    """
+    The unlink_sharded_messages function is called before a bot is deleted. Unlinks the bot from the messages
+    on the shards other than the primary database, which the cascade does not reach.
+    """
+    for shard in shards():
+        if shard != PRIMARY:
+            SentMessage.objects.using(shard).filter(bot_id=instance.pk).update(bot=None)
+
+
+def reserve_ids(sender, using: str = PRIMARY, **kwargs) -> None:
+    """
+    The reserve_ids function is called after the migrations of the messanger application are applied
+    to a database. Moves the message ids of a shard to its own range.
+    """
+    if using in shards():
+        reserve_id_range(using)
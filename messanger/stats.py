@@ -0,0 +1,102 @@
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest, TruncHour
+
+from messanger.models import MessageStats, SentMessage, UserMessageStats
+from test_task.db_router import owner_shard, shards
+
+# The statuses counted by the statistics, mapped to their counters
+COUNTED: Dict[str, str] = {SentMessage.DELIVERED: "delivered", SentMessage.FAILED: "failed"}
+
+
+def hour_of(moment: datetime) -> datetime:
+    """
+    The hour_of function accepts a time and returns the start of its hour in UTC, the key of the MessageStats rows.
+    """
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def record(owner_id: int, created: datetime, **deltas: int) -> None:
+    """
+    The record function accepts the id of the owner, the creation time of the message and the changes
+    of the counters, e.g. sent=1 or delivered=1, failed=-1. Adds the changes to the hourly and the total statistics
+    of the user with atomic UPDATE queries. The rows are created by the first increment, so removing a message
+    of a user being deleted does not recreate the statistics of the user.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    values: dict = {name: F(name) + delta for name, delta in deltas.items()}
+    create: bool = any(delta > 0 for delta in deltas.values())
+    _apply(MessageStats, {"owner_id": owner_id, "hour": hour_of(created)}, values, create)
+    if deltas.get("sent", 0) > 0:
+        moment = Value(created, output_field=DateTimeField())
+        values["last_activity"] = Coalesce(Greatest("last_activity", moment), moment)
+    _apply(UserMessageStats, {"owner_id": owner_id}, values, create)
+
+
+def _apply(model: type, lookup: dict, values: dict, create: bool) -> None:
+    """
+    The _apply function accepts the model, the lookup of its row, the values to update and whether a missing row
+    is created. Updates the row, creating it first if it does not exist yet and may be created.
+    """
+    if not model.objects.filter(**lookup).update(**values) and create:
+        with transaction.atomic():
+            model.objects.get_or_create(**lookup)
+        model.objects.filter(**lookup).update(**values)
+
+
+def rebuild(owner_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    The rebuild function accepts the ids of the users, by default all users with messages on any shard. Recomputes
+    their statistics from the messages with a GROUP BY query per user. Returns the number of created hourly rows.
+    """
+    if owner_ids is None:
+        owner_ids = sorted({
+            owner_id
+            for shard in shards()
+            for owner_id in SentMessage.objects.using(shard).values_list("owner_id", flat=True).distinct()
+        })
+    created: int = 0
+    for owner_id in owner_ids:
+        created += _rebuild_owner(owner_id)
+    return created
+
+
+def _rebuild_owner(owner_id: int) -> int:
+    """
+    The _rebuild_owner function accepts the id of a user. Replaces the statistics of the user with the ones computed
+    from the messages on the shard of the user. Returns the number of created hourly rows.
+    """
+    counters: dict = {
+        "sent": Count("id"),
+        "delivered": Count("id", filter=Q(status=SentMessage.DELIVERED)),
+        "failed": Count("id", filter=Q(status=SentMessage.FAILED)),
+    }
+    with transaction.atomic():
+        rows: List[dict] = list(
+            SentMessage.objects.using(owner_shard(owner_id)).filter(owner_id=owner_id)
+            .annotate(bucket=TruncHour("created", tzinfo=dt_timezone.utc))
+            .values("bucket")
+            .annotate(last=Max("created"), **counters)
+            .order_by("bucket")
+        )
+        MessageStats.objects.filter(owner_id=owner_id).delete()
+        UserMessageStats.objects.filter(owner_id=owner_id).delete()
+        MessageStats.objects.bulk_create(
+            (
+                MessageStats(owner_id=owner_id, hour=row["bucket"], **{name: row[name] for name in counters})
+                for row in rows
+            ),
+            batch_size=1000,
+        )
+        if rows:
+            UserMessageStats.objects.create(
+                owner_id=owner_id,
+                last_activity=max(row["last"] for row in rows),
+                **{name: sum(row[name] for row in rows) for name in counters},
+            )
+    return len(rows)
@@ -0,0 +1,114 @@
+import random
+from datetime import timedelta
+from typing import List, Optional
+
+import pytest
+from django.utils import timezone
+
+from bot.tg.text import TEXT_LIMIT, text_length
+from messanger.checks import check_coalesce_window
+from messanger.delivery import SEPARATORS, coalesce, coalesce_slot, coalesced_text, split_text
+from messanger.models import SentMessage
+from users.models import User
+
+OWNER = User(username="bob")
+
+
+def message(content: str, attachment: Optional[str] = None) -> SentMessage:
+    return SentMessage(owner=OWNER, content=content, attachment=attachment)
+
+
+def contents(groups):
+    return [[message.content for message in group] for group in groups]
+
+
+def assert_split(text: str, parts: List[str], limit: int) -> None:
+    # Between the parts the text is either cut at the limit or exactly one separator is dropped,
+    # so every position the parts can be matched at is tracked.
+    positions = {0}
+    for index, part in enumerate(parts):
+        assert 0 < text_length(part) <= limit
+        positions = {position + len(part) for position in positions if text.startswith(part, position)}
+        if index < len(parts) - 1:
+            positions |= {
+                position + len(separator) for position in positions for separator in SEPARATORS
+                if text.startswith(separator, position)
+            }
+    assert len(text) in positions
+
+
+def test_text_length_counts_utf16_code_units():
+    assert text_length("привет") == 6
+    assert text_length("😀") == 2
+
+
+def test_short_text_is_one_part():
+    assert split_text("hello") == ["hello"]
+    assert split_text("x" * TEXT_LIMIT) == ["x" * TEXT_LIMIT]
+
+
+def test_text_is_split_at_the_best_boundary():
+    assert split_text("aaaa bbbb\ncccc\n\ndddd", limit=16) == ["aaaa bbbb\ncccc", "dddd"]
+    assert split_text("aaaa bbbb\ncccc dddd", limit=16) == ["aaaa bbbb", "cccc dddd"]
+    assert split_text("aaaa bbbb cccc dddd", limit=16) == ["aaaa bbbb cccc", "dddd"]
+
+
+def test_boundary_in_the_first_half_is_ignored():
+    assert split_text("a bbbbbbbbbbbbbbbbbbb", limit=10) == ["a bbbbbbbb", "bbbbbbbbbb", "b"]
+
+
+def test_surrogate_pairs_are_not_split():
+    parts = split_text("😀" * 5, limit=3)
+    assert parts == ["😀"] * 5
+    assert_split("a" + "😀" * 5000, split_text("a" + "😀" * 5000), TEXT_LIMIT)
+
+
+def test_random_texts_are_split_losslessly():
+    generator = random.Random(48)
+    alphabet = ["a", "б", "😀", " ", "\n", "\n\n"]
+    for _ in range(200):
+        text = "".join(generator.choice(alphabet) for _ in range(generator.randint(1, 400)))
+        limit = generator.randint(2, 40)
+        assert_split(text, split_text(text, limit), limit)
+
+
+def test_coalesced_text_has_a_single_header():
+    text = coalesced_text([message("one"), message("two")])
+    assert text == "bob, я получил от тебя сообщения: \n one\n\ntwo"
+
+
+def test_consecutive_texts_are_grouped_around_attachments():
+    messages = [message("a"), message("b"), message("file", "a.txt"), message("c"), message("d")]
+    assert contents(coalesce(messages)) == [["a", "b"], ["file"], ["c", "d"]]
+
+
+def test_groups_end_before_the_text_limit():
+    half = "x" * (TEXT_LIMIT // 2)
+    groups = coalesce([message(half), message(half), message("tail")])
+    assert contents(groups) == [[half], [half, "tail"]]
+    assert all(len(coalesced_text(group)) <= TEXT_LIMIT for group in groups)
+
+
+def test_check_requires_the_lookahead_below_the_window(settings):
+    settings.SCHEDULER_LOOKAHEAD, settings.MESSAGE_COALESCE_WINDOW = 2, 5
+    assert check_coalesce_window() == []
+    settings.SCHEDULER_LOOKAHEAD = 5
+    assert [error.id for error in check_coalesce_window()] == ["messanger.E001"]
+
+
+@pytest.mark.django_db
+def test_new_messages_join_the_held_slot(settings):
+    settings.MESSAGE_COALESCE_WINDOW = 5
+    owner = User.objects.create(username="alice")
+    first = SentMessage.objects.create(owner=owner, content="first", created=timezone.now())
+    slot = coalesce_slot(first)
+    assert timezone.now() + timedelta(seconds=4) < slot <= timezone.now() + timedelta(seconds=5)
+    first.send_at, first.status = slot, SentMessage.SCHEDULED
+    first.save()
+
+    second = SentMessage.objects.create(owner=owner, content="second", created=timezone.now())
+    assert coalesce_slot(second) == slot
+
+    # A claimed slot is not joined, the scheduler may be sending it already.
+    SentMessage.objects.filter(pk=first.pk).update(status=SentMessage.PENDING)
+    assert coalesce_slot(second) > slot
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from messanger.views import SentMessageView
+from messanger.views import MessageStatsView, SentMessageView
 
 urlpatterns = [
     path('sent', SentMessageView.as_view()),
+    path('stats', MessageStatsView.as_view()),
     ]
@@ -1,39 +1,119 @@
+from datetime import timedelta
+from typing import Tuple
+
+import marshmallow
 from django.db import models
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 from rest_framework import permissions, serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListCreateAPIView
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from bot.models import TgUser
-from bot.tg.client import TgClient
-from messanger.models import SentMessage
-from messanger.serializers import SentMessageSerializer
+from bot.tg.breaker import TgUnavailableError
+from messanger.delivery import coalesce_slot, deliver, mark
+from messanger.idempotency import IdempotentCreateMixin
+from messanger.models import MessageStats, SentMessage, UserMessageStats
+from messanger.serializers import MessageStatsPeriodSerializer, SentMessageSerializer, UserMessageStatsSerializer
+from test_task import tracing
+from test_task.db_router import read_alias, user_shard
 
 
-class SentMessageView(ListCreateAPIView):
+class SentMessageView(IdempotentCreateMixin, ListCreateAPIView):
     model: models.Model = SentMessage
     permission_classes: list = [permissions.IsAuthenticated]
     serializer_class: serializers.ModelSerializer = SentMessageSerializer
     pagination_class = LimitOffsetPagination
+    throttle_scope: str = "messages"
 
     def perform_create(self, serializer) -> None:
         """
         The perform_create function overrides the parent class method.
-        Sets the value of the owner field.
+        Sets the value of the owner field and delivers the message and its attachment through the bot the user's
+        chat is linked to. If the telegram API is unavailable, the message is deferred and delivered later
+        by the deliverdeferred command instead of blocking the request; a message rejected by telegram is marked
+        as failed and the request is answered with 400. A message with a future send_at is only scheduled
+        for the runscheduler command, as is a message without an attachment to a chat with coalescing enabled,
+        which is held to be delivered together with the following ones. The steps are traced as spans
+        of a sampled request.
         """
-        message = serializer.save(owner=self.request.user)
-        try:
-            client = TgUser.objects.get(user=self.request.user)
-        except TgUser.DoesNotExist:
+        attachment = serializer.validated_data.get("attachment")
+        with tracing.span("SentMessage.insert"):
+            message = serializer.save(owner=self.request.user)
+        with tracing.span("TgUser.get_linked"):
+            client = TgUser.get_linked(self.request.user, message.bot)
+        if client is None:
+            mark(message, SentMessage.FAILED)
             raise ValidationError("User is not verification")
 
-        text:str = f"{self.request.user.username}, я получил от тебя сообщение: \n {message.content}"
-        TgClient().send_message(chat_id=client.chat_id, text=text)
+        if message.send_at and message.send_at > timezone.now():
+            mark(message, SentMessage.SCHEDULED)
+            return
+        if client.coalesce_messages and not message.send_at and not message.attachment:
+            message.send_at = coalesce_slot(message)
+            message.status = SentMessage.SCHEDULED
+            message.save(update_fields=["send_at", "status"])
+            return
+        try:
+            with tracing.span("deliver", **{"message.id": message.id}):
+                deliver(message, client, file_name=attachment.name if attachment else None)
+        except TgUnavailableError:
+            mark(message, SentMessage.DEFERRED)
+        except marshmallow.ValidationError:
+            # Telegram answered with an error instead of the sent message, e.g. 400 Bad Request or 429.
+            mark(message, SentMessage.FAILED)
+            raise ValidationError("The message is rejected by telegram")
 
     def get_queryset(self) -> list:
         """
         The get_queryset function overrides the method of the parent class. Does not accept parameters as arguments
-        except for the instance itself. Returns a selection from the database of all instances
-        of the class created by the current user.
+        except for the instance itself. Returns a selection from the shard of the current user of all instances
+        of the class created by the user; the messages on the primary database are read from the replicas.
         """
-        return SentMessage.objects.filter(owner=self.request.user)
+        return SentMessage.objects.using(read_alias(user_shard(self.request.user))).filter(owner=self.request.user)
+
+
+class MessageStatsView(APIView):
+    """
+    The MessageStatsView class inherits from the APIView class from the rest_framework.views module.
+    Returns the message statistics of the current user.
+    """
+    permission_classes: list = [permissions.IsAuthenticated]
+    granularities: Tuple[str, ...] = ("day", "hour")
+    max_days: int = 366
+
+    def get(self, request: Request) -> Response:
+        """
+        The get function processes the GET request. Accepts the 'granularity' query parameter, 'day' by default
+        or 'hour', and 'days', the number of past days covered by the series, 30 by default. Returns the totals
+        of the messages of the current user and the number of messages created, delivered and failed
+        per period, read from the statistics tables instead of the messages.
+        """
+        granularity: str = request.query_params.get("granularity", "day")
+        if granularity not in self.granularities:
+            raise ValidationError({"granularity": f"Must be one of: {', '.join(self.granularities)}"})
+        try:
+            days: int = int(request.query_params.get("days", 30))
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer"})
+        if not 1 <= days <= self.max_days:
+            raise ValidationError({"days": f"Must be between 1 and {self.max_days}"})
+
+        rows = MessageStats.objects.filter(owner=request.user, hour__gte=timezone.now() - timedelta(days=days))
+        if granularity == "day":
+            rows = rows.annotate(period=TruncDate("hour")).values("period").annotate(
+                sent=Sum("sent"), delivered=Sum("delivered"), failed=Sum("failed")
+            )
+        else:
+            rows = rows.annotate(period=F("hour")).values("period", "sent", "delivered", "failed")
+        totals = UserMessageStats.objects.filter(owner=request.user).first() or UserMessageStats()
+        return Response({
+            **UserMessageStatsSerializer(totals).data,
+            "granularity": granularity,
+            "series": MessageStatsPeriodSerializer(rows.order_by("period"), many=True).data,
+        })
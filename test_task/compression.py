@@ -0,0 +1,246 @@
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+HTML_TYPE = re.compile(r"^text/html\b")
+COMPRESSIBLE_TYPES = re.compile(r"^(text/|application/(json|javascript|xml|[\w.+-]+\+(json|xml))\b)")
+ACCEPT_ENCODING_ITEM = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$")
+
+
+class Compressor(ABC):
+    """
+    The Compressor class is the abstract interface of the incremental compressors. A chunk passed
+    to the compress method is returned compressed and flushed, so every chunk of a streaming response
+    reaches the client without waiting for the following ones.
+    """
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """
+        The compress function defines an abstract class method. Accepts a chunk of the response body
+        and returns its compressed and flushed data.
+        """
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """
+        The finish function defines an abstract class method. Returns the end of the compressed stream.
+        """
+
+
+class GzipCompressor(Compressor):
+    """
+    The GzipCompressor class compresses the response body in the gzip format with the zlib module.
+    """
+    def __init__(self, level: int) -> None:
+        """
+        The __init__ function is called when creating an instance of the GzipCompressor class.
+        Accepts the compression level from 1 to 9.
+        """
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        The compress function overrides the method of the parent class. Compresses and flushes the chunk.
+        """
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """
+        The finish function overrides the method of the parent class. Returns the end of the compressed stream.
+        """
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor(Compressor):
+    """
+    The BrotliCompressor class compresses the response body in the brotli format with the optional brotli package.
+    """
+    def __init__(self, level: int) -> None:
+        """
+        The __init__ function is called when creating an instance of the BrotliCompressor class.
+        Accepts the compression quality from 0 to 11.
+        """
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        The compress function overrides the method of the parent class. Compresses and flushes the chunk.
+        """
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        """
+        The finish function overrides the method of the parent class. Returns the end of the compressed stream.
+        """
+        return self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    """
+    The ZstdCompressor class compresses the response body in the zstd format with the optional zstandard package.
+    """
+    def __init__(self, level: int) -> None:
+        """
+        The __init__ function is called when creating an instance of the ZstdCompressor class.
+        Accepts the compression level from 1 to 22.
+        """
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        The compress function overrides the method of the parent class. Compresses and flushes the chunk.
+        """
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        """
+        The finish function overrides the method of the parent class. Returns the end of the compressed stream.
+        """
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> Dict[str, Callable[[], Compressor]]:
+    """
+    The available_encodings function does not accept any parameters. Returns the factories of the compressors
+    of the encodings listed in the COMPRESSION_ENCODINGS setting whose packages are installed, in the order
+    of the setting, which is the order of preference among the encodings accepted by a client equally.
+    """
+    factories: Dict[str, Callable[[], Compressor]] = {
+        "gzip": lambda: GzipCompressor(settings.COMPRESSION_GZIP_LEVEL),
+    }
+    if brotli is not None:
+        factories["br"] = lambda: BrotliCompressor(settings.COMPRESSION_BROTLI_LEVEL)
+    if zstandard is not None:
+        factories["zstd"] = lambda: ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL)
+    return {name: factories[name] for name in settings.COMPRESSION_ENCODINGS if name in factories}
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """
+    The negotiate function accepts the Accept-Encoding header of the request and the available encodings
+    in the order of preference. Returns the encoding with the highest quality value accepted by the client,
+    or None if the client accepts none of them.
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        match = ACCEPT_ENCODING_ITEM.match(item)
+        if match is not None:
+            try:
+                qualities[match.group(1)] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    default: float = qualities.get("*", 0.0)
+    best: Optional[str] = None
+    best_quality: float = 0.0
+    for encoding in encodings:
+        quality: float = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_stream(content: Iterable[bytes], compressor: Compressor) -> Iterator[bytes]:
+    """
+    The compress_stream function accepts the chunks of a streaming response and the compressor.
+    Yields the compressed chunks, skipping the empty ones, and the end of the compressed stream.
+    """
+    for chunk in content:
+        data: bytes = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def compress_async_stream(content: AsyncIterable[bytes], compressor: Compressor) -> AsyncIterator[bytes]:
+    """
+    The compress_async_stream function is the asynchronous version of the compress_stream function
+    for the streaming responses of asynchronous views.
+    """
+    async for chunk in content:
+        data: bytes = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    The CompressionMiddleware class compresses the responses with the best encoding accepted by the client: zstd
+    and brotli if their packages are installed, and gzip. Only textual responses are compressed, regular ones when
+    they are at least COMPRESSION_MIN_SIZE bytes long, streaming ones chunk by chunk as they are produced.
+    The levels are set by the COMPRESSION_*_LEVEL settings to keep the CPU cost bounded. HTML pages, such as
+    the admin and the browsable API, may contain CSRF tokens and are only compressed by the GZipMiddleware
+    of Django, which mitigates the BREACH attack.
+    """
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """
+        The __init__ function is called when creating an instance of the CompressionMiddleware class.
+        Accepts the next handler of the request and determines the available encodings.
+        """
+        self.get_response = get_response
+        self.encodings: Dict[str, Callable[[], Compressor]] = available_encodings()
+        self.html: GZipMiddleware = GZipMiddleware(get_response)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        The __call__ function processes the request. Calls the next handler and compresses its response
+        if it is compressible and the client accepts one of the available encodings.
+        """
+        response: HttpResponse = self.get_response(request)
+        if HTML_TYPE.match(response.get("Content-Type", "")):
+            return self.html.process_response(request, response)
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding: Optional[str] = negotiate(request.headers.get("Accept-Encoding", ""), list(self.encodings))
+        if encoding is None:
+            return response
+
+        compressor: Compressor = self.encodings[encoding]()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, compressor)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, compressor)
+            del response["Content-Length"]
+        else:
+            compressed: bytes = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+        etag: Optional[str] = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # The compressed body differs from the original one byte for byte.
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def compressible(response: HttpResponse) -> bool:
+        """
+        The compressible function defines a static method of the class. Accepts the response. Returns whether
+        the response has a textual body that is not encoded yet and, unless it is streaming, is at least
+        COMPRESSION_MIN_SIZE bytes long.
+        """
+        if response.has_header("Content-Encoding") or response.status_code in (204, 304):
+            return False
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return False
+        return bool(COMPRESSIBLE_TYPES.match(response.get("Content-Type", "")))
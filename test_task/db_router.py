@@ -0,0 +1,228 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connections
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+PRIMARY: str = "default"
+PIN_COOKIE: str = "db_primary"
+
+# The models whose rows are distributed across MESSAGE_SHARDS by the user in their 'owner' field.
+SHARDED_MODELS = {("messanger", "sentmessage")}
+
+# True while the current request must read from the primary database.
+_use_primary: contextvars.ContextVar = contextvars.ContextVar("use_primary", default=False)
+
+# Lag checks: replica alias -> (time of the check, replication lag in seconds or None if unavailable)
+_lag: Dict[str, tuple] = {}
+_lag_lock: threading.Lock = threading.Lock()
+
+# Replication lag of a PostgreSQL standby; zero when all received WAL is replayed, so an idle primary
+# does not make the replica look stale.
+LAG_QUERY: str = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replicas() -> List[str]:
+    """
+    The replicas function does not accept any parameters. Returns the aliases of the configured read replicas.
+    """
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def shards() -> List[str]:
+    """
+    The shards function does not accept any parameters. Returns the aliases of the databases holding
+    the sharded models, the primary database first.
+    """
+    return settings.MESSAGE_SHARDS
+
+
+def user_shard(user) -> str:
+    """
+    The user_shard function accepts a user. Returns the alias of the database holding the messages of the user.
+    """
+    return user.message_shard or PRIMARY
+
+
+def read_alias(shard: str) -> Optional[str]:
+    """
+    The read_alias function accepts the alias of a shard. Returns the alias to read the sharded models of the shard
+    from with using(): None for the primary database, so the reads are routed to the replicas like the other models,
+    or the shard itself.
+    """
+    return None if shard == PRIMARY else shard
+
+
+def owner_shard(owner_id: int) -> str:
+    """
+    The owner_shard function accepts the id of a user. Returns the alias of the database holding the messages
+    of the user, looking the user up on the primary database.
+    """
+    if len(shards()) == 1:
+        return PRIMARY
+    shard: Optional[str] = (
+        get_user_model().objects.using(PRIMARY).filter(pk=owner_id).values_list("message_shard", flat=True).first()
+    )
+    return shard or PRIMARY
+
+
+def replication_lag(alias: str) -> Optional[float]:
+    """
+    The replication_lag function accepts the alias of a replica. Returns the replication lag in seconds measured
+    at most once per DB_REPLICA_LAG_CHECK_INTERVAL seconds, or None if the replica is unavailable.
+    """
+    now: float = time.monotonic()
+    with _lag_lock:
+        checked = _lag.get(alias)
+        if checked is not None and now - checked[0] < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+            return checked[1]
+        # Other threads keep using the previous value while this one measures.
+        _lag[alias] = (now, checked[1] if checked else None)
+
+    lag: Optional[float] = 0.0
+    connection = connections[alias]
+    if connection.vendor == "postgresql":
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError as error:
+            logger.warning("Replica %s is unavailable: %s", alias, error)
+            connection.close()
+            lag = None
+    with _lag_lock:
+        _lag[alias] = (now, lag)
+    return lag
+
+
+class ReplicaRouter:
+    """
+    The ReplicaRouter class is a database router sending reads to the read replicas and everything else
+    to the primary database. Reads go to the primary inside transactions, during requests pinned to the primary
+    by the ReplicaPinMiddleware and when every replica is unavailable or lags more than DB_REPLICA_MAX_LAG seconds.
+    """
+    def db_for_read(self, model, **hints) -> str:
+        """
+        The db_for_read function accepts the model and the hints of the query. Returns the alias
+        of a random up-to-date replica or of the primary database.
+        """
+        aliases: List[str] = replicas()
+        if not aliases or _use_primary.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        random.shuffle(aliases)
+        for alias in aliases:
+            lag: Optional[float] = replication_lag(alias)
+            if lag is not None and lag <= settings.DB_REPLICA_MAX_LAG:
+                return alias
+        return PRIMARY
+
+    def db_for_write(self, model, **hints) -> str:
+        """
+        The db_for_write function accepts the model and the hints of the query. Returns the alias
+        of the primary database.
+        """
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        """
+        The allow_relation function accepts two model instances. Allows relations between all instances,
+        as the replicas contain the same data as the primary database.
+        """
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints) -> bool:
+        """
+        The allow_migrate function accepts the alias of the database and the migrated model. Allows migrations
+        on the primary database only, the replicas receive them through replication.
+        """
+        return db == PRIMARY
+
+
+class ShardRouter:
+    """
+    The ShardRouter class is a database router sending the queries of the sharded models to the shard
+    of their owner: a saved instance stays on the database it was loaded from, a new instance goes to the shard
+    of its owner and the related manager of a user, e.g. user.sentmessage_set, to the shard of the user. Queries
+    without such hints are left to the next router, so code querying sharded models without an instance must choose
+    the shard with using(). Other models are left to the next router as well.
+    """
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        """
+        The db_for_read function accepts the model and the hints of the query. Returns the alias
+        of the shard for sharded models or None.
+        """
+        return self.shard_for(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        """
+        The db_for_write function accepts the model and the hints of the query. Returns the alias
+        of the shard for sharded models or None. Instances read from a replica are written to the primary database.
+        """
+        shard: Optional[str] = self.shard_for(model, hints.get("instance"))
+        return PRIMARY if shard in replicas() else shard
+
+    @staticmethod
+    def shard_for(model, instance) -> Optional[str]:
+        """
+        The shard_for function defines a static method of the class. Accepts the model and the instance given
+        as a hint. Returns the alias of the shard for a sharded model and a known instance or None.
+        """
+        if instance is None or (model._meta.app_label, model._meta.model_name) not in SHARDED_MODELS:
+            return None
+        if isinstance(instance, model):
+            if instance._state.db is not None:
+                return instance._state.db
+            return user_shard(instance.owner)
+        if isinstance(instance, get_user_model()):
+            return user_shard(instance)
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints) -> Optional[bool]:
+        """
+        The allow_migrate function accepts the alias of the database and the migrated model. Allows only
+        the sharded models on the shards other than the primary database, leaves the primary database
+        and the replicas to the next router.
+        """
+        if db == PRIMARY or db not in shards():
+            return None
+        return (app_label, model_name) in SHARDED_MODELS
+
+
+class ReplicaPinMiddleware:
+    """
+    The ReplicaPinMiddleware class pins requests to the primary database. Modifying requests read from the primary
+    and set a cookie pinning the following requests of the client for DB_REPLICA_STICKY_SECONDS seconds, so a client
+    always reads its own writes even if the replicas have not replayed them yet.
+    """
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """
+        The __init__ function is called when creating an instance of the ReplicaPinMiddleware class.
+        Accepts the next handler of the request.
+        """
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        The __call__ function processes the request. Decides whether the request reads from the primary database,
+        calls the next handler and pins the client after a modifying request.
+        """
+        modifying: bool = request.method not in ("GET", "HEAD", "OPTIONS", "TRACE")
+        token = _use_primary.set(modifying or PIN_COOKIE in request.COOKIES)
+        try:
+            response: HttpResponse = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        if modifying and replicas():
+            response.set_cookie(PIN_COOKIE, "1", max_age=int(settings.DB_REPLICA_STICKY_SECONDS), httponly=True)
+        return response
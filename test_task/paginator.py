@@ -0,0 +1,51 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    The EstimatedCountPaginator class inherits from the Paginator class from the django.core.paginator module.
+    On PostgreSQL the number of objects is taken from the planner statistics instead of an exact COUNT(*):
+    the row estimate of the table for an unfiltered queryset and the row estimate of the query plan otherwise.
+    Small results below the ADMIN_EXACT_COUNT_LIMIT setting are still counted exactly.
+    """
+    @cached_property
+    def count(self) -> int:
+        """
+        The count function overrides the property of the parent class. Returns the estimated number
+        of objects, or the exact number for small results and databases other than PostgreSQL.
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or connections[queryset.db].vendor != "postgresql":
+            return super().count
+        estimate: int = self.estimate(queryset)
+        if estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+    @staticmethod
+    def estimate(queryset: QuerySet) -> int:
+        """
+        The estimate function defines a static method of the class. Accepts the queryset and returns
+        the number of its rows estimated by PostgreSQL, or -1 if the table has never been analyzed.
+        """
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+                return int(row[0]) if row else -1
+            sql, params = queryset.order_by().query.get_compiler(using=queryset.db).as_sql()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
@@ -51,11 +51,15 @@ INSTALLED_APPS = [
     'users',
     'messanger',
     'bot',
+    'apidocs',
 
 ]
 
 MIDDLEWARE = [
+    'test_task.tracing.TracingMiddleware',
+    'test_task.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'test_task.db_router.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,16 +97,141 @@ WSGI_APPLICATION = 'test_task.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.environ.get("DB_ENGINE", 'django.db.backends.postgresql'),
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASSWORD"),
         'HOST': os.environ.get("DB_HOST"),
         'PORT': os.environ.get("DB_PORT"),
+        'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", 0)),
+        'CONN_HEALTH_CHECKS': True,
+        # Server-side cursors do not survive pgbouncer transaction pooling.
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get("DB_PGBOUNCER", "").lower() in ("1", "true", "yes"),
     }
 }
 
+# Read replicas listed in DB_REPLICA_HOSTS as host[:port] serve safe reads through test_task.db_router.
+# A client is pinned to the primary for DB_REPLICA_STICKY_SECONDS after a modifying request, and replicas lagging
+# more than DB_REPLICA_MAX_LAG seconds (checked every DB_REPLICA_LAG_CHECK_INTERVAL seconds) are skipped
+
+for index, replica in enumerate(host for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if host):
+    replica_host, _, replica_port = replica.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES["default"]["PORT"],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# The messages are sharded by their owner across the default database and the databases listed in DB_SHARDS
+# as host[:port][/name], an entry starting with '/' being the file of an SQLite database. New users are placed
+# on the shards in turn; the migrateshards command migrates all shards and movemessages moves users between them
+
+for index, shard in enumerate((shard for shard in os.environ.get("DB_SHARDS", "").split(",") if shard), start=1):
+    if shard.startswith("/"):
+        shard_address, shard_name = "", shard
+    else:
+        shard_address, _, shard_name = shard.partition("/")
+    shard_host, _, shard_port = shard_address.partition(":")
+    DATABASES[f"shard_{index}"] = {
+        **DATABASES["default"],
+        'NAME': shard_name or DATABASES["default"]["NAME"],
+        'HOST': shard_host or DATABASES["default"]["HOST"],
+        'PORT': shard_port or DATABASES["default"]["PORT"],
+    }
+
+MESSAGE_SHARDS = ['default'] + [alias for alias in DATABASES if alias.startswith("shard_")]
+
+DATABASE_ROUTERS = ['test_task.db_router.ShardRouter', 'test_task.db_router.ReplicaRouter']
+DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", 5))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_LAG_CHECK_INTERVAL", 5))
+DB_REPLICA_STICKY_SECONDS = float(os.environ.get("DB_REPLICA_STICKY_SECONDS", 10))
+
+# Reconnect with exponential backoff in the bot and worker processes
+
+DB_RETRY_ATTEMPTS = int(os.environ.get("DB_RETRY_ATTEMPTS", 3))
+DB_RETRY_BASE_DELAY = float(os.environ.get("DB_RETRY_BASE_DELAY", 0.5))
+DB_RETRY_MAX_DELAY = float(os.environ.get("DB_RETRY_MAX_DELAY", 30))
+
 TG_TOKEN = os.environ.get("TG_TOKEN")
+TG_API_URL = os.environ.get("TG_API_URL", "https://api.telegram.org")
+# Messages per second sent by a bot unless its Bot record defines its own limit
+TG_RATE_LIMIT = float(os.environ.get("TG_RATE_LIMIT", 30))
+# Attachments are streamed to telegram from disk; images up to TG_PHOTO_MAX_SIZE bytes are sent as photos
+# and the bot API accepts uploads of up to TG_UPLOAD_MAX_SIZE bytes
+TG_PHOTO_MAX_SIZE = int(os.environ.get("TG_PHOTO_MAX_SIZE", 10 * 1024 * 1024))
+TG_UPLOAD_MAX_SIZE = int(os.environ.get("TG_UPLOAD_MAX_SIZE", 50 * 1024 * 1024))
+# Requests to the telegram API time out after TG_CONNECT_TIMEOUT seconds connecting and TG_READ_TIMEOUT seconds
+# waiting for data (TG_UPLOAD_TIMEOUT for file uploads, the long-polling timeout is added for getUpdates).
+# After TG_BREAKER_FAILURES consecutive failures calls fail fast for TG_BREAKER_RESET_TIMEOUT seconds
+# and messages sent meanwhile are stored for the deliverdeferred command
+TG_CONNECT_TIMEOUT = float(os.environ.get("TG_CONNECT_TIMEOUT", 3.05))
+TG_READ_TIMEOUT = float(os.environ.get("TG_READ_TIMEOUT", 10))
+TG_UPLOAD_TIMEOUT = float(os.environ.get("TG_UPLOAD_TIMEOUT", 60))
+TG_BREAKER_FAILURES = int(os.environ.get("TG_BREAKER_FAILURES", 5))
+TG_BREAKER_RESET_TIMEOUT = float(os.environ.get("TG_BREAKER_RESET_TIMEOUT", 30))
+TG_DEFERRED_BATCH_SIZE = int(os.environ.get("TG_DEFERRED_BATCH_SIZE", 100))
+TG_DEFERRED_INTERVAL = float(os.environ.get("TG_DEFERRED_INTERVAL", 5))
+
+# Textual responses of at least COMPRESSION_MIN_SIZE bytes and streaming responses are compressed with the first
+# of COMPRESSION_ENCODINGS accepted by the client; br needs the brotli package and zstd the zstandard package.
+# Lower levels trade the compression ratio for CPU time
+COMPRESSION_ENCODINGS = os.environ.get("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 5))
+COMPRESSION_BROTLI_LEVEL = int(os.environ.get("COMPRESSION_BROTLI_LEVEL", 4))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", 3))
+
+# A TRACING_SAMPLE_RATE share of the requests and runbot batches, and the requests of callers that sampled
+# their trace, are traced; the spans are written as JSON lines to the TRACING_EXPORT file, '-' is the standard output
+TRACING_SAMPLE_RATE = float(os.environ.get("TRACING_SAMPLE_RATE", 0))
+TRACING_EXPORT = os.environ.get("TRACING_EXPORT", "-")
+
+# Responses of POST /message/sent requests with an Idempotency-Key header are kept for IDEMPOTENCY_KEY_TTL seconds
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+
+# The runscheduler command claims messages due within SCHEDULER_LOOKAHEAD seconds every SCHEDULER_POLL_INTERVAL
+# seconds, up to SCHEDULER_BATCH_SIZE at a time, and sends them on time from SCHEDULER_WORKERS threads
+SCHEDULER_POLL_INTERVAL = float(os.environ.get("SCHEDULER_POLL_INTERVAL", 1))
+SCHEDULER_LOOKAHEAD = float(os.environ.get("SCHEDULER_LOOKAHEAD", 2))
+SCHEDULER_BATCH_SIZE = int(os.environ.get("SCHEDULER_BATCH_SIZE", 500))
+SCHEDULER_WORKERS = int(os.environ.get("SCHEDULER_WORKERS", 8))
+# Messages claimed more than SCHEDULER_CLAIM_TIMEOUT seconds ago and still pending belong to a scheduler that died,
+# they are returned to the schedule; the timeout must exceed SCHEDULER_LOOKAHEAD and the time of a delivery
+SCHEDULER_CLAIM_TIMEOUT = float(os.environ.get("SCHEDULER_CLAIM_TIMEOUT", 300))
+# Messages sent to a chat with coalescing enabled are held for MESSAGE_COALESCE_WINDOW seconds and delivered
+# by the runscheduler command together with the following ones as a single telegram message. The following messages
+# join until the scheduler claims the held ones SCHEDULER_LOOKAHEAD seconds before they are due, so the window
+# must exceed the lookahead
+MESSAGE_COALESCE_WINDOW = float(os.environ.get("MESSAGE_COALESCE_WINDOW", 5))
+
+# Bot command handlers run in a pool of BOT_WORKERS threads and read recent messages from a per-chat cache
+BOT_WORKERS = int(os.environ.get("BOT_WORKERS", 4))
+# runbot --all checks for registered and deactivated bots every BOT_REFRESH_INTERVAL seconds and pauses polling
+# of a bot for BOT_ERROR_DELAY seconds after a failed request
+BOT_REFRESH_INTERVAL = float(os.environ.get("BOT_REFRESH_INTERVAL", 60))
+BOT_ERROR_DELAY = float(os.environ.get("BOT_ERROR_DELAY", 5))
+# runbot reports the polling efficiency of each bot every BOT_POLL_STATS_INTERVAL seconds, 0 disables the reports
+BOT_POLL_STATS_INTERVAL = float(os.environ.get("BOT_POLL_STATS_INTERVAL", 300))
+BOT_HISTORY_CACHE_SIZE = int(os.environ.get("BOT_HISTORY_CACHE_SIZE", 20))
+BOT_HISTORY_CACHE_TTL = float(os.environ.get("BOT_HISTORY_CACHE_TTL", 30))
+# The workers route messages through an in-memory registry of the chats, updated on the changes made by the same
+# process and reloaded every CHAT_REGISTRY_MAX_AGE seconds to pick up the chats linked or unlinked elsewhere; a chat
+# found in the registry is confirmed in the database before a message is sent to it
+CHAT_REGISTRY_MAX_AGE = float(os.environ.get("CHAT_REGISTRY_MAX_AGE", 60))
+
+# runbot long-polls for up to TG_POLL_TIMEOUT seconds and requests between TG_POLL_MIN_LIMIT and TG_POLL_MAX_LIMIT
+# updates at a time, shrinking the limit when a batch takes longer than TG_POLL_TARGET_SECONDS to handle
+TG_POLL_TIMEOUT = int(os.environ.get("TG_POLL_TIMEOUT", 60))
+TG_POLL_MIN_LIMIT = int(os.environ.get("TG_POLL_MIN_LIMIT", 10))
+TG_POLL_MAX_LIMIT = int(os.environ.get("TG_POLL_MAX_LIMIT", 100))
+TG_POLL_TARGET_SECONDS = float(os.environ.get("TG_POLL_TARGET_SECONDS", 2))
+
+# Incoming messages are stored in batches of up to TG_INBOUND_BATCH_SIZE at least every TG_INBOUND_FLUSH_INTERVAL
+# seconds and kept for TG_INBOUND_RETENTION_DAYS days (0 keeps them forever)
+TG_INBOUND_BATCH_SIZE = int(os.environ.get("TG_INBOUND_BATCH_SIZE", 500))
+TG_INBOUND_FLUSH_INTERVAL = float(os.environ.get("TG_INBOUND_FLUSH_INTERVAL", 5))
+TG_INBOUND_RETENTION_DAYS = int(os.environ.get("TG_INBOUND_RETENTION_DAYS", 30))
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -110,7 +239,32 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication'
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Modifying requests of the views with a throttle_scope are limited per user by test_task.throttling
+    # with a short burst window and a long sustained one
+    'DEFAULT_THROTTLE_CLASSES': [
+        'test_task.throttling.BurstRateThrottle',
+        'test_task.throttling.SustainedRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'messages_burst': os.environ.get("THROTTLE_MESSAGES_BURST", "10/10s"),
+        'messages_sustained': os.environ.get("THROTTLE_MESSAGES_SUSTAINED", "300/h"),
+        'verify_burst': os.environ.get("THROTTLE_VERIFY_BURST", "5/m"),
+        'verify_sustained': os.environ.get("THROTTLE_VERIFY_SUSTAINED", "30/h"),
+    },
+}
+
+# Throttle counters must be shared by all API processes, so in production THROTTLE_CACHE_BACKEND should point
+# to a shared cache, e.g. django.core.cache.backends.redis.RedisCache with THROTTLE_CACHE_LOCATION redis://host:6379
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': os.environ.get("THROTTLE_CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get("THROTTLE_CACHE_LOCATION", 'throttle'),
+    },
 }
 
 # Password validation
@@ -132,9 +286,31 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTHENTICATION_BACKENDS = (
-    'django.contrib.auth.backends.ModelBackend',
+    'users.backends.PooledModelBackend',
 )
 
+# The first hasher hashes new passwords, the others only verify the existing hashes, which are rehashed with
+# the first one on the next login. PASSWORD_HASHER replaces the first hasher, e.g. with Argon2PasswordHasher
+PASSWORD_HASHERS = [
+    os.environ.get("PASSWORD_HASHER", 'users.hashers.TunedPBKDF2PasswordHasher'),
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# The number of PBKDF2 iterations of the tuned hasher, 0 keeps the default of Django
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", 0))
+
+# Passwords are hashed in a pool of PASSWORD_HASHING_WORKERS processes started by every API process, by default 0,
+# which hashes them in the request thread.
+# When PASSWORD_HASHING_MAX_QUEUE hashes are waiting or running, or a hash is not ready within
+# PASSWORD_HASHING_TIMEOUT seconds, the request fails with 503 instead of piling up
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 0))
+PASSWORD_HASHING_MAX_QUEUE = int(os.environ.get("PASSWORD_HASHING_MAX_QUEUE", 4 * (os.cpu_count() or 1)))
+PASSWORD_HASHING_TIMEOUT = float(os.environ.get("PASSWORD_HASHING_TIMEOUT", 5))
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -156,6 +332,16 @@ STATIC_ROOT = os.path.join(BASE_DIR, "django_static")
 MEDIA_URL = "/django_media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "django_media")
 
+# Admin changelists of large tables show row counts estimated by PostgreSQL; results estimated below
+# ADMIN_EXACT_COUNT_LIMIT rows are counted exactly
+
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get("ADMIN_EXACT_COUNT_LIMIT", 10000))
+
+# OpenAPI schema prebuilt by the buildschema command and served by /docs/ and /redoc/
+
+SCHEMA_FILE = os.environ.get("SCHEMA_FILE", os.path.join(BASE_DIR, "openapi.json"))
+SCHEMA_CACHE_TIMEOUT = int(os.environ.get("SCHEMA_CACHE_TIMEOUT", 3600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,32 @@
+"""
+Lean Django settings for the bot and background worker processes.
+
+These processes only need the ORM, the models and the telegram client, so the web stack (admin, sessions,
+DRF, drf_yasg, corsheaders, templates and middleware) is not loaded. manage.py selects this module
+for the commands listed in its WORKER_COMMANDS unless DJANGO_SETTINGS_MODULE is set explicitly.
+"""
+import os
+
+from test_task.settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+
+    'users',
+    'messanger',
+    'bot',
+]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+ROOT_URLCONF = 'test_task.urls_bot'
+
+# Workers write what they read, so they use the primary database and the message shards only.
+DATABASES = {alias: DATABASES[alias] for alias in MESSAGE_SHARDS}
+
+# Workers keep their connections between poll cycles; they are health-checked and recycled by bot.db.
+for alias in DATABASES:
+    DATABASES[alias]['CONN_MAX_AGE'] = int(os.environ.get("WORKER_DB_CONN_MAX_AGE", 600))
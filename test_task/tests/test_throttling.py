@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from test_task.throttling import SlidingWindowRateThrottle
+
+RATES = {"message_burst": "10/60s"}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    SlidingWindowRateThrottle.cache.clear()
+    yield
+    SlidingWindowRateThrottle.cache.clear()
+
+
+def make_throttle(now: float) -> SlidingWindowRateThrottle:
+    throttle = SlidingWindowRateThrottle()
+    throttle.window = "burst"
+    throttle.THROTTLE_RATES = RATES
+    throttle.timer = lambda: now
+    return throttle
+
+
+def request(method: str = "POST", user_id: int = 1) -> SimpleNamespace:
+    return SimpleNamespace(method=method, user=SimpleNamespace(pk=user_id, is_authenticated=True), META={})
+
+
+VIEW = SimpleNamespace(throttle_scope="message")
+
+
+def test_parse_rate_accepts_multiples_of_the_period():
+    throttle = SlidingWindowRateThrottle()
+    assert throttle.parse_rate("5/s") == (5, 1)
+    assert throttle.parse_rate("100/h") == (100, 3600)
+    assert throttle.parse_rate("10/30s") == (10, 30)
+    assert throttle.parse_rate(None) == (None, None)
+    with pytest.raises(ValueError):
+        throttle.parse_rate("ten per minute")
+
+
+def test_allows_the_rate_within_a_window():
+    allowed = [make_throttle(600 + i).allow_request(request(), VIEW) for i in range(11)]
+    assert allowed == [True] * 10 + [False]
+
+
+def test_safe_requests_and_views_without_scope_are_not_limited():
+    for _ in range(20):
+        assert make_throttle(600).allow_request(request("GET"), VIEW)
+        assert make_throttle(600).allow_request(request(), SimpleNamespace())
+
+
+def test_users_are_limited_separately():
+    for _ in range(10):
+        assert make_throttle(600).allow_request(request(user_id=1), VIEW)
+    assert not make_throttle(600).allow_request(request(user_id=1), VIEW)
+    assert make_throttle(600).allow_request(request(user_id=2), VIEW)
+
+
+def test_previous_window_counts_by_its_overlap():
+    for _ in range(10):
+        assert make_throttle(600).allow_request(request(), VIEW)
+    # At the start of the next window the previous one still overlaps completely.
+    assert not make_throttle(660).allow_request(request(), VIEW)
+    # Halfway through, half of the previous requests count: five more are allowed.
+    allowed = [make_throttle(690).allow_request(request(), VIEW) for _ in range(6)]
+    assert allowed == [True] * 5 + [False]
+
+
+def test_wait_is_the_time_until_a_request_fits():
+    for _ in range(10):
+        make_throttle(600).allow_request(request(), VIEW)
+    for _ in range(5):
+        make_throttle(690).allow_request(request(), VIEW)
+    throttle = make_throttle(690)
+    assert not throttle.allow_request(request(), VIEW)
+    assert throttle.wait() == pytest.approx(6)
+    assert not make_throttle(695.9).allow_request(request(), VIEW)
+    assert make_throttle(696).allow_request(request(), VIEW)
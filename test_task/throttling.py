@@ -0,0 +1,123 @@
+import re
+from typing import Optional, Tuple
+
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.throttling import SimpleRateThrottle
+
+RATE_PATTERN = re.compile(r"^(\d+)/(\d*)([smhd])")
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    The SlidingWindowRateThrottle class inherits from the SimpleRateThrottle class from the rest_framework.throttling
+    module. Limits the modifying requests of a user with a sliding window approximated by the counters of the current
+    and the previous fixed window, so a user costs two integers in the cache instead of a list of request timestamps.
+    The rate is looked up as '<throttle_scope of the view>_<window>' in the DEFAULT_THROTTLE_RATES setting and may
+    use a multiple of the period, e.g. '10/30s'.
+    """
+    cache = caches["throttle"]
+    cache_format: str = "throttle_%(scope)s_%(ident)s"
+    window: str = ""
+
+    def __init__(self) -> None:
+        """
+        The __init__ function overrides the method of the parent class. The rate depends on the view, so it is
+        determined when the request is checked.
+        """
+        self.rate: Optional[str] = None
+        self.num_requests: Optional[int] = None
+        self.duration: Optional[int] = None
+        self._wait: float = 0.0
+
+    def parse_rate(self, rate: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        """
+        The parse_rate function overrides the method of the parent class. Accepts the rate as a string, e.g.
+        '5/s', '100/h' or '10/30s'. Returns the allowed number of requests and the length of the window in seconds.
+        """
+        if rate is None:
+            return None, None
+        match = RATE_PATTERN.match(rate)
+        if match is None:
+            raise ValueError(f"Invalid throttle rate {rate!r}")
+        return int(match.group(1)), int(match.group(2) or 1) * PERIODS[match.group(3)]
+
+    def get_cache_key(self, request: Request, view) -> Optional[str]:
+        """
+        The get_cache_key function overrides the method of the parent class. Returns the cache key of the user
+        or, for anonymous requests, of the client address.
+        """
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request: Request, view) -> bool:
+        """
+        The allow_request function overrides the method of the parent class. Safe requests are not limited.
+        Estimates the number of requests of the user during the last window as the requests of the current fixed
+        window plus the overlapping share of the previous one. Counts and allows the request if the estimate
+        is below the rate, otherwise computes the time to wait.
+        """
+        scope: Optional[str] = getattr(view, "throttle_scope", None)
+        if request.method in SAFE_METHODS or not scope:
+            return True
+        self.scope = f"{scope}_{self.window}"
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        key: str = self.get_cache_key(request, view)
+        now: float = self.timer()
+        index: int = int(now // self.duration)
+        current_key, previous_key = f"{key}:{index}", f"{key}:{index - 1}"
+        counters: dict = self.cache.get_many([current_key, previous_key])
+        current: int = counters.get(current_key, 0)
+        previous: int = counters.get(previous_key, 0)
+        elapsed: float = now - index * self.duration
+        if previous * (self.duration - elapsed) / self.duration + current + 1 > self.num_requests:
+            self._wait = self.retry_after(current, previous, elapsed)
+            return False
+
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            # The counter expired between the calls.
+            self.cache.add(current_key, 1, timeout=2 * self.duration)
+        return True
+
+    def retry_after(self, current: int, previous: int, elapsed: float) -> float:
+        """
+        The retry_after function defines a class method. Accepts the counters of the current and the previous window
+        and the time elapsed since the start of the current window. Returns the number of seconds until the estimate
+        drops below the rate, assuming no further requests.
+        """
+        allowed: int = self.num_requests - 1
+        if current <= allowed and previous:
+            return max(0.0, self.duration - elapsed - (allowed - current) * self.duration / previous)
+        if not current:
+            return self.duration - elapsed
+        return self.duration - elapsed + self.duration * (1 - allowed / current)
+
+    def wait(self) -> float:
+        """
+        The wait function overrides the method of the parent class. Returns the number of seconds to wait
+        before the next request, sent to the client in the Retry-After header.
+        """
+        return self._wait
+
+
+class BurstRateThrottle(SlidingWindowRateThrottle):
+    """
+    The BurstRateThrottle class limits short bursts of requests with the '<scope>_burst' rate.
+    """
+    window: str = "burst"
+
+
+class SustainedRateThrottle(SlidingWindowRateThrottle):
+    """
+    The SustainedRateThrottle class limits the long-term request rate with the '<scope>_sustained' rate.
+    """
+    window: str = "sustained"
@@ -0,0 +1,267 @@
+import contextvars
+import functools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+TRACEPARENT: str = "traceparent"
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+MAX_STATEMENT: int = 500
+
+# The span of the current sampled trace, None outside of sampled traces.
+_current: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+_export_lock: threading.Lock = threading.Lock()
+_export_file = None
+
+
+class Trace:
+    """
+    The Trace class collects the finished spans of a sampled trace, so they are exported together
+    with a single write when the root span ends.
+    """
+    def __init__(self, trace_id: str) -> None:
+        """
+        The __init__ function is called when creating an instance of the Trace class. Accepts the W3C trace id.
+        """
+        self.trace_id = trace_id
+        self.finished: List[dict] = []
+        self.exported: bool = False
+
+
+class Span:
+    """
+    The Span class is a timed operation of a sampled trace. Used as a context manager, it becomes the parent
+    of the spans started inside it, also in the threads started with the wrap function, and is recorded when
+    it ends. An exception leaving the span marks it as failed.
+    """
+    def __init__(
+        self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any], root: bool = False
+    ) -> None:
+        """
+        The __init__ function is called when creating an instance of the Span class. Accepts the trace,
+        the name of the operation, the id of the parent span, the attributes and whether the span is the root
+        of the trace in this process.
+        """
+        self.trace = trace
+        self.name = name
+        self.span_id: str = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.root = root
+        self._token = None
+        self._start: int = 0
+        self._started: int = 0
+
+    @property
+    def traceparent(self) -> str:
+        """
+        The traceparent function defines the property method of the class. Returns the W3C traceparent header
+        identifying this span as the parent of the calls of other services.
+        """
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        """
+        The set_attribute function defines a class method. Accepts the name and the value of an attribute
+        and adds it to the span.
+        """
+        self.attributes[name] = value
+
+    def __enter__(self) -> "Span":
+        """
+        The __enter__ function starts the span and makes it the current span.
+        """
+        self._token = _current.set(self)
+        self._start = time.time_ns()
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """
+        The __exit__ function ends the span, restores the previous current span and records the span.
+        The root span exports the whole trace.
+        """
+        duration: int = time.perf_counter_ns() - self._started
+        _current.reset(self._token)
+        record: dict = {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self._start / 1e9,
+            "duration_ms": round(duration / 1e6, 3),
+            "status": "error" if exc_type else "ok",
+            "attributes": self.attributes,
+        }
+        if exc_type:
+            record["attributes"]["error"] = f"{exc_type.__name__}: {exc}"
+        self.trace.finished.append(record)
+        if self.root or self.trace.exported:
+            self.trace.exported = True
+            export(self.trace.finished)
+            self.trace.finished = []
+
+
+class NoopSpan:
+    """
+    The NoopSpan class replaces the Span class outside of sampled traces, so an unsampled request
+    only pays for a context variable lookup per span.
+    """
+    traceparent: Optional[str] = None
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        """
+        The set_attribute function defines a class method. Ignores the attribute.
+        """
+
+    def __enter__(self) -> "NoopSpan":
+        """
+        The __enter__ function does nothing and returns the span itself.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """
+        The __exit__ function does nothing.
+        """
+
+
+NOOP: NoopSpan = NoopSpan()
+
+
+def current() -> Optional[Span]:
+    """
+    The current function does not accept any parameters. Returns the current span or None
+    outside of sampled traces.
+    """
+    return _current.get()
+
+
+def span(name: str, **attributes) -> Any:
+    """
+    The span function accepts the name of the operation and its attributes. Returns a new child span
+    of the current span, or a span doing nothing outside of sampled traces.
+    """
+    parent: Optional[Span] = _current.get()
+    if parent is None:
+        return NOOP
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes) -> Any:
+    """
+    The start_trace function accepts the name of the root operation, the traceparent header of the caller
+    and the attributes. Continues the trace of the caller if the caller sampled it, otherwise starts a new trace
+    with the probability of the TRACING_SAMPLE_RATE setting. Returns the root span, or a span doing nothing
+    if the trace is not sampled.
+    """
+    match = TRACEPARENT_PATTERN.match(traceparent) if traceparent else None
+    if match is not None:
+        if not int(match.group(3), 16) & 1:
+            return NOOP
+        return Span(Trace(match.group(1)), name, match.group(2), attributes, root=True)
+    if random.random() >= settings.TRACING_SAMPLE_RATE:
+        return NOOP
+    return Span(Trace(f"{random.getrandbits(128):032x}"), name, None, attributes, root=True)
+
+
+def wrap(func: Callable) -> Callable:
+    """
+    The wrap function accepts a function to be run in another thread. Returns a function running it
+    in a copy of the current context, so the spans it starts belong to the current trace, and tracing
+    the database queries of that thread.
+    """
+    if _current.get() is None:
+        return func
+    context: contextvars.Context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        def run():
+            with trace_queries():
+                return func(*args, **kwargs)
+        return context.copy().run(run)
+    return wrapper
+
+
+def trace_queries() -> ExitStack:
+    """
+    The trace_queries function does not accept any parameters. Returns a context manager recording the database
+    queries of the current thread as spans while the current trace is sampled.
+    """
+    stack: ExitStack = ExitStack()
+    if _current.get() is not None:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(_query_span))
+    return stack
+
+
+def _query_span(execute: Callable, sql: str, params, many: bool, context: dict):
+    """
+    The _query_span function is a database execute wrapper. Runs the query inside a span with the vendor,
+    the alias of the database and the statement without the parameters.
+    """
+    connection = context["connection"]
+    with span(
+        "db.query", **{"db.system": connection.vendor, "db.alias": connection.alias,
+                       "db.statement": sql[:MAX_STATEMENT], "db.many": many}
+    ):
+        return execute(sql, params, many, context)
+
+
+def export(records: List[dict]) -> None:
+    """
+    The export function accepts the finished spans of a trace and appends them as JSON lines to the file
+    of the TRACING_EXPORT setting, or to the standard output if it is '-'.
+    """
+    global _export_file
+    data: str = "".join(json.dumps(record, default=str) + "\n" for record in records)
+    with _export_lock:
+        if _export_file is None:
+            target: str = settings.TRACING_EXPORT
+            _export_file = sys.stdout if target == "-" else open(target, "a", encoding="utf-8")
+        _export_file.write(data)
+        _export_file.flush()
+
+
+class TracingMiddleware:
+    """
+    The TracingMiddleware class starts a trace for a sampled request or a request of a sampled trace
+    of the caller, traces its database queries and returns the traceresponse header with the trace id.
+    """
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """
+        The __init__ function is called when creating an instance of the TracingMiddleware class.
+        Accepts the next handler of the request.
+        """
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        The __call__ function processes the request. Calls the next handler inside the root span
+        named after the method and the route of the request.
+        """
+        root = start_trace(
+            f"{request.method} {request.path}", request.headers.get(TRACEPARENT),
+            **{"http.method": request.method, "http.target": request.path},
+        )
+        if root is NOOP:
+            return self.get_response(request)
+        with root, trace_queries():
+            response: HttpResponse = self.get_response(request)
+            match = getattr(request, "resolver_match", None)
+            if match is not None and match.route:
+                root.name = f"{request.method} /{match.route}"
+            root.set_attribute("http.status_code", response.status_code)
+        response["traceresponse"] = root.traceparent
+        return response
@@ -0,0 +1,4 @@
+"""
+Empty URL configuration of the lean settings profile used by the bot and background worker processes.
+"""
+urlpatterns = []
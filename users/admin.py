@@ -1,5 +1,21 @@
+from typing import Tuple
+
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from test_task.paginator import EstimatedCountPaginator
 from users.models import User
 
-admin.site.register(User)
+
+class UserAdmin(BaseUserAdmin):
+    """
+    The UserAdmin class inherits from the UserAdmin class from the django.contrib.auth.admin module. Searches users
+    by the prefix of the username or the exact email, which also serves the autocomplete of the user fields
+    in the other models, and shows an estimated number of users.
+    """
+    search_fields: Tuple[str, ...] = ("^username", "=email")
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+
+admin.site.register(User, UserAdmin)
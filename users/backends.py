@@ -0,0 +1,40 @@
+from typing import Optional
+
+from django.contrib.auth.backends import ModelBackend
+from django.http import HttpRequest
+
+from users.hashing import get_service
+from users.models import User
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    The PooledModelBackend class inherits from the ModelBackend class from the django.contrib.auth.backends module.
+    Checks passwords in the pool of the hashing service instead of the request thread and stores the new hash
+    when the password was hashed with another hasher or cost than the preferred one.
+    """
+    def authenticate(
+        self, request: Optional[HttpRequest], username: Optional[str] = None, password: Optional[str] = None, **kwargs
+    ) -> Optional[User]:
+        """
+        The authenticate function overrides the method of the parent class. Accepts the request, the username
+        and the password. Returns the user if the password is correct and the user may log in, otherwise None.
+        """
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user: User = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash once anyway to reduce the timing difference between an existing and a nonexistent user.
+            get_service().make_password(password)
+            return None
+
+        valid, rehashed = get_service().check_password(password, user.password)
+        if not valid or not self.user_can_authenticate(user):
+            return None
+        if rehashed:
+            user.password = rehashed
+            user.save(update_fields=['password'])
+        return user
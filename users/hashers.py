@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    The TunedPBKDF2PasswordHasher class inherits from the PBKDF2PasswordHasher class from the
+    django.contrib.auth.hashers module. Uses the number of iterations from the PASSWORD_HASH_ITERATIONS setting.
+    Hashes with another number of iterations are still verified and are rehashed on the next login.
+    """
+    @property
+    def iterations(self) -> int:
+        """
+        The iterations function defines the property method of the class. Returns the number of iterations
+        from the settings or the default of the parent class.
+        """
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
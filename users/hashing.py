@@ -0,0 +1,155 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Tuple
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingOverloaded(APIException):
+    """
+    The HashingOverloaded class inherits from the APIException class from the rest_framework.exceptions module.
+    Is raised when the queue of the password hashing pool is full, so the request fails with 503 and
+    a Retry-After header instead of waiting behind the queue.
+    """
+    status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail: str = 'The server is busy, please retry later.'
+    default_code: str = 'hashing_overloaded'
+    wait: int = 1
+
+
+def setup_worker(settings_module: str) -> None:
+    """
+    The setup_worker function accepts the name of the settings module. Configures Django in a freshly
+    started worker process of the pool.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def hash_password(password: str) -> str:
+    """
+    The hash_password function accepts the raw password. Runs in a worker process and returns the password
+    hashed with the preferred hasher.
+    """
+    return make_password(password)
+
+
+def verify_password(password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    """
+    The verify_password function accepts the raw password and the stored hash. Runs in a worker process.
+    Returns whether the password is correct and, if the hash was made with another hasher or cost than the preferred
+    one, the new hash of the correct password, otherwise None.
+    """
+    rehashed: List[str] = []
+    valid: bool = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, (rehashed[0] if rehashed else None)
+
+
+class HashingService:
+    """
+    The HashingService class runs password hashing in a bounded pool of PASSWORD_HASHING_WORKERS processes, so slow
+    hashers do not occupy the request threads and use all CPU cores. At most PASSWORD_HASHING_MAX_QUEUE hashes wait
+    or run at a time; further requests are rejected with HashingOverloaded. Without workers hashes are computed in
+    the calling thread.
+    """
+    def __init__(self, workers: int, max_queue: int, timeout: float) -> None:
+        """
+        The __init__ function is called when creating an instance of the HashingService class. Accepts as parameters
+        the number of worker processes, the maximum number of queued hashes and the maximum time to wait for a hash.
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(max(max_queue, 1))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def make_password(self, password: str) -> str:
+        """
+        The make_password function defines a class method. Accepts the raw password and returns its hash.
+        """
+        return self.run(hash_password, password)
+
+    def check_password(self, password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+        """
+        The check_password function defines a class method. Accepts the raw password and the stored hash. Returns
+        whether the password is correct and the new hash to store if the password must be rehashed.
+        """
+        return self.run(verify_password, password, encoded)
+
+    def run(self, func: Callable, *args):
+        """
+        The run function defines a class method. Accepts a function and its arguments. Runs the function in the pool
+        and returns its result. Raises a HashingOverloaded exception if the queue is full, the result is not ready
+        within the timeout or the pool is broken.
+        """
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded
+        try:
+            future: Future = self.executor().submit(func, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self.reset()
+            raise HashingOverloaded
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Not the builtin TimeoutError before Python 3.11.
+            raise HashingOverloaded
+        except BrokenProcessPool:
+            self.reset()
+            raise HashingOverloaded
+
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        The executor function defines a class method. Returns the pool of worker processes, starting it
+        on the first use.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=setup_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'test_task.settings'),),
+                )
+            return self._executor
+
+    def reset(self) -> None:
+        """
+        The reset function defines a class method. Drops a broken pool, so the next hash starts a new one.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_service: Optional[HashingService] = None
+_service_lock: threading.Lock = threading.Lock()
+
+
+def get_service() -> HashingService:
+    """
+    The get_service function does not accept any parameters. Returns the hashing service of the process,
+    creating it from the settings on the first call.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = HashingService(
+                workers=settings.PASSWORD_HASHING_WORKERS,
+                max_queue=settings.PASSWORD_HASHING_MAX_QUEUE,
+                timeout=settings.PASSWORD_HASHING_TIMEOUT,
+            )
+        return _service
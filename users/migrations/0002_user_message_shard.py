@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='message_shard',
+            field=models.CharField(blank=True, default='', help_text='База данных с сообщениями пользователя; по умолчанию основная. Меняется командой movemessages', max_length=32, verbose_name='Шард сообщений'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 
 class User(AbstractUser):
@@ -6,4 +7,7 @@ class User(AbstractUser):
     The User class is an inheritor of the AbstractUser class from the django.contrib.auth.models library.
     This is the data model contained in the user database table.
     """
-    pass
+    message_shard = models.CharField(
+        max_length=32, blank=True, default="", verbose_name="Шард сообщений",
+        help_text="База данных с сообщениями пользователя; по умолчанию основная. Меняется командой movemessages",
+    )
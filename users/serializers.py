@@ -1,11 +1,11 @@
 from typing import List
 
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
 
+from users.hashing import get_service
 from users.models import User
 
 
@@ -45,8 +45,8 @@ class UserCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data) -> User:
         """
         The create function overrides the method of the parent class. Takes validated_data values as parameters.
-        Creates an instance of the User class, adds the value of the hashed password, and stores the object
-        in the database. Returns the created object.
+        Creates an instance of the User class, adds the value of the password hashed by the hashing service,
+        and stores the object in the database. Returns the created object.
         """
         user: User = User(
             username=validated_data['username'],
@@ -54,7 +54,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
             last_name=validated_data.get('last_name', ''),
             email=validated_data.get('email', ''),
         )
-        user.set_password(validated_data['password'])
+        user.password = get_service().make_password(validated_data['password'])
         user.save()
         return user
 
@@ -115,13 +115,15 @@ class UpdatePasswordSerializer(serializers.Serializer):
     def validate(self, attrs: dict) -> dict:
         """
         The validate function overrides the method of the parent class. Accepts the attrs object as parameters.
-        Checks the presence of user authentication and the correctness of the entered value 'old_password' in case
-        of incorrect data raises a ValidationError exception. Returns the object received as a parameter.
+        Checks the presence of user authentication and, with the hashing service, the correctness of the entered
+        value 'old_password'; in case of incorrect data raises a ValidationError exception. Returns the object
+        received as a parameter.
         """
         user: User = attrs['user']
         if not user:
             raise NotAuthenticated
-        if not user.check_password(attrs['old_password']):
+        valid, _ = get_service().check_password(attrs['old_password'], user.password)
+        if not valid:
             raise serializers.ValidationError({'old_password': 'uncorrect password'})
         return attrs
 
@@ -136,10 +138,10 @@ class UpdatePasswordSerializer(serializers.Serializer):
         """
         The update function overrides the method of the parent class. Accepts instance objects as parameters
         an instance of the User class and validated_data. If the method is called, it updates the value
-        of the 'password' field and saving the updated instance in the database. Returns an updated instance
-        of the User class.
+        of the 'password' field with the new password hashed by the hashing service and saving the updated instance
+        in the database. Returns an updated instance of the User class.
         """
-        instance.password = make_password(validated_data['new_password'])
+        instance.password = get_service().make_password(validated_data['new_password'])
         instance.save(update_fields=('password',))
         return instance
 